@@ -0,0 +1 @@
+"""Benchmarks of SeisCTypes, see benchmarks.suite and benchmarks.generate"""
@@ -0,0 +1,41 @@
+"""Import time of seistrace and seissegy, every run in a fresh interpreter.
+
+    python benchmarks/bench_import.py [runs]
+
+It is also the "import" case of benchmarks.suite.
+
+Compare the numbers on two checkouts to see the effect of a change."""
+
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_time(module, runs):
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    base, res = [], []
+    for i in range(runs):
+        for code, lst in (("import numpy", base), ("import " + module, res)):
+            start = time.perf_counter()
+            subprocess.run([sys.executable, "-c", code], env=env, check=True)
+            lst.append(time.perf_counter() - start)
+    # numpy import is shared by all versions, so it is subtracted
+    return min(res) - min(base), sum(res) / runs - sum(base) / runs
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    for module in ("seistrace", "seissegy"):
+        best, mean = import_time(module, runs)
+        print(
+            "{:10} best {:7.2f} ms  mean {:7.2f} ms".format(
+                module, best * 1e3, mean * 1e3
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""Deterministic synthetic SEG-Y and SU files for benchmarks.
+
+    python -m benchmarks.generate out.sgy --traces 10000 --samples 2000 --format 1
+    python -m benchmarks.generate out.su --traces 10000 --samples 2000
+
+The same arguments always give the same bytes, so timings of different
+versions are comparable."""
+
+import argparse
+
+import numpy as np
+
+import seiscodec
+import seisheader
+from seisfile import BIN_HEADERS, FILE_HEADER_SIZE, TEXT_HEADER_SIZE, text_header
+
+CHUNK = 1024
+CHANNELS = 240
+
+
+def make_segy(
+    file_name,
+    traces,
+    samples,
+    format_code=5,
+    byte_order=">",
+    fixed=True,
+    ext_headers=0,
+    samp_int=2000,
+    seed=0,
+):
+    """Write SEG-Y rev 2 file. Variable length files (fixed=False) have
+    traces up to 4 samples shorter than samples"""
+    bin_hdr = {
+        "samp_int": samp_int,
+        "samp_per_tr": samples,
+        "format_code": format_code,
+        "SEGY_rev_major_ver": 2,
+        "fixed_tr_length": int(fixed),
+        "ext_text_headers_num": ext_headers,
+        "num_of_tr_in_file": traces if fixed else 0,
+        "byte_off_of_first_tr": FILE_HEADER_SIZE + TEXT_HEADER_SIZE * ext_headers,
+    }
+    flds = {k: (b - 1, tp) for k, (b, tp) in BIN_HEADERS.items()}
+    head = np.zeros(1, seisheader.header_dtype(flds, byte_order, FILE_HEADER_SIZE))
+    for k, v in bin_hdr.items():
+        head[k] = v
+    with open(file_name, "wb") as f:
+        f.write(text_header("SYNTHETIC SEG-Y FORMAT {}".format(format_code)))
+        # Rev 2 byte order constant at byte 3297
+        raw = bytearray(head.tobytes()[TEXT_HEADER_SIZE:])
+        raw[96:100] = np.array(16909060, byte_order + "u4").tobytes()
+        f.write(raw)
+        for i in range(ext_headers):
+            f.write(text_header("EXTENDED TEXT HEADER {}".format(i + 1)))
+        _write_traces(
+            f, "segy", traces, samples, format_code, byte_order, fixed, samp_int, seed
+        )
+
+
+def make_su(file_name, traces, samples, fixed=True, samp_int=2000, seed=0):
+    """Write SU file in native byte order"""
+    order = "<" if np.little_endian else ">"
+    with open(file_name, "wb") as f:
+        _write_traces(f, "su", traces, samples, 5, order, fixed, samp_int, seed)
+
+
+def _write_traces(
+    f, kind, traces, samples, format_code, byte_order, fixed, samp_int, seed
+):
+    rng = np.random.default_rng(seed)
+    hdr_dtype = seisheader.header_dtype(seisheader.fields(kind), byte_order)
+    t = np.arange(samples) * samp_int * 1e-6
+    wavelet = np.sin(2 * np.pi * 25 * t) * np.exp(-t * 3)
+    amp, shift = _scale(format_code)
+    for start in range(0, traces, CHUNK):
+        num = min(CHUNK, traces - start)
+        i = np.arange(start, start + num)
+        ns = np.full(num, samples) if fixed else samples - i % 5
+        hdr = np.zeros(num, hdr_dtype)
+        hdr["TRC_SEQ_LINE"] = hdr["TRC_SEQ_SGY"] = i + 1
+        hdr["FFID"] = i // CHANNELS + 1
+        hdr["CHAN"] = i % CHANNELS + 1
+        hdr["CDP"] = i // 2 + 1
+        hdr["OFFSET"] = (i % CHANNELS) * 25 - CHANNELS * 25 // 2
+        hdr["SOU_X"] = hdr["FFID"] * 50
+        hdr["REC_X"] = hdr["SOU_X"] + hdr["OFFSET"]
+        hdr["SAMP_NUM"] = ns
+        hdr["SAMP_INT"] = samp_int
+        if kind == "segy":
+            hdr["INLINE"] = i // CHANNELS + 1000
+            hdr["XLINE"] = i % CHANNELS + 2000
+        data = (wavelet + rng.normal(0, 0.05, (num, samples))) * amp + shift
+        raw = seiscodec.encode(data, format_code, byte_order)
+        size = seiscodec.SAMPLE_SIZE[format_code]
+        for j in range(num):
+            f.write(hdr[j].tobytes())
+            f.write(raw[j, : ns[j] * size].tobytes())
+
+
+def _scale(format_code):
+    """Amplitude and shift that keep samples inside integer formats"""
+    if format_code in (2, 3, 7, 8, 9, 10, 11, 12, 15, 16):
+        bits = seiscodec.SAMPLE_SIZE[format_code] * 8
+        unsigned = format_code in (10, 11, 12, 15, 16)
+        return 2.0 ** (bits - 3), 2.0 ** (bits - 1) if unsigned else 0.0
+    return 1000.0, 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("file_name", help=".su files are written as SU")
+    parser.add_argument("--traces", type=int, default=10000)
+    parser.add_argument("--samples", type=int, default=1000)
+    parser.add_argument("--format", type=int, default=5, help="SEG-Y format code")
+    parser.add_argument("--little-endian", action="store_true")
+    parser.add_argument("--variable", action="store_true", help="variable length")
+    parser.add_argument("--ext-headers", type=int, default=0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    if args.file_name.endswith(".su"):
+        make_su(
+            args.file_name, args.traces, args.samples, not args.variable, seed=args.seed
+        )
+    else:
+        make_segy(
+            args.file_name,
+            args.traces,
+            args.samples,
+            args.format,
+            "<" if args.little_endian else ">",
+            not args.variable,
+            args.ext_headers,
+            seed=args.seed,
+        )
+
+
+if __name__ == "__main__":
+    main()
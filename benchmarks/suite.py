@@ -0,0 +1,344 @@
+"""Throughput and peak memory of readers, headers and writers.
+
+    python -m benchmarks.suite [--traces N] [--samples N] [--format 1] [--json out.json] [case ...]
+
+Input files are made by benchmarks.generate and kept in --data directory
+between runs. Every case runs in a fresh interpreter, so its peak memory
+is not shared with other cases. Save JSON of two checkouts and compare
+them with --compare old.json."""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks import bench_import, generate
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CASES = {}
+
+
+def case(func):
+    """Register case. It gets parsed arguments with input file names and
+    returns numbers of traces and sample bytes it processed"""
+    CASES[func.__name__] = func
+    return func
+
+
+@case
+def segy_traces(args):
+    from seissegy import ISegy
+
+    num = 0
+    with ISegy(args.segy) as f:
+        for trc in f.traces():
+            trc.samples()
+            num += 1
+    return num, num * args.samples * 8
+
+
+@case
+def segy_headers(args):
+    from seissegy import ISegy
+
+    num = 0
+    with ISegy(args.segy) as f:
+        for hdr in f.headers():
+            hdr.get("FFID")
+            num += 1
+    return num, 0
+
+
+@case
+def segy_blocks(args):
+    from seissegy import ISegy
+
+    num = 0
+    with ISegy(args.segy) as f:
+        for block in f.blocks(1024):
+            num += len(block)
+    return num, num * args.samples * 8
+
+
+@case
+def segy_mmap_blocks(args):
+    from seissegy import ISegy
+
+    num = 0
+    with ISegy(args.segy, backend="mmap") as f:
+        for block in f.blocks(1024):
+            num += len(block)
+    return num, num * args.samples * 8
+
+
+@case
+def segy_mmap_traces(args):
+    from seissegy import ISegy
+
+    num = 0
+    with ISegy(args.segy, backend="mmap") as f:
+        for trc in f.traces():
+            trc.samples()
+            num += 1
+    return num, num * args.samples * 8
+
+
+@case
+def segy_header_table(args):
+    from seissegy import ISegy
+
+    with ISegy(args.segy) as f:
+        num = len(f.read_header_table(["FFID", "CHAN", "CDP", "OFFSET"])["FFID"])
+    return num, 0
+
+
+@case
+def su_traces(args):
+    from seissegy import ISU
+
+    num = 0
+    with ISU(args.su) as f:
+        for trc in f.traces():
+            trc.samples()
+            num += 1
+    return num, num * args.samples * 8
+
+
+@case
+def su_headers(args):
+    from seissegy import ISU
+
+    num = 0
+    with ISU(args.su) as f:
+        for hdr in f.headers():
+            hdr.get("FFID")
+            num += 1
+    return num, 0
+
+
+@case
+def header_get(args):
+    from seistrace import TraceHeader
+
+    with TraceHeader() as hdr:
+        hdr.set("FFID", 1)
+        for i in range(args.traces):
+            hdr.get("FFID")
+    return args.traces, 0
+
+
+@case
+def header_set(args):
+    from seistrace import TraceHeader
+
+    with TraceHeader() as hdr:
+        for i in range(args.traces):
+            hdr.set("FFID", i)
+    return args.traces, 0
+
+
+@case
+def segy_write(args):
+    from seissegy import ISegy, OSegy
+
+    with ISegy(args.segy) as f:
+        bin_hdr = f.get_binary_header()
+        trc = f.read_trace()
+        with OSegy(args.out + ".sgy", bin_header=bin_hdr) as out:
+            for i in range(args.traces):
+                out.write_trace(trc)
+    return args.traces, args.traces * args.samples * 8
+
+
+@case
+def segy_write_block(args):
+    from seissegy import ISegy, OSegy
+
+    samples = np.zeros((1024, args.samples))
+    with ISegy(args.segy) as f:
+        with OSegy(args.out + ".sgy", bin_header=f.get_binary_header()) as out:
+            for start in range(0, args.traces, len(samples)):
+                out.write_block(samples[: args.traces - start])
+    return args.traces, args.traces * args.samples * 8
+
+
+@case
+def su_write(args):
+    from seissegy import ISU, OSU
+
+    with ISU(args.su) as f:
+        trc = f.read_trace()
+        with OSU(args.out + ".su") as out:
+            for i in range(args.traces):
+                out.write_trace(trc)
+    return args.traces, args.traces * args.samples * 8
+
+
+@case
+def segy_to_su(args):
+    import seisconvert
+
+    res = seisconvert.convert(args.segy, args.out + ".su")
+    return res["traces"], res["traces"] * args.samples * 8
+
+
+def run_case(args):
+    """Best of args.repeat runs of one case in this interpreter"""
+    best = None
+    for i in range(args.repeat):
+        start = time.perf_counter()
+        num, nbytes = CASES[args.run](args)
+        sec = time.perf_counter() - start
+        best = sec if best is None else min(best, sec)
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    rss /= 2**20 if sys.platform == "darwin" else 2**10
+    return {
+        "case": args.run,
+        "seconds": best,
+        "traces_per_s": num / best,
+        "mb_per_s": nbytes / best / 2**20,
+        "peak_rss_mb": rss,
+    }
+
+
+def make_inputs(args):
+    """Generate input files unless they are already in data directory"""
+    name = "f{}-{}x{}{}-e{}".format(
+        args.format,
+        args.traces,
+        args.samples,
+        "v" if args.variable else "",
+        args.ext_headers,
+    )
+    args.segy = os.path.join(args.data, name + ".sgy")
+    args.su = os.path.join(args.data, name + ".su")
+    args.out = os.path.join(args.data, "out-" + name)
+    if not os.path.exists(args.segy):
+        generate.make_segy(
+            args.segy,
+            args.traces,
+            args.samples,
+            args.format,
+            fixed=not args.variable,
+            ext_headers=args.ext_headers,
+        )
+    if not os.path.exists(args.su):
+        generate.make_su(args.su, args.traces, args.samples, not args.variable)
+
+
+def run_all(args, cases):
+    results = []
+    for name in cases:
+        if name == "import":
+            for module in ("seistrace", "seissegy"):
+                best, mean = bench_import.import_time(module, args.repeat * 5)
+                results.append(
+                    {"case": "import_" + module, "seconds": best, "mean": mean}
+                )
+            continue
+        cmd = [sys.executable, "-m", "benchmarks.suite", "--run", name]
+        cmd += _forward(args)
+        env = dict(os.environ, PYTHONPATH=ROOT)
+        res = subprocess.run(cmd, env=env, capture_output=True, text=True)
+        if res.returncode:
+            err = res.stderr.strip().splitlines()
+            results.append({"case": name, "error": err[-1] if err else "failed"})
+        else:
+            results.append(json.loads(res.stdout))
+    return results
+
+
+def _forward(args):
+    lst = ["--data", args.data, "--traces", str(args.traces)]
+    lst += ["--samples", str(args.samples), "--format", str(args.format)]
+    lst += ["--ext-headers", str(args.ext_headers), "--repeat", str(args.repeat)]
+    return lst + (["--variable"] if args.variable else [])
+
+
+def meta(args):
+    try:
+        rev = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+        ).stdout.strip()
+    except OSError:
+        rev = ""
+    return {
+        "revision": rev,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "traces": args.traces,
+        "samples": args.samples,
+        "format": args.format,
+        "variable": args.variable,
+        "ext_headers": args.ext_headers,
+    }
+
+
+def report(results, old=None):
+    prev = {r["case"]: r for r in (old or {}).get("results", [])}
+    for r in results:
+        if "error" in r:
+            print("{:20} error: {}".format(r["case"], r["error"]))
+            continue
+        line = "{:20} {:9.3f} ms".format(r["case"], r["seconds"] * 1e3)
+        if "traces_per_s" in r:
+            line += " {:12.0f} tr/s {:9.1f} MB/s {:8.1f} MB peak".format(
+                r["traces_per_s"], r["mb_per_s"], r["peak_rss_mb"]
+            )
+        p = prev.get(r["case"])
+        if p and p.get("seconds"):
+            line += "  x{:.2f}".format(p["seconds"] / r["seconds"])
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("cases", nargs="*", help="default all and import")
+    parser.add_argument("--traces", type=int, default=20000)
+    parser.add_argument("--samples", type=int, default=1000)
+    parser.add_argument("--format", type=int, default=5)
+    parser.add_argument("--variable", action="store_true")
+    parser.add_argument("--ext-headers", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--data", help="directory for input and output files")
+    parser.add_argument("--json", help="save results to file")
+    parser.add_argument("--compare", help="JSON of earlier run to compare with")
+    parser.add_argument("--run", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.data is None:
+        args.data = os.path.join(tempfile.gettempdir(), "seisctypes-bench")
+    os.makedirs(args.data, exist_ok=True)
+    make_inputs(args)
+    if args.run:
+        print(json.dumps(run_case(args)))
+        return
+    cases = args.cases or list(CASES) + ["import"]
+    unknown = set(cases) - set(CASES) - {"import"}
+    if unknown:
+        parser.error("unknown cases: " + ", ".join(sorted(unknown)))
+    results = run_all(args, cases)
+    old = None
+    if args.compare:
+        with open(args.compare) as f:
+            old = json.load(f)
+    report(results, old)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"meta": meta(args), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
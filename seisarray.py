@@ -0,0 +1,124 @@
+import numpy as np
+
+
+class SeisArray:
+    """Lazy (traces, samples) array of samples of ISegy or ISU reader with
+    traces of equal length. Indexing reads only requested traces and the
+    range of samples holding requested ones, np.asarray reads all of
+    them. map_blocks and reduce_blocks stream the file by blocks of chunk
+    traces, so memory stays bounded whatever the file size. Arrays of
+    trace and sample numbers select them independently, e.g. a[[1, 5],
+    [0, 9]] is 2 x 2 block"""
+
+    ndim = 2
+
+    def __init__(self, reader, dtype=np.float64, chunk=1024):
+        self.reader = reader
+        self.dtype = np.dtype(dtype)
+        self.chunk = chunk
+        self.shape = _shape(reader)
+
+    @property
+    def size(self):
+        return self.shape[0] * self.shape[1]
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __repr__(self):
+        return "SeisArray({!r}, shape={}, dtype={})".format(
+            self.reader.file_name, self.shape, self.dtype
+        )
+
+    def __array__(self, dtype=None, copy=None):
+        res = self[:]
+        return res if dtype is None else res.astype(dtype, copy=False)
+
+    def __getitem__(self, key):
+        if not isinstance(key, tuple):
+            key = (key,)
+        if len(key) > 2:
+            raise IndexError("Too many indices")
+        rows, cols = key + (slice(None),) * (2 - len(key))
+        traces = np.arange(self.shape[0])[rows]
+        samples = np.arange(self.shape[1])[cols]
+        res = self.read(np.atleast_1d(traces), np.atleast_1d(samples))
+        if np.ndim(samples) == 0:
+            res = res[:, 0]
+        return res[0] if np.ndim(traces) == 0 else res
+
+    def read(self, traces, samples):
+        """2D array of samples with given numbers of traces with given
+        numbers. Only samples from the first to the last of them are read"""
+        if traces.size == 0 or samples.size == 0:
+            return np.empty((traces.size, samples.size), self.dtype)
+        first = int(samples.min())
+        window = slice(first, int(samples.max()) + 1)
+        reader = self.reader
+        if reader._indexed():
+            block = reader.trace_file().read_block(
+                traces, dtype=self.dtype, window=window
+            )
+        else:
+            order, inverse = np.unique(traces, return_inverse=True)
+            rows = list(reader.traces_at(order, self.dtype, window))
+            block = np.stack(rows)[inverse]
+        if samples.size == block.shape[1] and np.all(np.diff(samples) == 1):
+            return block
+        return block[:, samples - first]
+
+    def blocks(self, window=None, prefetch=None):
+        """Iterate over pairs of number of the first trace and 2D array of
+        samples of next chunk traces, see ISegy.blocks. Without prefetch
+        the same array is refilled at every step"""
+        first = 0
+        for block in self.reader.blocks(
+            self.chunk, dtype=self.dtype, prefetch=prefetch, window=window
+        ):
+            yield first, block
+            first += block.shape[0]
+
+    def map_blocks(self, func, out=None, window=None, prefetch=None):
+        """Call func(block, first) for every block of chunk traces, see
+        blocks, and write returned arrays with one row per trace of block
+        into rows of out. out, e.g. np.memmap for large results, is
+        allocated from the first result if None. Returns out"""
+        for first, block in self.blocks(window, prefetch):
+            res = np.asarray(func(block, first))
+            if res.shape[:1] != block.shape[:1]:
+                raise ValueError("Result should have one row per trace")
+            if out is None:
+                out = np.empty((self.shape[0],) + res.shape[1:], res.dtype)
+            out[first : first + res.shape[0]] = res
+        return out
+
+    def reduce_blocks(
+        self, func, combine=np.add, initial=None, window=None, prefetch=None
+    ):
+        """Result of combining func(block, first) of every block of chunk
+        traces by combine(result, value), starting from initial if it is
+        not None, e.g. reduce_blocks(lambda b, i: (b**2).sum(axis=0)) for
+        sum of squares of every sample"""
+        res = initial
+        for first, block in self.blocks(window, prefetch):
+            value = func(block, first)
+            res = value if res is None else combine(res, value)
+        return res
+
+
+def _shape(reader):
+    """(traces, samples) of reader. Files TraceFile can't open are counted
+    by one pass over headers of the C reader"""
+    try:
+        f = reader.trace_file()
+    except ValueError:
+        f = None
+    if f is not None:
+        if not f.fixed:
+            raise ValueError("Traces have different length")
+        return len(f), f.samp_num
+    samp_num = reader.read_header_table(["SAMP_NUM"])["SAMP_NUM"]
+    reader.rewind()
+    if samp_num.size and np.any(samp_num != samp_num[0]):
+        raise ValueError("Traces have different length")
+    return samp_num.size, int(samp_num[0]) if samp_num.size else 0
@@ -0,0 +1,106 @@
+from collections import OrderedDict
+
+# Memory taken by Trace or TraceHeader object besides samples, mostly C
+# header map
+ENTRY_OVERHEAD = 1024
+
+
+class LRU:
+    """Values by key bounded by their total size in bytes. The least
+    recently used ones are evicted first, values larger than the whole
+    budget are not kept"""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.__items = OrderedDict()
+
+    def __len__(self):
+        return len(self.__items)
+
+    def __contains__(self, key):
+        return key in self.__items
+
+    def get(self, key, load, size):
+        """Value of key, on miss it is load(key) which takes size(value)
+        bytes"""
+        item = self.__items.get(key)
+        if item is not None:
+            self.hits += 1
+            self.__items.move_to_end(key)
+            return item[0]
+        self.misses += 1
+        value = load(key)
+        self.put(key, value, size(value))
+        return value
+
+    def peek(self, key):
+        """Value of key or None, neither counted nor made recent"""
+        item = self.__items.get(key)
+        return None if item is None else item[0]
+
+    def put(self, key, value, nbytes):
+        old = self.__items.pop(key, None)
+        if old is not None:
+            self.bytes -= old[1]
+        if nbytes > self.max_bytes:
+            return
+        self.__items[key] = (value, nbytes)
+        self.bytes += nbytes
+        while self.bytes > self.max_bytes:
+            k, (v, n) = self.__items.popitem(last=False)
+            self.bytes -= n
+            self.evictions += 1
+
+    def clear(self):
+        self.__items.clear()
+        self.bytes = 0
+
+    def snapshot(self):
+        return {
+            "entries": len(self),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+class TraceCache:
+    """Traces and headers of one reader by trace number, each kind in LRU
+    with its own budget. Header of cached trace is taken from it without
+    loading. Cached objects are shared by all lookups, so they should not
+    be changed"""
+
+    def __init__(self, max_bytes, header_bytes=0):
+        self.traces = LRU(max_bytes)
+        self.headers = LRU(header_bytes)
+
+    def trace(self, i, load):
+        return self.traces.get(i, load, _trace_bytes)
+
+    def header(self, i, load):
+        trc = self.traces.peek(i)
+        if trc is not None:
+            self.headers.hits += 1
+            return trc.header()
+        return self.headers.get(i, load, _header_bytes)
+
+    def clear(self):
+        self.traces.clear()
+        self.headers.clear()
+
+    def snapshot(self):
+        return {"traces": self.traces.snapshot(), "headers": self.headers.snapshot()}
+
+
+def _trace_bytes(trc):
+    return ENTRY_OVERHEAD + trc.samples_num() * 8
+
+
+def _header_bytes(hdr):
+    return ENTRY_OVERHEAD
@@ -0,0 +1,145 @@
+import numpy as np
+
+# Bytes per sample for every SEG-Y format code
+SAMPLE_SIZE = {
+    1: 4,
+    2: 4,
+    3: 2,
+    5: 4,
+    6: 8,
+    7: 3,
+    8: 1,
+    9: 8,
+    10: 4,
+    11: 2,
+    12: 8,
+    15: 3,
+    16: 1,
+}
+# NumPy types samples are stored in, IBM float is kept as its bit pattern
+SAMPLE_TYPES = {
+    1: "u4",
+    2: "i4",
+    3: "i2",
+    5: "f4",
+    6: "f8",
+    8: "i1",
+    9: "i8",
+    10: "u4",
+    11: "u2",
+    12: "u8",
+    16: "u1",
+}
+IBM, I24, U24 = 1, 7, 15
+
+
+def supported(format_code):
+    return format_code in SAMPLE_SIZE
+
+
+def raw_dtype(format_code, byte_order=">"):
+    """NumPy type holding samples of format_code as they are in the file,
+    None for 24 bit integers which are kept as bytes"""
+    if not supported(format_code):
+        raise ValueError("Unsupported format")
+    tp = SAMPLE_TYPES.get(format_code)
+    return np.dtype(byte_order + tp) if tp else None
+
+
+def decode(raw, format_code, byte_order=">", out=None, dtype=np.float64):
+    """Convert samples from their file representation to numbers. raw is
+    either array of bytes with samples along the last axis or array of
+    raw_dtype. Result is written into out if it is given"""
+    tp = raw_dtype(format_code, byte_order)
+    if tp is not None and raw.dtype != tp:
+        raw = raw.view(tp)
+    if format_code == IBM:
+        res = _ibm_to_float(raw, out.dtype if out is not None else dtype)
+    elif tp is None:
+        res = _int24_to_int(raw, byte_order, format_code == I24)
+    else:
+        res = raw
+    if out is None:
+        return res.astype(dtype, copy=res is raw)
+    out[...] = res
+    return out
+
+
+def encode(samples, format_code, byte_order=">", out=None):
+    """Convert numbers to file representation of format_code. Returns
+    array of bytes with samples along the last axis, written into out if
+    it is given. Integers are rounded and clipped to their range"""
+    tp = raw_dtype(format_code, byte_order)
+    samples = np.asarray(samples)
+    if format_code == IBM:
+        res = _float_to_ibm(samples).astype(tp)
+    elif tp is None:
+        res = _int_to_int24(samples, byte_order, format_code == I24)
+    elif tp.kind in "iu":
+        info = np.iinfo(tp)
+        res = np.clip(np.rint(samples), info.min, info.max).astype(tp)
+    else:
+        res = samples.astype(tp)
+    if tp is not None:
+        res = res.view(np.uint8).reshape(samples.shape[:-1] + (-1,))
+    if out is None:
+        return res
+    out[...] = res
+    return out
+
+
+def _ibm_to_float(raw, dtype):
+    u = raw.astype(np.uint32)
+    mant = (u & 0xFFFFFF).astype(dtype)
+    exp = ((u >> 24) & 0x7F).astype(np.int32) * 4 - 280
+    with np.errstate(over="ignore"):
+        res = np.ldexp(mant, exp)
+    np.negative(res, out=res, where=(u >> 31).astype(bool))
+    return res
+
+
+def _float_to_ibm(samples):
+    # float32 fits 24 bit IBM mantissa exactly, so it is not widened
+    samples = np.asarray(samples)
+    x = samples if samples.dtype == np.float32 else samples.astype(np.float64)
+    inf = np.isinf(x)
+    # Infinities become the largest IBM number of their sign
+    x = np.nan_to_num(x, nan=0.0, posinf=0.0, neginf=-0.0)
+    frac, exp = np.frexp(np.abs(x))
+    exp16 = (exp + 3) // 4
+    mant = np.rint(np.ldexp(frac, 24 - (4 * exp16 - exp))).astype(np.int64)
+    carry = mant >= 1 << 24
+    mant[carry] >>= 4
+    exp16[carry] += 1
+    exp16 += 64
+    big = (exp16 > 127) | inf
+    mant[big] = 0xFFFFFF
+    exp16[big] = 127
+    tiny = (exp16 < 0) | (mant == 0)
+    mant[tiny] = 0
+    exp16[tiny] = 0
+    res = (exp16.astype(np.uint32) << 24) | mant.astype(np.uint32)
+    res |= np.signbit(x).astype(np.uint32) << 31
+    res[tiny] = 0
+    return res
+
+
+def _int24_to_int(raw, byte_order, signed):
+    b = raw.reshape(raw.shape[:-1] + (-1, 3)).astype(np.int32)
+    if byte_order == ">":
+        res = (b[..., 0] << 16) | (b[..., 1] << 8) | b[..., 2]
+    else:
+        res = (b[..., 2] << 16) | (b[..., 1] << 8) | b[..., 0]
+    if signed:
+        res -= (res & 0x800000) << 1
+    return res
+
+
+def _int_to_int24(samples, byte_order, signed):
+    lo, hi = (-(1 << 23), (1 << 23) - 1) if signed else (0, (1 << 24) - 1)
+    v = np.clip(np.rint(samples), lo, hi).astype(np.int32) & 0xFFFFFF
+    res = np.empty(samples.shape + (3,), dtype=np.uint8)
+    shifts = (16, 8, 0) if byte_order == ">" else (0, 8, 16)
+    for j, sh in enumerate(shifts):
+        res[..., j] = (v >> sh) & 0xFF
+    return res.reshape(samples.shape[:-1] + (-1,))
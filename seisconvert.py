@@ -0,0 +1,303 @@
+"""Conversion between SEG-Y and SU files.
+
+    python -m seisconvert in.sgy out.su [--workers 4] [--remap NAME:BYTE:TYPE[:HDR_NUM]]
+    python -m seisconvert in.su out.sgy [--format 1]
+
+Files with .su extension are SU, others SEG-Y. Fixed length files are
+converted in NumPy by blocks of records read at once, and with --workers
+trace ranges are converted by that number of processes, each writing its
+part of the output in place. Other files go through libseissegy trace by
+trace."""
+
+import argparse
+import os
+import time
+
+import numpy as np
+
+import seiscodec
+import seisheader
+from seisfile import (
+    BIN_HEADERS,
+    FILE_HEADER_SIZE,
+    TEXT_HEADER_SIZE,
+    TraceFile,
+    text_header,
+)
+
+SU_FORMAT = 5
+# Formats whose samples are exact in float32
+_FLOAT32 = {1, 3, 5, 7, 8, 11, 15, 16}
+
+_worker = {}
+
+
+def convert(
+    src,
+    dst,
+    src_kind=None,
+    dst_kind=None,
+    format_code=None,
+    remaps=(),
+    chunk=4096,
+    workers=None,
+    progress=None,
+):
+    """Convert src file to dst, kinds are "segy" or "su", found from file
+    extensions if None. format_code is sample format of SEG-Y output, the
+    input one for SEG-Y input and 5 (IEEE float) for SU by default.
+    remaps are remap_trace_header arguments of the input, headers with
+    the same names are written at the same places of the output (SU
+    output can't hold ones with hdr_num). progress(done, total) is called
+    after every chunk traces. Returns dict of traces, bytes of input,
+    seconds and throughput.
+
+    Headers are copied by name, so headers absent in the output kind are
+    dropped. SEG-Y output is rev 2 fixed length file in byte order of
+    SEG-Y input (big endian for SU input) with its text header and with
+    binary header fields which locate traces rewritten"""
+    src_kind = src_kind or kind_of(src)
+    dst_kind = dst_kind or kind_of(dst)
+    remaps = list(remaps)
+    start = time.perf_counter()
+    try:
+        f = TraceFile(src, src_kind, remaps)
+    except ValueError:
+        f = None
+    if f is not None and f.decodable and f.fixed:
+        with f:
+            num, nbytes = _convert_file(
+                f, dst, dst_kind, format_code, remaps, chunk, workers, progress
+            )
+    else:
+        num, nbytes = _convert_traces(src, dst, src_kind, dst_kind, format_code, remaps)
+    sec = time.perf_counter() - start
+    return {
+        "traces": num,
+        "bytes": nbytes,
+        "seconds": sec,
+        "traces_per_s": num / sec if sec else 0.0,
+        "mb_per_s": nbytes / sec / 2**20 if sec else 0.0,
+    }
+
+
+def kind_of(file_name):
+    return "su" if file_name.lower().endswith(".su") else "segy"
+
+
+def output_remaps(remaps, kind):
+    """remap_trace_header arguments for writer of kind from reader ones"""
+    if kind == "su":
+        return [
+            {k: v for k, v in r.items() if k != "hdr_num"}
+            for r in remaps
+            if not r.get("hdr_num")
+        ]
+    return [dict(r, hdr_num=r.get("hdr_num", 0)) for r in remaps]
+
+
+class Layout:
+    """Output file of converted fixed length traces of TraceFile src"""
+
+    def __init__(self, src, kind, format_code, remaps):
+        self.kind = kind
+        if kind == "su":
+            self.format_code = SU_FORMAT
+            self.byte_order = "<" if np.little_endian else ">"
+            self.first_offset = 0
+        else:
+            default = src.format_code if src.kind == "segy" else SU_FORMAT
+            self.format_code = format_code or default
+            self.byte_order = src.byte_order if src.kind == "segy" else ">"
+            self.first_offset = FILE_HEADER_SIZE
+        self.remaps = output_remaps(remaps, kind)
+        self.fields = seisheader.fields(kind, self.remaps)
+        self.copy = [k for k in self.fields if k in src.fields]
+        extra = max([r.get("hdr_num", 0) for r in self.remaps] + [0])
+        self.header_size = seisheader.HEADER_SIZE * (1 + extra)
+        self.header_dtype = seisheader.header_dtype(
+            self.fields, self.byte_order, self.header_size
+        )
+        self.samp_num = src.samp_num
+        tp = seiscodec.raw_dtype(self.format_code, self.byte_order)
+        size = seiscodec.SAMPLE_SIZE[self.format_code]
+        if tp is None:
+            samples = ("samples", np.uint8, (self.samp_num * size,))
+        else:
+            samples = ("samples", tp, (self.samp_num,))
+        self.record_dtype = np.dtype([("header", self.header_dtype), samples])
+        # Samples of the same format are only cast to output byte order
+        self.same = self.format_code == src.format_code and tp is not None
+        both = {self.format_code, src.format_code}
+        self.work_dtype = np.float32 if both <= _FLOAT32 else np.float64
+
+    def file_header(self, src, num):
+        """Text and binary headers of SEG-Y output with num traces"""
+        if src.kind == "segy":
+            with open(src.file_name, "rb") as f:
+                raw = bytearray(f.read(FILE_HEADER_SIZE))
+        else:
+            raw = bytearray(FILE_HEADER_SIZE)
+            raw[:TEXT_HEADER_SIZE] = text_header("CONVERTED FROM " + src.file_name)
+        flds = {k: (b - 1, tp) for k, (b, tp) in BIN_HEADERS.items()}
+        dtype = seisheader.header_dtype(flds, self.byte_order, FILE_HEADER_SIZE)
+        head = np.frombuffer(raw, dtype, 1)
+        ns = self.samp_num
+        si = src.samp_int
+        head["samp_int"] = si if si < 2**15 and si == int(si) else 0
+        head["ext_samp_int"] = si
+        head["samp_per_tr"] = ns if ns < 2**16 else 0
+        head["ext_samp_per_tr"] = ns if ns >= 2**16 else 0
+        head["format_code"] = self.format_code
+        head["SEGY_rev_major_ver"] = 2
+        head["SEGY_rev_minor_ver"] = 0
+        head["fixed_tr_length"] = 1
+        head["ext_text_headers_num"] = 0
+        head["max_num_add_tr_headers"] = self.header_size // seisheader.HEADER_SIZE - 1
+        head["num_of_tr_in_file"] = num
+        head["byte_off_of_first_tr"] = FILE_HEADER_SIZE
+        # Rev 2 byte order constant at byte 3297
+        raw[3296:3300] = np.array(16909060, self.byte_order + "u4").tobytes()
+        return bytes(raw)
+
+    def convert(self, src, start, stop):
+        """Records of output for traces start:stop of src"""
+        rec = src.read_records(start, stop)
+        out = np.zeros(rec.shape[0], dtype=self.record_dtype)
+        hdr = out["header"]
+        for k in self.copy:
+            hdr[k] = rec["header"][k]
+        hdr["SAMP_NUM"] = self.samp_num
+        if self.same:
+            out["samples"] = rec["samples"]
+            return out
+        samples = src.decode(rec["samples"], dtype=self.work_dtype)
+        raw = seiscodec.encode(samples, self.format_code, self.byte_order)
+        out["samples"] = raw.view(self.record_dtype["samples"].base)
+        return out
+
+
+def _convert_file(f, dst, kind, format_code, remaps, chunk, workers, progress):
+    layout = Layout(f, kind, format_code, remaps)
+    num = len(f)
+    size = layout.record_dtype.itemsize
+    with open(dst, "wb") as out:
+        if kind == "segy":
+            out.write(layout.file_header(f, num))
+        out.truncate(layout.first_offset + num * size)
+    ranges = [(b, min(b + chunk, num)) for b in range(0, num, chunk)]
+    done = 0
+    if workers and workers > 1 and len(ranges) > 1:
+        # Imported here to keep it out of reader import time
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(
+            workers, initializer=_init_worker, initargs=(f, dst, layout)
+        ) as pool:
+            for n in pool.map(_run, ranges):
+                done += n
+                if progress is not None:
+                    progress(done, num)
+    else:
+        _init_worker(f, dst, layout)
+        try:
+            for rng in ranges:
+                done += _run(rng)
+                if progress is not None:
+                    progress(done, num)
+        finally:
+            os.close(_worker.pop("fd"))
+    return num, num * f.trace_size()
+
+
+def _init_worker(f, dst, layout):
+    _worker.update(file=f, layout=layout, fd=os.open(dst, os.O_WRONLY))
+
+
+def _run(rng):
+    start, stop = rng
+    w = _worker
+    layout = w["layout"]
+    out = layout.convert(w["file"], start, stop)
+    off = layout.first_offset + start * layout.record_dtype.itemsize
+    os.pwrite(w["fd"], out.view(np.uint8), off)
+    return stop - start
+
+
+def _convert_traces(src, dst, src_kind, dst_kind, format_code, remaps):
+    # Imported here, Python conversion does not need libseissegy
+    from seissegy import ISU, OSU, ISegy, OSegy, SegyBinHdr
+
+    reader = ISU(src) if src_kind == "su" else ISegy(src)
+    with reader:
+        reader.remap_trace_header(*remaps)
+        if dst_kind == "su":
+            writer = OSU(dst)
+        else:
+            if src_kind == "segy":
+                bin_hdr = SegyBinHdr.from_buffer_copy(reader.get_binary_header())
+            else:
+                trc = reader.read_trace()
+                bin_hdr = SegyBinHdr()
+                bin_hdr.samp_int = trc.header().get("SAMP_INT")
+                bin_hdr.samp_per_tr = trc.samples_num()
+                bin_hdr.format_code = SU_FORMAT
+                reader.rewind()
+            if format_code:
+                bin_hdr.format_code = format_code
+            writer = OSegy(dst, bin_header=bin_hdr)
+        num = nbytes = 0
+        with writer:
+            writer.remap_trace_header(*output_remaps(remaps, dst_kind))
+            for trc in reader.traces(recycle=True):
+                writer.write_trace(trc)
+                num += 1
+                nbytes += trc.samples_num() * 4
+    return num, num * seisheader.HEADER_SIZE + nbytes
+
+
+def parse_remap(arg):
+    """remap_trace_header argument from NAME:BYTE:TYPE[:HDR_NUM] string,
+    TYPE is number or name of seisheader.TYPES, e.g. i4"""
+    parts = arg.split(":")
+    if len(parts) not in (3, 4):
+        raise ValueError("Remap should be NAME:BYTE:TYPE[:HDR_NUM]")
+    names = {tp: num for num, tp in seisheader.TYPES.items()}
+    fmt = names[parts[2]] if parts[2] in names else int(parts[2])
+    res = {"hdr_name": parts[0].upper(), "offset": int(parts[1]), "format": fmt}
+    if len(parts) == 4:
+        res["hdr_num"] = int(parts[3])
+    return res
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("src")
+    parser.add_argument("dst")
+    parser.add_argument("--src-kind", choices=("segy", "su"))
+    parser.add_argument("--dst-kind", choices=("segy", "su"))
+    parser.add_argument("--format", type=int, help="SEG-Y output format code")
+    parser.add_argument("--remap", action="append", default=[], type=parse_remap)
+    parser.add_argument("--chunk", type=int, default=4096)
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--quiet", action="store_true")
+    args = parser.parse_args()
+    res = convert(
+        args.src,
+        args.dst,
+        args.src_kind,
+        args.dst_kind,
+        args.format,
+        args.remap,
+        args.chunk,
+        args.workers,
+    )
+    if not args.quiet:
+        print(
+            "{traces} traces in {seconds:.3f} s: {traces_per_s:.0f} tr/s "
+            "{mb_per_s:.1f} MB/s".format(**res)
+        )
+
+
+if __name__ == "__main__":
+    main()
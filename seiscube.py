@@ -0,0 +1,97 @@
+import numpy as np
+
+import seiscodec
+
+
+class Cube:
+    """Geometry of post-stack 3D volume found from inline and crossline
+    headers of TraceFile, names of these headers follow its remaps.
+    sorting is "iline" when crosslines change fastest, "xline" when
+    inlines do and None for unsorted files. Missing traces of irregular
+    volumes are returned as zeros. Traces with the same inline and
+    crossline raise ValueError with duplicates "error", otherwise the
+    "first" or "last" of them in the file is taken"""
+
+    def __init__(self, trace_file, iline="INLINE", xline="XLINE", duplicates="error"):
+        if duplicates not in ("error", "first", "last"):
+            raise ValueError("Unknown duplicates policy")
+        self.file = trace_file
+        table = trace_file.header_table([iline, xline], slice(None))
+        il, xl = table[iline], table[xline]
+        self.ilines = np.unique(il)
+        self.xlines = np.unique(xl)
+        self.grid = np.full((self.ilines.size, self.xlines.size), -1, dtype=np.int64)
+        cell = np.searchsorted(self.ilines, il) * self.xlines.size
+        cell += np.searchsorted(self.xlines, xl)
+        if duplicates == "last":
+            cells, last = np.unique(cell[::-1], return_index=True)
+            self.grid.flat[cells] = cell.size - 1 - last
+        else:
+            cells, first = np.unique(cell, return_index=True)
+            if duplicates == "error" and cells.size != cell.size:
+                raise ValueError("Traces with the same inline and crossline")
+            self.grid.flat[cells] = first
+        num = self.grid.size
+        self.regular = il.size == num and bool(np.all(self.grid >= 0))
+        self.sorting = None
+        if self.regular:
+            seq = np.arange(num)
+            if np.array_equal(self.grid.ravel(), seq):
+                self.sorting = "iline"
+            elif np.array_equal(self.grid.T.ravel(), seq):
+                self.sorting = "xline"
+        self.samp_num = trace_file.samples_num()
+
+    @property
+    def shape(self):
+        return self.ilines.size, self.xlines.size, self.samp_num
+
+    def iline(self, n, dtype=np.float64):
+        """2D array (xlines, samples) of inline number n"""
+        return self.__read(self.grid[self.__pos(self.ilines, n)], dtype)
+
+    def xline(self, n, dtype=np.float64):
+        """2D array (ilines, samples) of crossline number n"""
+        return self.__read(self.grid[:, self.__pos(self.xlines, n)], dtype)
+
+    def depth_slice(self, k, dtype=np.float64):
+        """2D array (ilines, xlines) of sample number k of every trace"""
+        k = range(self.samp_num)[k]
+        res = np.zeros(self.grid.shape, dtype=dtype)
+        have = self.grid >= 0
+        # Only bytes of sample k are read, or touched in memory map
+        block = self.file.read_block(
+            self.grid[have], dtype=dtype, window=slice(k, k + 1)
+        )
+        res[have] = block[:, 0]
+        return res
+
+    def as_array(self):
+        """Whole regular sorted volume as memory mapped 3D array (ilines,
+        xlines, samples) in file number format. Raises ValueError if it
+        can't be mapped, e.g. for IBM floats which need decoding"""
+        f = self.file
+        if self.sorting is None or f.map is None:
+            raise ValueError("Volume is not regular sorted memory mapped file")
+        if f.format_code == seiscodec.IBM or f.sample_dtype is None:
+            raise ValueError("Samples need decoding")
+        samples = f.map["samples"]
+        if self.sorting == "iline":
+            return samples.reshape(self.shape)
+        nil, nxl, ns = self.shape
+        return samples.reshape(nxl, nil, ns).transpose(1, 0, 2)
+
+    def __pos(self, values, n):
+        i = np.searchsorted(values, n)
+        if i == values.size or values[i] != n:
+            raise KeyError("No such line")
+        return i
+
+    def __read(self, traces, dtype):
+        res = np.zeros((traces.size, self.samp_num), dtype=dtype)
+        have = traces >= 0
+        sel = traces[have]
+        if sel.size > 1 and np.all(np.diff(sel) == sel[1] - sel[0]) and sel[1] > sel[0]:
+            sel = slice(sel[0], sel[-1] + 1, sel[1] - sel[0])
+        res[have] = self.file.read_block(sel, dtype=dtype)
+        return res
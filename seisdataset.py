@@ -0,0 +1,293 @@
+import glob
+import os
+import zlib
+from collections import OrderedDict
+
+import numpy as np
+
+import seisheader
+from seisgather import GatherIndex
+from seissegy import ISU, ISegy
+
+# File kinds by extension, other files in directories are skipped
+EXTENSIONS = {".sgy": "segy", ".segy": "segy", ".su": "su"}
+MANIFEST = ".seisdataset.npz"
+
+
+class Dataset:
+    """Traces of many SEG-Y and SU files as one collection numbered in
+    order of sorted file names. source is directory, glob pattern or list
+    of file names. Index of file, trace number in it and key headers of
+    every trace is kept in one manifest file, by default in the directory
+    of the files, and only new or changed files are scanned on later
+    opens, in workers processes if it is given. Up to max_open readers
+    are kept open (each holds one or two file descriptors), the least
+    recently used one is closed when more are needed, so iterators over
+    many files at once should not be mixed"""
+
+    def __init__(
+        self,
+        source,
+        keys=("FFID", "CHAN"),
+        backend="c",
+        remaps=(),
+        max_open=64,
+        manifest=None,
+        workers=None,
+    ):
+        self.__pool = OrderedDict()
+        self.files = find_files(source)
+        if not self.files:
+            raise ValueError("No SEG-Y or SU files found")
+        self.keys = [k.upper() for k in keys]
+        if not self.keys:
+            raise ValueError("Dataset needs key headers")
+        self.backend = backend
+        self.remaps = list(remaps)
+        self.max_open = max(max_open, 1)
+        self.manifest = manifest or default_manifest(source, self.files)
+        self.__gathers = {}
+        self.__index(workers)
+
+    def __index(self, workers):
+        old = self.__load_manifest()
+        stats = [_stat(f) for f in self.files]
+        todo = [f for f, st in zip(self.files, stats) if old.get(f, (None,))[0] != st]
+        tables = dict(zip(todo, _map(_scan, todo, workers, self)))
+        parts = [tables[f] if f in tables else old[f][1] for f in self.files]
+        self.counts = np.array([p[self.keys[0]].size for p in parts], dtype=np.int64)
+        self.starts = np.append(0, np.cumsum(self.counts))
+        self.file_of = np.repeat(np.arange(len(self.files)), self.counts)
+        self.local = np.arange(self.starts[-1]) - self.starts[self.file_of]
+        self.table = {k: np.concatenate([p[k] for p in parts]) for k in self.keys}
+        if todo or set(old) != set(self.files):
+            self.__save_manifest(stats)
+
+    def __load_manifest(self):
+        """Dict of file name -> ((size, mtime), key table) of manifest
+        made with the same keys and remaps"""
+        try:
+            with np.load(self.manifest) as z:
+                if list(z["keys"]) != self.keys:
+                    return {}
+                if str(z["remaps"]) != repr(self.remaps):
+                    return {}
+                base = os.path.dirname(os.path.abspath(self.manifest))
+                starts = np.append(0, np.cumsum(z["counts"]))
+                res = {}
+                for j, name in enumerate(z["files"]):
+                    name = os.path.normpath(os.path.join(base, str(name)))
+                    st = (int(z["sizes"][j]), int(z["mtimes"][j]))
+                    cut = slice(starts[j], starts[j + 1])
+                    res[name] = st, {k: z["key_" + k][cut] for k in self.keys}
+                return res
+        except (OSError, KeyError, ValueError):
+            return {}
+
+    def __save_manifest(self, stats):
+        base = os.path.dirname(os.path.abspath(self.manifest))
+        tmp = self.manifest + ".tmp"
+        try:
+            with open(tmp, "wb") as f:
+                np.savez(
+                    f,
+                    keys=np.array(self.keys),
+                    remaps=repr(self.remaps),
+                    files=np.array([os.path.relpath(n, base) for n in self.files]),
+                    sizes=np.array([st[0] for st in stats], dtype=np.int64),
+                    mtimes=np.array([st[1] for st in stats], dtype=np.int64),
+                    counts=self.counts,
+                    **{"key_" + k: v for k, v in self.table.items()}
+                )
+            os.replace(tmp, self.manifest)
+        except OSError:
+            pass
+
+    def __len__(self):
+        return int(self.starts[-1])
+
+    def close(self):
+        while self.__pool:
+            self.__pool.popitem()[1].close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exec_info):
+        self.close()
+
+    def __del__(self):
+        self.close()
+
+    def reader(self, f):
+        """Pooled ISegy or ISU reader of file number f"""
+        r = self.__pool.pop(f, None)
+        if r is None:
+            while len(self.__pool) >= self.max_open:
+                self.__pool.popitem(last=False)[1].close()
+            r = open_reader(self.files[f], self.backend, self.remaps)
+        self.__pool[f] = r
+        return r
+
+    def locate(self, i):
+        """(file name, trace number in it) of trace number i"""
+        i = self.__number(i)
+        return self.files[self.file_of[i]], int(self.local[i])
+
+    def __number(self, i):
+        num = len(self)
+        if i < 0:
+            i += num
+        if i < 0 or i >= num:
+            raise IndexError("Trace number out of range")
+        return i
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return self.__traces_list(np.arange(*i.indices(len(self))))
+        if isinstance(i, (list, tuple, np.ndarray)):
+            return self.__traces_list([self.__number(j) for j in i])
+        i = self.__number(i)
+        return self.reader(self.file_of[i])[int(self.local[i])]
+
+    def __traces_list(self, indices):
+        """Traces with given numbers in their order, read by traces_at in
+        ascending order"""
+        order, inverse = np.unique(np.asarray(indices, np.int64), return_inverse=True)
+        rows = list(self.traces_at(order))
+        return [rows[j] for j in inverse.ravel()]
+
+    def header_table(self, keys=None, indices=slice(None)):
+        """Dict of columns of index keys (all of them by default) for
+        traces with given numbers (array of them or slice)"""
+        keys = self.keys if keys is None else [k.upper() for k in keys]
+        for k in keys:
+            if k not in self.table:
+                raise ValueError("Header is not in dataset index")
+        return {k: self.table[k][indices] for k in keys}
+
+    def select(self, where, keys=None):
+        """Numbers of traces with index headers matching where, see
+        ISegy.select. No file is read"""
+        return seisheader.select(self.header_table, where, keys)
+
+    def traces_at(self, indices, dtype=None, window=None):
+        """Iterate over traces with given ascending numbers, see
+        ISegy.traces_at. Every file is opened once"""
+        indices = np.asarray(indices, dtype=np.int64)
+        files = self.file_of[indices]
+        cuts = np.flatnonzero(files[1:] != files[:-1]) + 1
+        for run in np.split(np.arange(indices.size), cuts):
+            if run.size:
+                r = self.reader(files[run[0]])
+                yield from r.traces_at(self.local[indices[run]], dtype, window)
+
+    def filtered(self, where, keys=None, dtype=None, window=None):
+        """Iterate over traces matching where, see select and traces_at"""
+        return self.traces_at(self.select(where, keys), dtype, window)
+
+    def traces(self, dtype=None, window=None):
+        """Iterate over all traces file by file, see ISegy.traces"""
+        for f in range(len(self.files)):
+            yield from self.reader(f).traces(dtype=dtype, window=window)
+
+    def gather_index(self, *keys):
+        """GatherIndex of global trace numbers by index keys"""
+        keys = tuple(k.upper() for k in keys)
+        idx = self.__gathers.get(keys)
+        if idx is None:
+            idx = GatherIndex.from_table(keys, self.header_table(keys))
+            self.__gathers[keys] = idx
+        return idx
+
+    def gather(self, dtype=None, **keys):
+        """Traces with given header values across all files, see
+        ISegy.gather"""
+        idx = self.gather_index(*keys)
+        return self.__gather(idx.traces(*keys.values()), dtype)
+
+    def gathers(self, *keys, dtype=None):
+        """Iterate over pairs of key values tuple and traces of every
+        gather, see ISegy.gathers"""
+        for values, traces in self.gather_index(*keys):
+            yield values, self.__gather(traces, dtype)
+
+    def __gather(self, traces, dtype):
+        res = list(self.traces_at(np.sort(traces), dtype))
+        if dtype is None:
+            return res
+        return np.stack(res) if res else np.empty((0, 0), dtype)
+
+    def map_files(self, func, workers=None):
+        """List of func(reader, file_name) for every file in order. With
+        workers files are processed in that number of processes, where
+        func should be picklable, e.g. module level function"""
+        if not workers:
+            return [func(self.reader(f), n) for f, n in enumerate(self.files)]
+        return _map(_call, self.files, workers, self, func)
+
+
+def find_files(source):
+    """Sorted file names of directory (files with EXTENSIONS), glob
+    pattern or list"""
+    if isinstance(source, (list, tuple)):
+        names = list(source)
+    elif os.path.isdir(source):
+        names = [
+            os.path.join(source, n)
+            for n in os.listdir(source)
+            if os.path.splitext(n)[1].lower() in EXTENSIONS
+        ]
+    else:
+        names = glob.glob(source)
+    return sorted(os.path.normpath(os.path.abspath(n)) for n in names)
+
+
+def default_manifest(source, files):
+    """MANIFEST in directory source, otherwise name depending on source
+    in the common directory of files"""
+    if not isinstance(source, (list, tuple)) and os.path.isdir(source):
+        return os.path.join(source, MANIFEST)
+    base = os.path.commonpath([os.path.dirname(f) for f in files])
+    crc = zlib.crc32(repr(source).encode())
+    return os.path.join(base, ".seisdataset-{:08x}.npz".format(crc))
+
+
+def open_reader(file_name, backend="c", remaps=()):
+    """ISU for .su files, ISegy otherwise, with remaps applied"""
+    ext = os.path.splitext(file_name)[1].lower()
+    if EXTENSIONS.get(ext) == "su":
+        r = ISU(file_name, backend)
+    else:
+        r = ISegy(file_name, backend)
+    if remaps:
+        r.remap_trace_header(*remaps)
+    return r
+
+
+def _stat(file_name):
+    st = os.stat(file_name)
+    return st.st_size, st.st_mtime_ns
+
+
+def _map(func, files, workers, dataset, *args):
+    opts = (dataset.backend, dataset.remaps, dataset.keys) + args
+    if not workers or len(files) < 2:
+        return [func(f, *opts) for f in files]
+    # Imported here to keep it out of reader import time
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(workers) as pool:
+        return list(pool.map(func, files, *([o] * len(files) for o in opts)))
+
+
+def _scan(file_name, backend, remaps, keys):
+    with open_reader(file_name, backend, remaps) as r:
+        if r._indexed():
+            return r.trace_file().header_table(keys, slice(None))
+        return r.read_header_table(keys)
+
+
+def _call(file_name, backend, remaps, keys, func):
+    with open_reader(file_name, backend, remaps) as r:
+        return func(r, file_name)
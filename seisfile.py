@@ -0,0 +1,456 @@
+import os
+from types import SimpleNamespace
+
+import numpy as np
+
+import seiscodec
+import seisheader
+from seistrace import (
+    HeaderSetter,
+    Trace,
+    TraceHeader,
+    sample_range,
+    window_header,
+    window_table,
+)
+
+SU_FORMAT = 5
+
+TEXT_HEADER_SIZE = 3200
+FILE_HEADER_SIZE = 3600
+
+# Binary header fields needed to locate traces, named as in
+# seissegy.SegyBinHdr: name, byte number (starting from 1), type
+BIN_HEADERS = {
+    "samp_int": (3217, "i2"),
+    "samp_per_tr": (3221, "u2"),
+    "format_code": (3225, "i2"),
+    "ext_samp_per_tr": (3269, "i4"),
+    "ext_samp_int": (3273, "f8"),
+    "SEGY_rev_major_ver": (3501, "u1"),
+    "SEGY_rev_minor_ver": (3502, "u1"),
+    "fixed_tr_length": (3503, "i2"),
+    "ext_text_headers_num": (3505, "i2"),
+    "max_num_add_tr_headers": (3507, "i4"),
+    "num_of_tr_in_file": (3513, "u8"),
+    "byte_off_of_first_tr": (3521, "u8"),
+}
+
+
+def text_header(title):
+    """EBCDIC text header with title in its first line"""
+    lines = ["C{:2d} {}".format(i + 1, title if i == 0 else "") for i in range(40)]
+    return "".join(line[:80].ljust(80) for line in lines).encode("cp037")
+
+
+def sidecar_name(file_name, kind):
+    return "{}.{}.npz".format(file_name, kind)
+
+
+def load_sidecar(file_name, kind, **expect):
+    """Load arrays stored by save_sidecar. Returns None if there is no
+    sidecar, data file was changed since it was written or stored values
+    differ from expected ones"""
+    try:
+        st = os.stat(file_name)
+        with np.load(sidecar_name(file_name, kind)) as z:
+            if z["size"] != st.st_size or z["mtime"] != st.st_mtime_ns:
+                return None
+            for k, v in expect.items():
+                if str(z[k]) != str(v):
+                    return None
+            return {k: z[k] for k in z.files}
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def save_sidecar(file_name, kind, **arrays):
+    """Save arrays next to data file together with its size and mtime.
+    Nothing is saved if the directory is not writable"""
+    name = sidecar_name(file_name, kind)
+    tmp = name + ".tmp"
+    try:
+        st = os.stat(file_name)
+        with open(tmp, "wb") as f:
+            np.savez(f, size=st.st_size, mtime=st.st_mtime_ns, **arrays)
+        os.replace(tmp, name)
+    except OSError:
+        pass
+
+
+class TraceFile:
+    """Positional access to traces of SEG-Y ("segy") or SU ("su") file in
+    pure Python. Offsets of fixed length traces are computed, otherwise
+    they are collected in one pass and saved next to the file, so later
+    opens get them for free. With mmap=True fixed length files are also
+    mapped to memory as one array of (header, samples) records. Byte
+    order of SU file is accepted if it makes the file whole traces of the
+    first trace length or gives the second trace the same length,
+    ValueError is raised otherwise"""
+
+    def __init__(self, file_name, kind="segy", remaps=(), mmap=False):
+        self.file_name = file_name
+        self.kind = kind
+        self.remaps = list(remaps)
+        self.map = None
+        self.fields = seisheader.fields(kind, self.remaps)
+        self.__setter = HeaderSetter(
+            self.fields, [tp[0] == "f" for off, tp in self.fields.values()]
+        )
+        self.__fd = None
+        self.__fd = os.open(file_name, os.O_RDONLY)
+        try:
+            self.__size = os.fstat(self.__fd).st_size
+            if kind == "segy":
+                self.__init_segy()
+            else:
+                self.__init_su()
+            self.header_dtype = seisheader.header_dtype(
+                self.fields, self.byte_order, self.header_size
+            )
+            self.sample_size = seiscodec.SAMPLE_SIZE[self.format_code]
+            self.sample_dtype = seiscodec.raw_dtype(self.format_code, self.byte_order)
+            if not self.fixed:
+                self.__index()
+            elif self.__ntr is None:
+                self.__ntr = (self.__size - self.first_offset) // self.trace_size()
+            if mmap and self.fixed and self.__ntr:
+                self.map = np.memmap(
+                    file_name,
+                    dtype=self.record_dtype(),
+                    mode="r",
+                    offset=self.first_offset,
+                    shape=(self.__ntr,),
+                )
+        except BaseException:
+            self.close()
+            raise
+
+    def __init_segy(self):
+        raw = os.pread(self.__fd, FILE_HEADER_SIZE, 0)
+        if len(raw) < FILE_HEADER_SIZE:
+            raise ValueError("File is too short")
+        bh = read_bin_header(raw, ">")
+        if not seiscodec.supported(bh.format_code):
+            bh = read_bin_header(raw, "<")
+            if not seiscodec.supported(bh.format_code):
+                raise ValueError("Unsupported format")
+            self.byte_order = "<"
+        else:
+            self.byte_order = ">"
+        self.bin_header = bh
+        rev2 = bh.SEGY_rev_major_ver >= 2
+        if rev2 and bh.byte_off_of_first_tr:
+            self.first_offset = bh.byte_off_of_first_tr
+        elif bh.ext_text_headers_num >= 0:
+            self.first_offset = (
+                FILE_HEADER_SIZE + TEXT_HEADER_SIZE * bh.ext_text_headers_num
+            )
+        else:
+            raise ValueError("Variable number of extended text headers")
+        self.header_size = seisheader.HEADER_SIZE
+        if rev2 and bh.max_num_add_tr_headers > 0:
+            self.header_size *= 1 + bh.max_num_add_tr_headers
+        self.format_code = bh.format_code
+        self.samp_num = bh.samp_per_tr
+        if rev2 and bh.ext_samp_per_tr > 0:
+            self.samp_num = bh.ext_samp_per_tr
+        self.samp_int = float(bh.samp_int)
+        if rev2 and bh.ext_samp_int > 0:
+            self.samp_int = bh.ext_samp_int
+        self.fixed = bh.fixed_tr_length != 0
+        self.__ntr = None
+        if self.fixed and rev2 and bh.num_of_tr_in_file:
+            self.__ntr = bh.num_of_tr_in_file
+
+    def __init_su(self):
+        raw = os.pread(self.__fd, seisheader.HEADER_SIZE, 0)
+        if len(raw) < seisheader.HEADER_SIZE:
+            raise ValueError("File is too short")
+        native = "<" if np.little_endian else ">"
+        other = ">" if np.little_endian else "<"
+        for order in (native, other):
+            ns = int(np.frombuffer(raw, order + "u2", 1, 114)[0])
+            if ns and self.__su_fits(order, ns):
+                break
+        else:
+            raise ValueError("Unknown byte order of SU file")
+        self.byte_order = order
+        self.bin_header = None
+        self.first_offset = 0
+        self.header_size = seisheader.HEADER_SIZE
+        self.format_code = SU_FORMAT
+        self.samp_num = ns
+        self.samp_int = float(np.frombuffer(raw, order + "u2", 1, 116)[0])
+        self.fixed = False
+        self.__ntr = None
+
+    def __su_fits(self, order, ns):
+        """Whether file read in byte order is whole traces of ns samples
+        or its second trace has ns samples too"""
+        size = seisheader.HEADER_SIZE + ns * 4
+        if self.__size % size == 0:
+            return True
+        if size + seisheader.HEADER_SIZE > self.__size:
+            return False
+        raw = os.pread(self.__fd, 2, size + 114)
+        return int(np.frombuffer(raw, order + "u2", 1)[0]) == ns
+
+    def __index(self):
+        idx = load_sidecar(self.file_name, "tridx")
+        if idx is None:
+            idx = self.__scan()
+            save_sidecar(self.file_name, "tridx", **idx)
+        self.__offsets = idx["offsets"]
+        self.__samples = idx["samples"]
+        self.__ntr = self.__offsets.size
+        sizes = self.header_size + self.__samples * self.sample_size
+        if self.__ntr and np.all(self.__samples == self.__samples[0]):
+            if np.all(self.__offsets[1:] == self.__offsets[:-1] + sizes[:-1]):
+                self.fixed = True
+                self.samp_num = int(self.__samples[0])
+                self.first_offset = int(self.__offsets[0])
+
+    def __scan(self):
+        ns_off, ns_tp = self.fields["SAMP_NUM"]
+        ns_dtype = np.dtype(self.byte_order + ns_tp)
+        offsets, samples = [], []
+        off = self.first_offset
+        with open(self.file_name, "rb", buffering=1 << 20) as f:
+            while off + self.header_size <= self.__size:
+                f.seek(off + ns_off)
+                ns = int(np.frombuffer(f.read(ns_dtype.itemsize), ns_dtype)[0])
+                if ns == 0:
+                    ns = self.samp_num
+                offsets.append(off)
+                samples.append(ns)
+                off += self.header_size + ns * self.sample_size
+        return {
+            "offsets": np.array(offsets, dtype=np.int64),
+            "samples": np.array(samples, dtype=np.int64),
+        }
+
+    def __len__(self):
+        return self.__ntr
+
+    def __reduce__(self):
+        # Reopened from the name, so it could be passed to other processes
+        return (
+            TraceFile,
+            (self.file_name, self.kind, self.remaps, self.map is not None),
+        )
+
+    def close(self):
+        self.map = None
+        if self.__fd is not None:
+            os.close(self.__fd)
+            self.__fd = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exec_info):
+        self.close()
+
+    def __del__(self):
+        self.close()
+
+    @property
+    def decodable(self):
+        """Whether samples could be decoded in Python"""
+        return seiscodec.supported(self.format_code)
+
+    def record_dtype(self):
+        """Structured dtype of whole fixed length trace. Samples are kept as
+        they are in the file, 24 bit integers as raw bytes"""
+        if self.sample_dtype is None:
+            samples = ("samples", np.uint8, (self.samp_num * self.sample_size,))
+        else:
+            samples = ("samples", self.sample_dtype, (self.samp_num,))
+        return np.dtype([("header", self.header_dtype), samples])
+
+    def offset(self, i):
+        if self.fixed:
+            return self.first_offset + i * self.trace_size()
+        return int(self.__offsets[i])
+
+    def samples_num(self, i=0):
+        if self.fixed:
+            return self.samp_num
+        return int(self.__samples[i])
+
+    def trace_size(self, i=0):
+        return self.header_size + self.samples_num(i) * self.sample_size
+
+    def read_headers(self, indices):
+        """Structured array of raw header blocks of traces with given
+        numbers (array of them or slice)"""
+        if self.map is not None:
+            if not isinstance(indices, slice):
+                indices = np.atleast_1d(indices)
+            return self.map["header"][indices]
+        indices = self.indices(indices)
+        raw = np.empty((indices.size, self.header_size), dtype=np.uint8)
+        for j, i in enumerate(indices):
+            self.__read_into(raw[j], self.offset(i))
+        return raw.view(self.header_dtype)[:, 0]
+
+    def read_records(self, start, stop):
+        """Records of record_dtype for fixed length traces start:stop, read
+        by one call or taken from the map"""
+        if not self.fixed:
+            raise ValueError("Traces have variable length")
+        if self.map is not None:
+            return self.map[start:stop]
+        rec = np.empty(max(stop - start, 0), dtype=self.record_dtype())
+        self.__read_into(rec.view(np.uint8), self.offset(start))
+        return rec
+
+    def header_table(self, keys, indices):
+        return seisheader.table(self.read_headers(indices), keys, self.fields)
+
+    def window(self, window, i=0):
+        """(first, stop) sample numbers of window of trace i, see
+        seistrace.sample_range. None means all samples"""
+        num = self.samples_num(i)
+        if window is None:
+            return 0, num
+        return sample_range(window, num, self.samp_int)
+
+    def read_samples(self, i, out=None, dtype=np.float64, window=None):
+        """Decode samples of trace i, only bytes of window are read if it is
+        given"""
+        first, stop = self.window(window, i)
+        if self.map is not None:
+            raw = self.map["samples"][i, self.__raw_slice(first, stop)]
+            return self.decode(raw, out, dtype)
+        raw = np.empty((stop - first) * self.sample_size, dtype=np.uint8)
+        self.__read_into(
+            raw, self.offset(i) + self.header_size + first * self.sample_size
+        )
+        return self.decode(raw, out, dtype)
+
+    def read_block(self, indices, out=None, dtype=np.float64, keys=None, window=None):
+        """Read samples of traces with given numbers into rows of out, which
+        is allocated if None. Returns filled part of out, plus header table
+        of keys if they are given. With window only its samples are read
+        and header table describes it, see seistrace.window_table"""
+        if self.map is not None:
+            return self.__read_mapped_block(indices, out, dtype, keys, window)
+        indices = self.indices(indices)
+        first, stop = self.window(window, indices[0] if indices.size else 0)
+        if out is None:
+            out = np.empty((indices.size, stop - first), dtype=dtype)
+        elif out.shape[0] < indices.size:
+            raise ValueError("Block has more traces than out")
+        out = out[: indices.size]
+        size = out.shape[1] * self.sample_size
+        raw = np.empty(self.header_size + size, np.uint8)
+        hdrs = np.empty((indices.size, self.header_size), dtype=np.uint8)
+        for j, i in enumerate(indices):
+            first, stop = self.window(window, i)
+            if stop - first != out.shape[1]:
+                raise ValueError("Trace length differs from block width")
+            off = self.offset(i) + self.header_size + first * self.sample_size
+            # Header and window from the first sample are read at once
+            head = self.header_size if keys is not None and first == 0 else 0
+            self.__read_into(raw[: head + size], off - head)
+            if head:
+                hdrs[j] = raw[:head]
+            elif keys is not None:
+                self.__read_into(hdrs[j], self.offset(i))
+            self.decode(raw[head : head + size], out[j])
+        if keys is None:
+            return out
+        records = hdrs.view(self.header_dtype)[:, 0]
+        table = seisheader.table(records, keys, self.fields)
+        if window is not None:
+            window_table(table, first, out.shape[1], self.samp_int)
+        return out, table
+
+    def __read_mapped_block(self, indices, out, dtype, keys, window):
+        if not isinstance(indices, slice):
+            indices = np.atleast_1d(indices)
+        first, stop = self.window(window)
+        # Only pages with samples of the window are touched
+        raw = self.map["samples"][indices, self.__raw_slice(first, stop)]
+        if out is None:
+            out = np.empty((raw.shape[0], stop - first), dtype=dtype)
+        elif out.shape[1] != stop - first:
+            raise ValueError("Trace length differs from block width")
+        elif out.shape[0] < raw.shape[0]:
+            raise ValueError("Block has more traces than out")
+        out = out[: raw.shape[0]]
+        self.decode(raw, out)
+        if keys is None:
+            return out
+        table = seisheader.table(self.map["header"][indices], keys, self.fields)
+        if window is not None:
+            window_table(table, first, stop - first, self.samp_int)
+        return out, table
+
+    def __raw_slice(self, first, stop):
+        # 24 bit samples are mapped as bytes
+        if self.sample_dtype is None:
+            return slice(first * self.sample_size, stop * self.sample_size)
+        return slice(first, stop)
+
+    def indices(self, indices):
+        """Trace numbers array from slice or sequence of them"""
+        if isinstance(indices, slice):
+            return np.arange(*indices.indices(self.__ntr))
+        return np.atleast_1d(indices)
+
+    def decode(self, raw, out=None, dtype=np.float64):
+        """Convert raw samples to numbers"""
+        return seiscodec.decode(raw, self.format_code, self.byte_order, out, dtype)
+
+    def header(self, i):
+        hdr = TraceHeader()
+        self.__fill_header(hdr, i)
+        return hdr
+
+    def trace(self, i, window=None):
+        """Trace number i, only window of its samples if it is given, see
+        seistrace.window_header. Its headers are set one by one through
+        ctypes, prefer read_headers and read_samples for many traces"""
+        first, stop = self.window(window, i)
+        if stop == first:
+            raise ValueError("Window is empty")
+        trc = Trace(samp_num=stop - first)
+        hdr = trc.header()
+        self.__fill_header(hdr, i)
+        if window is not None:
+            window_header(hdr, first, stop - first, self.samp_int)
+        self.read_samples(i, trc.samples(), window=window)
+        return trc
+
+    def read_into(self, i, samples_out, header_out=None):
+        """Decode samples of trace i into the beginning of samples_out and
+        set its headers in TraceHeader header_out. Returns number of
+        samples"""
+        num = self.samples_num(i)
+        if num > samples_out.shape[0]:
+            raise ValueError("Trace is longer than samples_out")
+        self.read_samples(i, samples_out[:num])
+        if header_out is not None:
+            self.__fill_header(header_out, i)
+        return num
+
+    def __fill_header(self, hdr, i):
+        """Set every known header of TraceHeader hdr from header of trace
+        i"""
+        self.__setter.fill(hdr, self.read_headers(i)[0].item())
+
+    def __read_into(self, buf, off):
+        if os.preadv(self.__fd, [buf], off) != buf.nbytes:
+            raise RuntimeError("Unexpected end of file")
+
+
+def read_bin_header(raw, byte_order):
+    """SegyBinHdr-like namespace from raw file header bytes"""
+    flds = {k: (b - 1, tp) for k, (b, tp) in BIN_HEADERS.items()}
+    rec = np.frombuffer(
+        raw, seisheader.header_dtype(flds, byte_order, FILE_HEADER_SIZE), 1
+    )[0]
+    return SimpleNamespace(**{k: rec[k].item() for k in flds})
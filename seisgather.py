@@ -0,0 +1,80 @@
+import numpy as np
+
+from seisfile import load_sidecar, save_sidecar
+
+
+class GatherIndex:
+    """Trace numbers of every gather, i.e. group of traces with the same
+    values of key headers. Gathers are ordered by keys, traces inside
+    gathers keep file order"""
+
+    def __init__(self, keys, values, order, starts):
+        self.keys = list(keys)
+        self.values = values
+        self.order = order
+        self.starts = starts
+
+    @classmethod
+    def from_table(cls, keys, table):
+        """Build index from header table with columns for all keys"""
+        cols = [np.asarray(table[k]) for k in keys]
+        order = np.lexsort(cols[::-1]) if cols[0].size else np.empty(0, np.int64)
+        change = np.zeros(order.size, dtype=bool)
+        change[:1] = True
+        for c in cols:
+            s = c[order]
+            change[1:] |= s[1:] != s[:-1]
+        starts = np.append(np.flatnonzero(change), order.size)
+        values = {k: c[order[starts[:-1]]] for k, c in zip(keys, cols)}
+        return cls(keys, values, order, starts)
+
+    @classmethod
+    def load(cls, file_name, keys, remaps=()):
+        """Index saved by save for the same file and remaps, None if there
+        is no such index"""
+        z = load_sidecar(file_name, _kind(keys), remaps=repr(list(remaps)))
+        if z is None:
+            return None
+        values = {k: z["key_" + k] for k in keys}
+        return cls(keys, values, z["order"], z["starts"])
+
+    def save(self, file_name, remaps=()):
+        save_sidecar(
+            file_name,
+            _kind(self.keys),
+            remaps=repr(list(remaps)),
+            order=self.order,
+            starts=self.starts,
+            **{"key_" + k: v for k, v in self.values.items()}
+        )
+
+    def __len__(self):
+        return self.starts.size - 1
+
+    def find(self, *values):
+        """Number of gather with given key values, None if there is none"""
+        match = np.ones(len(self), dtype=bool)
+        for k, v in zip(self.keys, values):
+            match &= self.values[k] == v
+        found = np.flatnonzero(match)
+        return int(found[0]) if found.size else None
+
+    def traces(self, *values):
+        """Trace numbers of gather with given key values"""
+        j = self.find(*values)
+        if j is None:
+            return np.empty(0, dtype=self.order.dtype)
+        return self.gather(j)
+
+    def gather(self, j):
+        """Trace numbers of gather number j"""
+        return self.order[self.starts[j] : self.starts[j + 1]]
+
+    def __iter__(self):
+        """Pairs of key values tuple and trace numbers for every gather"""
+        for j in range(len(self)):
+            yield tuple(self.values[k][j].item() for k in self.keys), self.gather(j)
+
+
+def _kind(keys):
+    return "gathers-" + "-".join(keys)
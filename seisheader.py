@@ -0,0 +1,219 @@
+import operator
+import re
+
+import numpy as np
+
+# Value types used by remap_trace_header, same numbers as seissegy.i8 ... f64
+TYPES = {
+    0: "i1",
+    1: "u1",
+    2: "i2",
+    3: "u2",
+    4: "i4",
+    5: "u4",
+    6: "i8",
+    7: "u8",
+    8: "f4",
+    9: "f8",
+}
+
+HEADER_SIZE = 240
+
+# Standard SEG-Y trace header: name, byte number (starting from 1), type
+SEGY_HEADERS = [
+    ("TRC_SEQ_LINE", 1, "i4"),
+    ("TRC_SEQ_SGY", 5, "i4"),
+    ("FFID", 9, "i4"),
+    ("CHAN", 13, "i4"),
+    ("ESP", 17, "i4"),
+    ("CDP", 21, "i4"),
+    ("SEQ_NO", 25, "i4"),
+    ("TRACE_ID", 29, "i2"),
+    ("VERT_SUM", 31, "i2"),
+    ("HOR_SUM", 33, "i2"),
+    ("DATA_USE", 35, "i2"),
+    ("OFFSET", 37, "i4"),
+    ("R_ELEV", 41, "i4"),
+    ("S_ELEV", 45, "i4"),
+    ("S_DEPTH", 49, "i4"),
+    ("R_DATUM", 53, "i4"),
+    ("S_DATUM", 57, "i4"),
+    ("S_WATER", 61, "i4"),
+    ("R_WATER", 65, "i4"),
+    ("ELEV_SCALAR", 69, "i2"),
+    ("COORD_SCALAR", 71, "i2"),
+    ("SOU_X", 73, "i4"),
+    ("SOU_Y", 77, "i4"),
+    ("REC_X", 81, "i4"),
+    ("REC_Y", 85, "i4"),
+    ("COORD_UNITS", 89, "i2"),
+    ("WEATH_VEL", 91, "i2"),
+    ("SUBWEATH_VEL", 93, "i2"),
+    ("S_UPHOLE", 95, "i2"),
+    ("R_UPHOLE", 97, "i2"),
+    ("S_STAT", 99, "i2"),
+    ("R_STAT", 101, "i2"),
+    ("TOT_STAT", 103, "i2"),
+    ("LAG_A", 105, "i2"),
+    ("LAG_B", 107, "i2"),
+    ("DELAY_TIME", 109, "i2"),
+    ("MUTE_START", 111, "i2"),
+    ("MUTE_END", 113, "i2"),
+    ("SAMP_NUM", 115, "u2"),
+    ("SAMP_INT", 117, "u2"),
+    ("GAIN_TYPE", 119, "i2"),
+    ("GAIN_CONST", 121, "i2"),
+    ("INIT_GAIN", 123, "i2"),
+    ("CORRELATED", 125, "i2"),
+    ("SW_START", 127, "i2"),
+    ("SW_END", 129, "i2"),
+    ("SW_LENGTH", 131, "i2"),
+    ("SW_TYPE", 133, "i2"),
+    ("SW_TAPER_START", 135, "i2"),
+    ("SW_TAPER_END", 137, "i2"),
+    ("TAPER_TYPE", 139, "i2"),
+    ("ALIAS_FILT_FREQ", 141, "i2"),
+    ("ALIAS_FILT_SLOPE", 143, "i2"),
+    ("NOTCH_FILT_FREQ", 145, "i2"),
+    ("NOTCH_FILT_SLOPE", 147, "i2"),
+    ("LOW_CUT_FREQ", 149, "i2"),
+    ("HIGH_CUT_FREQ", 151, "i2"),
+    ("LOW_CUT_SLOPE", 153, "i2"),
+    ("HIGH_CUT_SLOPE", 155, "i2"),
+    ("YEAR", 157, "i2"),
+    ("DAY", 159, "i2"),
+    ("HOUR", 161, "i2"),
+    ("MINUTE", 163, "i2"),
+    ("SECOND", 165, "i2"),
+    ("TIME_BASIS_CODE", 167, "i2"),
+    ("TRACE_WEIGHT", 169, "i2"),
+    ("GROUP_NUM_ROLL", 171, "i2"),
+    ("GROUP_NUM_FIRST", 173, "i2"),
+    ("GROUP_NUM_LAST", 175, "i2"),
+    ("GAP_SIZE", 177, "i2"),
+    ("OVER_TRAVEL", 179, "i2"),
+    ("CDP_X", 181, "i4"),
+    ("CDP_Y", 185, "i4"),
+    ("INLINE", 189, "i4"),
+    ("XLINE", 193, "i4"),
+    ("SP_NUM", 197, "i4"),
+    ("SP_NUM_SCALAR", 201, "i2"),
+    ("TR_VAL_UNIT", 203, "i2"),
+    ("TRANS_CONST_MANT", 205, "i4"),
+    ("TRANS_CONST_EXP", 209, "i2"),
+    ("TRANS_UNITS", 211, "i2"),
+    ("DEVICE_ID", 213, "i2"),
+    ("TIME_SCALAR", 215, "i2"),
+    ("SOURCE_TYPE", 217, "i2"),
+    ("SOU_V_DIR", 219, "i2"),
+    ("SOU_X_DIR", 221, "i2"),
+    ("SOU_I_DIR", 223, "i2"),
+    ("SOURCE_MEASUREMENT_MANT", 225, "i4"),
+    ("SOURCE_MEASUREMENT_EXP", 229, "i2"),
+    ("SOURCE_MEASUREMENT_UNIT", 231, "i2"),
+]
+
+# SU shares first 180 bytes with SEG-Y and keeps its own fields after them
+SU_HEADERS = [h for h in SEGY_HEADERS if h[1] < 181] + [
+    ("D1", 181, "f4"),
+    ("F1", 185, "f4"),
+    ("D2", 189, "f4"),
+    ("F2", 193, "f4"),
+    ("UNGPOW", 197, "f4"),
+    ("UNSCALE", 201, "f4"),
+    ("NTR", 205, "i4"),
+    ("MARK", 209, "i2"),
+]
+
+
+def fields(kind, remaps=()):
+    """Return dict of header name -> (byte offset in trace header block,
+    NumPy type) for "segy" or "su" file with given remap_trace_header
+    arguments applied. SU remaps have no hdr_num"""
+    table = SEGY_HEADERS if kind == "segy" else SU_HEADERS
+    res = {name: (byte - 1, tp) for name, byte, tp in table}
+    for r in remaps:
+        if r["format"] not in TYPES:
+            raise ValueError("Unsupported header format")
+        off = r.get("hdr_num", 0) * HEADER_SIZE + r["offset"] - 1
+        res[r["hdr_name"]] = (off, TYPES[r["format"]])
+    return res
+
+
+def header_dtype(flds, byte_order, size=HEADER_SIZE):
+    """Structured dtype of trace header block of given size in bytes"""
+    names = list(flds)
+    return np.dtype(
+        {
+            "names": names,
+            "formats": [byte_order + flds[n][1] for n in names],
+            "offsets": [flds[n][0] for n in names],
+            "itemsize": size,
+        }
+    )
+
+
+def value_dtype(tp):
+    """Column dtype for header of given NumPy type, int64 or float64"""
+    return np.float64 if tp[0] == "f" else np.int64
+
+
+def table(records, keys, flds):
+    """Dict of int64/float64 columns from structured header records"""
+    res = {}
+    for k in keys:
+        if k not in flds:
+            raise ValueError("No such header")
+        res[k] = np.array(records[k], dtype=value_dtype(flds[k][1]))
+    return res
+
+
+OPERATORS = {
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "==": operator.eq,
+    "=": operator.eq,
+    "!=": operator.ne,
+}
+
+_CONDITION = re.compile(r"^\s*(\w+)\s*(<=|>=|==|!=|<|>|=)\s*(\S+)\s*$")
+
+
+def conditions(where):
+    """List of (key, operator function, value) from "KEY op value" string
+    like "OFFSET < 500" or list of such strings"""
+    res = []
+    for w in [where] if isinstance(where, str) else where:
+        m = _CONDITION.match(w)
+        if m is None:
+            raise ValueError("Bad condition: " + w)
+        key, op, val = m.groups()
+        try:
+            val = int(val)
+        except ValueError:
+            val = float(val)
+        res.append((key.upper(), OPERATORS[op], val))
+    return res
+
+
+def select(header_table, where, keys=None):
+    """Numbers of rows of header_table(keys) matching where, see
+    seissegy.ISegy.select"""
+    if callable(where):
+        if not keys:
+            raise ValueError("Predicate function needs keys")
+        return np.flatnonzero(where(header_table(keys)))
+    conds = conditions(where)
+    keys = list(dict.fromkeys(k for k, op, v in conds))
+    return np.flatnonzero(match(header_table(keys), conds))
+
+
+def match(tbl, conds):
+    """Boolean array of rows of header table meeting all conditions"""
+    mask = None
+    for key, op, val in conds:
+        m = op(tbl[key], val)
+        mask = m if mask is None else mask & m
+    return mask
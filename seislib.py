@@ -0,0 +1,89 @@
+import os
+import subprocess
+from ctypes import CDLL, util
+
+_libs = {}
+_paths = {}
+_DEFAULT = object()
+
+
+def set_path(name, path):
+    """Use library file path for lib<name>, should be called before its
+    first use"""
+    _paths[name] = path
+
+
+def find(name):
+    """Path of lib<name> shared library. It is taken from set_path, then
+    from <NAME>_LIB environment variable (e.g. SEISSEGY_LIB), then from
+    ctypes.util.find_library and pkg-config as the last resort"""
+    path = _paths.get(name) or os.environ.get(name.upper() + "_LIB")
+    if path:
+        return path
+    path = util.find_library(name)
+    if path:
+        return path
+    try:
+        res = subprocess.run(["pkg-config", "--libs", name], capture_output=True)
+        flags = res.stdout.decode().split()
+    except OSError:
+        flags = []
+    for f in flags:
+        if f.startswith("-L"):
+            return os.path.join(f[2:], "lib" + name + ".so")
+    raise OSError(
+        "lib{} not found, set {}_LIB environment variable".format(name, name.upper())
+    )
+
+
+def load(name):
+    """CDLL of lib<name>, loaded once on first call"""
+    lib = _libs.get(name)
+    if lib is None:
+        path = _paths.get(name) or os.environ.get(name.upper() + "_LIB")
+        if path is None:
+            # Loader search path first, it needs no subprocesses
+            try:
+                lib = CDLL("lib" + name + ".so")
+            except OSError:
+                pass
+        if lib is None:
+            lib = CDLL(find(name))
+        _libs[name] = lib
+    return lib
+
+
+class Func:
+    """Foreign function of library bound on first use. As class attribute
+    it replaces itself with the bound function, so later calls cost the
+    same as with prototypes bound at import"""
+
+    def __init__(self, lib, name, argtypes=None, restype=_DEFAULT):
+        self.lib = lib
+        self.name = name
+        self.argtypes = argtypes
+        self.restype = restype
+        self.__func = None
+        self.__owner = None
+
+    def __set_name__(self, owner, attr):
+        self.__owner = owner
+        self.__attr = attr
+
+    def bind(self):
+        if self.__func is None:
+            f = getattr(load(self.lib), self.name)
+            if self.argtypes is not None:
+                f.argtypes = self.argtypes
+            if self.restype is not _DEFAULT:
+                f.restype = self.restype
+            self.__func = f
+            if self.__owner is not None:
+                setattr(self.__owner, self.__attr, f)
+        return self.__func
+
+    def __get__(self, obj, owner=None):
+        return self.bind()
+
+    def __call__(self, *args):
+        return self.bind()(*args)
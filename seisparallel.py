@@ -0,0 +1,79 @@
+import os
+
+import numpy as np
+
+_worker = {}
+
+
+def parallel_map(
+    trace_file,
+    func,
+    workers=None,
+    chunk=4096,
+    keys=None,
+    dtype=np.float64,
+    out_dtype=None,
+    out_shape=(),
+    start=0,
+    stop=None,
+):
+    """Split traces start:stop of TraceFile into ranges of chunk traces and
+    call func(samples, headers, first) for every range in worker processes.
+    samples is 2D array of the range, headers is table of keys (empty dict
+    without keys) and first is number of the first trace in the range.
+    Workers reopen the file from its name, kind and remaps.
+
+    Without out_dtype results of func are returned as a list in trace
+    order. With out_dtype func should return array of shape
+    (traces in range,) + out_shape, which is written into shared memory and
+    returned as one array for all traces"""
+    # Imported here to keep them out of reader import time
+    from concurrent.futures import ProcessPoolExecutor
+    from multiprocessing import shared_memory
+
+    stop = len(trace_file) if stop is None else min(stop, len(trace_file))
+    ranges = [(b, min(b + chunk, stop)) for b in range(start, stop, chunk)]
+    shape = (stop - start,) + tuple(out_shape)
+    shm = None
+    if out_dtype is not None:
+        nbytes = max(int(np.prod(shape)) * np.dtype(out_dtype).itemsize, 1)
+        shm = shared_memory.SharedMemory(create=True, size=nbytes)
+    try:
+        out = (shm.name, shape, out_dtype, start) if shm else None
+        with ProcessPoolExecutor(
+            workers or os.cpu_count(),
+            initializer=_init_worker,
+            initargs=(trace_file, func, keys, dtype, out),
+        ) as pool:
+            res = list(pool.map(_run, ranges))
+        if shm is None:
+            return res
+        return np.ndarray(shape, out_dtype, shm.buf).copy()
+    finally:
+        if shm is not None:
+            shm.close()
+            shm.unlink()
+
+
+def _init_worker(trace_file, func, keys, dtype, out):
+    from multiprocessing import shared_memory
+
+    _worker.update(file=trace_file, func=func, keys=keys, dtype=dtype, out=None)
+    if out is not None:
+        name, shape, out_dtype, start = out
+        shm = shared_memory.SharedMemory(name=name)
+        _worker["shm"] = shm
+        _worker["out"] = np.ndarray(shape, out_dtype, shm.buf)
+        _worker["start"] = start
+
+
+def _run(rng):
+    start, stop = rng
+    w = _worker
+    res = w["file"].read_block(slice(start, stop), dtype=w["dtype"], keys=w["keys"])
+    samples, headers = res if w["keys"] else (res, {})
+    res = w["func"](samples, headers, start)
+    if w["out"] is None:
+        return res
+    w["out"][start - w["start"] : stop - w["start"]] = res
+    return None
@@ -0,0 +1,173 @@
+import queue
+import threading
+
+_END = object()
+_POLL = 0.1
+
+
+class _Error:
+    def __init__(self, exc):
+        self.exc = exc
+
+
+def _run(read, stop, put):
+    try:
+        while not stop.is_set():
+            put(read())
+    except StopIteration:
+        put(_END)
+    except BaseException as e:
+        put(_Error(e))
+
+
+class ReadAhead:
+    """Iterator calling read() in a background thread until StopIteration
+    and keeping up to size results ready in a bounded queue. Foreign calls
+    release the GIL, so reading overlaps with processing of previous
+    items. Supports both for and async for, in the latter case the event
+    loop is never blocked by reading. The reader should not be used by
+    anybody else until iteration is over or close() is called"""
+
+    def __init__(self, read, size, rewind=None):
+        self.__read = read
+        self.__size = size
+        self.__rewind = rewind
+        self.__thread = None
+        self.__done = False
+        self.__stop = threading.Event()
+
+    def __iter__(self):
+        self.close()
+        q = queue.Queue(self.__size)
+        stop = self.__stop
+
+        def put(item):
+            while not stop.is_set():
+                try:
+                    q.put(item, timeout=_POLL)
+                    return
+                except queue.Full:
+                    pass
+
+        self.__get = q.get
+        self.__start(put)
+        return self
+
+    def __next__(self):
+        if self.__done:
+            raise StopIteration
+        return self.__unpack(self.__get())
+
+    def __aiter__(self):
+        # asyncio takes longer to import than the rest of the package
+        import asyncio
+        import concurrent.futures
+
+        self.close()
+        loop = asyncio.get_running_loop()
+        q = asyncio.Queue(self.__size)
+        stop = self.__stop
+
+        def put(item):
+            fut = asyncio.run_coroutine_threadsafe(q.put(item), loop)
+            while not stop.is_set():
+                try:
+                    return fut.result(_POLL)
+                except concurrent.futures.TimeoutError:
+                    pass
+            fut.cancel()
+
+        self.__aget = q.get
+        self.__start(put)
+        return self
+
+    async def __anext__(self):
+        if self.__done:
+            raise StopAsyncIteration
+        try:
+            return self.__unpack(await self.__aget())
+        except StopIteration:
+            raise StopAsyncIteration
+
+    def close(self):
+        """Stop background thread, unread items are dropped"""
+        if self.__thread is not None:
+            self.__stop.set()
+            self.__thread.join()
+            self.__thread = None
+        self.__stop.clear()
+        self.__done = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exec_info):
+        self.close()
+
+    def __del__(self):
+        if self.__thread is not None:
+            self.__stop.set()
+
+    def __start(self, put):
+        if self.__rewind is not None:
+            self.__rewind()
+        # Thread holds no reference to self, so dropped iterator is
+        # collected and its __del__ stops the thread
+        self.__thread = threading.Thread(
+            target=_run, args=(self.__read, self.__stop, put), daemon=True
+        )
+        self.__thread.start()
+
+    def __unpack(self, item):
+        if item is _END:
+            self.__done = True
+            raise StopIteration
+        if isinstance(item, _Error):
+            self.__done = True
+            raise item.exc
+        return item
+
+
+class WriteBehind:
+    """Runs queued calls in order in a background thread, keeping at most
+    size of them waiting. An error of a call is raised by every later put,
+    flush and close, calls queued after it are dropped"""
+
+    def __init__(self, size):
+        self.__q = queue.Queue(size)
+        self.__error = None
+        self.__thread = threading.Thread(target=self.__run, daemon=True)
+        self.__thread.start()
+
+    def put(self, func, *args):
+        self.__check()
+        self.__q.put((func, args))
+
+    def flush(self):
+        """Wait until all queued calls are done"""
+        self.__q.join()
+        self.__check()
+
+    def close(self):
+        if self.__thread is not None:
+            self.__q.put(None)
+            self.__thread.join()
+            self.__thread = None
+        self.__check()
+
+    def __run(self):
+        while True:
+            item = self.__q.get()
+            try:
+                if item is None:
+                    return
+                if self.__error is None:
+                    item[0](*item[1])
+            except BaseException as e:
+                self.__error = e
+            finally:
+                self.__q.task_done()
+
+    def __check(self):
+        if self.__error is not None:
+            raise self.__error
@@ -0,0 +1,275 @@
+import functools
+
+import numpy as np
+
+import seisheader
+
+# Binary exponents of absolute amplitudes in default histogram, smaller
+# and larger values fall into the edge bins
+EXP_MIN = -64
+EXP_MAX = 64
+
+ATTRIBUTES = ("trace", "rms", "min", "max", "dead", "clipped")
+
+
+class Report:
+    """Mergeable result of scan, surange-like. Header statistics are kept
+    as sorted unique values of every key, amplitude ones as sums, extremes,
+    histogram and numbers of dead and clipped traces, so reports of trace
+    ranges can be merged in any order into the report of all of them.
+
+    Histogram has bins of equal width over hist_range, or with None bins
+    of absolute amplitudes by binary exponent, see edges. Trace is dead if
+    its peak absolute amplitude is not above dead and clipped if at least
+    clip_samples of its samples reach clip, or its own peak if clip is
+    None. Non-finite samples are counted and taken as zeros. With
+    attributes per trace values of ATTRIBUTES are kept, see trace_table"""
+
+    def __init__(
+        self,
+        keys=(),
+        bins=64,
+        hist_range=None,
+        dead=0.0,
+        clip=None,
+        clip_samples=2,
+        attributes=False,
+    ):
+        self.keys = list(keys)
+        self.bins = bins if hist_range is not None else EXP_MAX - EXP_MIN + 1
+        self.hist_range = hist_range
+        self.dead_level = dead
+        self.clip = clip
+        self.clip_samples = clip_samples
+        self.traces = 0
+        self.samples = 0
+        self.nonfinite = 0
+        self.zeros = 0
+        self.dead = 0
+        self.clipped = 0
+        self.min = np.inf
+        self.max = -np.inf
+        self.sum = 0.0
+        self.sum_sq = 0.0
+        self.hist = np.zeros(self.bins, dtype=np.int64)
+        self.unique = {}
+        self.__parts = [] if attributes else None
+
+    @property
+    def edges(self):
+        """Bin edges of hist, for exponent bins they are powers of 2 and
+        bin j holds absolute amplitudes in [edges[j], edges[j + 1]) except
+        zeros, which are counted separately"""
+        if self.hist_range is not None:
+            return np.linspace(*self.hist_range, self.bins + 1)
+        return 2.0 ** np.arange(EXP_MIN - 1, EXP_MAX + 1)
+
+    @property
+    def mean(self):
+        return self.sum / self.samples if self.samples else 0.0
+
+    @property
+    def rms(self):
+        return np.sqrt(self.sum_sq / self.samples) if self.samples else 0.0
+
+    def header_range(self, key):
+        """(min, max, number of unique values) of header key"""
+        u = self.unique[key]
+        return (u[0], u[-1], u.size) if u.size else (None, None, 0)
+
+    def update(self, samples, headers=None, first=None):
+        """Add 2D block of samples, one trace per row, with table of key
+        headers of these traces. first is number of the first trace in the
+        file, traces are counted from 0 if it is None. Returns self"""
+        samples = np.asarray(samples)
+        if samples.ndim == 1:
+            samples = samples[None]
+        n, ns = samples.shape
+        first = self.traces if first is None else first
+        for k in self.keys:
+            u = np.unique(np.asarray(headers[k]))
+            old = self.unique.get(k)
+            self.unique[k] = u if old is None else np.union1d(old, u)
+        self.traces += n
+        self.samples += samples.size
+        if n == 0:
+            return self
+        finite = np.isfinite(samples)
+        if not finite.all():
+            self.nonfinite += samples.size - np.count_nonzero(finite)
+            samples = np.where(finite, samples, 0)
+        if ns == 0:
+            zero = np.zeros(n)
+            self.__trace_attributes(first, zero, zero, zero, zero == 0, zero != 0)
+            self.dead += n
+            return self
+        absval = np.abs(samples)
+        peak = absval.max(axis=1)
+        tmin = samples.min(axis=1)
+        tmax = samples.max(axis=1)
+        sum_sq = np.einsum("ij,ij->i", samples, samples, dtype=np.float64)
+        dead = peak <= self.dead_level
+        level = peak[:, None] if self.clip is None else self.clip
+        hits = np.count_nonzero(absval >= level, axis=1)
+        clipped = (hits >= self.clip_samples) & ~dead
+        self.min = min(self.min, float(tmin.min()))
+        self.max = max(self.max, float(tmax.max()))
+        self.sum += float(samples.sum(dtype=np.float64))
+        self.sum_sq += float(sum_sq.sum())
+        self.dead += int(np.count_nonzero(dead))
+        self.clipped += int(np.count_nonzero(clipped))
+        zeros = samples.size - np.count_nonzero(absval)
+        self.zeros += zeros
+        self.hist += self.__histogram(samples, absval, zeros)
+        rms = np.sqrt(sum_sq / ns)
+        self.__trace_attributes(first, rms, tmin, tmax, dead, clipped)
+        return self
+
+    def __histogram(self, samples, absval, zeros):
+        if self.hist_range is not None:
+            lo, hi = self.hist_range
+            idx = (samples - lo) * (self.bins / (hi - lo))
+            idx = np.clip(idx, 0, self.bins - 1).astype(np.intp)
+            return np.bincount(idx.ravel(), minlength=self.bins)
+        exp = np.frexp(absval)[1]
+        idx = np.clip(exp, EXP_MIN, EXP_MAX) - EXP_MIN
+        counts = np.bincount(idx.ravel(), minlength=self.bins)
+        # frexp gives exponent 0 for zeros
+        counts[-EXP_MIN] -= zeros
+        return counts
+
+    def __trace_attributes(self, first, rms, tmin, tmax, dead, clipped):
+        if self.__parts is None:
+            return
+        trace = np.arange(first, first + rms.size)
+        self.__parts.append((trace, rms, tmin, tmax, dead, clipped))
+
+    def merge(self, other):
+        """Add counters of report made with the same options for other
+        traces. Per trace attributes are appended after the own ones.
+        Returns self"""
+        if self.keys != other.keys or not np.array_equal(self.edges, other.edges):
+            raise ValueError("Reports have different keys or histograms")
+        self.traces += other.traces
+        self.samples += other.samples
+        self.nonfinite += other.nonfinite
+        self.zeros += other.zeros
+        self.dead += other.dead
+        self.clipped += other.clipped
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.sum += other.sum
+        self.sum_sq += other.sum_sq
+        self.hist += other.hist
+        for k, u in other.unique.items():
+            old = self.unique.get(k)
+            self.unique[k] = u if old is None else np.union1d(old, u)
+        if self.__parts is not None and other.__parts is not None:
+            self.__parts += other.__parts
+        return self
+
+    def trace_table(self):
+        """Dict of ATTRIBUTES columns for all traces in order of update
+        and merge calls, None if attributes were not kept"""
+        if self.__parts is None:
+            return None
+        if not self.__parts:
+            return {k: np.empty(0) for k in ATTRIBUTES}
+        cols = zip(*self.__parts)
+        return {k: np.concatenate(c) for k, c in zip(ATTRIBUTES, cols)}
+
+    def save_trace_table(self, file_name):
+        """Write trace_table to .npz file"""
+        np.savez(file_name, **self.trace_table())
+
+    def summary(self):
+        """Dict of all statistics, header ones as (min, max, unique)"""
+        return {
+            "traces": self.traces,
+            "samples": self.samples,
+            "headers": {k: self.header_range(k) for k in self.unique},
+            "min": self.min,
+            "max": self.max,
+            "mean": self.mean,
+            "rms": self.rms,
+            "zeros": self.zeros,
+            "nonfinite": self.nonfinite,
+            "dead": self.dead,
+            "clipped": self.clipped,
+            "hist": self.hist,
+            "edges": self.edges,
+        }
+
+    def __str__(self):
+        """surange-like text, headers which are zero in all traces are
+        skipped"""
+        lines = ["{} traces, {} samples".format(self.traces, self.samples)]
+        for k in self.unique:
+            lo, hi, num = self.header_range(k)
+            if num == 0 or (num == 1 and lo == 0):
+                continue
+            lines.append("{:16} {} {} ({} unique)".format(k, lo, hi, num))
+        if self.samples:
+            lines.append(
+                "amplitude min {:g} max {:g} mean {:g} rms {:g}".format(
+                    self.min, self.max, self.mean, self.rms
+                )
+            )
+        lines.append(
+            "dead {} clipped {} zero samples {} non-finite {}".format(
+                self.dead, self.clipped, self.zeros, self.nonfinite
+            )
+        )
+        return "\n".join(lines)
+
+
+def scan(
+    reader,
+    keys=None,
+    chunk=1024,
+    dtype=np.float64,
+    workers=None,
+    attributes=False,
+    **options
+):
+    """Report of header and amplitude statistics of ISegy or ISU reader
+    made by one pass over it. keys are headers to collect, all headers of
+    the file kind by default. Traces are read in blocks of chunk traces,
+    or one by one for variable length files. dtype is dtype of samples,
+    np.float32 halves memory traffic for 4 byte formats.
+
+    With workers ranges of chunk traces of fixed length files are scanned
+    in that number of processes, see seisparallel.parallel_map, and their
+    reports are merged. With attributes per trace attributes are kept in
+    report, if it is a file name they are also saved there, see
+    Report.trace_table. options are passed to Report"""
+    if keys is None:
+        keys = seisheader.fields(reader._kind, reader._remaps)
+    keys = [k.upper() for k in keys]
+    make = functools.partial(Report, keys, attributes=bool(attributes), **options)
+    f = _trace_file(reader)
+    if workers and f is not None and f.fixed and f.decodable:
+        parts = reader.parallel_map(
+            functools.partial(_scan_block, make), workers, chunk, keys, dtype=dtype
+        )
+        report = functools.reduce(Report.merge, parts, make())
+    else:
+        report = make()
+        n = chunk if f is not None and f.fixed else 1
+        for block in reader.blocks(n, dtype=dtype, keys=keys or None):
+            samples, headers = block if keys else (block, {})
+            report.update(samples, headers)
+    if isinstance(attributes, str):
+        report.save_trace_table(attributes)
+    return report
+
+
+def _scan_block(make, samples, headers, first):
+    return make().update(samples, headers, first)
+
+
+def _trace_file(reader):
+    try:
+        return reader.trace_file()
+    except ValueError:
+        return None
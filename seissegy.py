@@ -1,7 +1,4 @@
-import os
-import subprocess
 from ctypes import (
-    CDLL,
     POINTER,
     Structure,
     c_bool,
@@ -20,11 +17,32 @@ from ctypes import (
     pointer,
 )
 
-from seistrace import Trace, TraceHeader
+import numpy as np
+
+import seiscodec
+import seisheader
+import seislib
+import seiscache
+import seisparallel
+import seisscan
+import seisstats
+import seistrace
+from seisarray import SeisArray
+from seiscube import Cube
+from seisfile import TraceFile
+from seisgather import GatherIndex
+from seislib import Func
+from seisqueue import ReadAhead, WriteBehind
+from seisstats import Counted
+from seistrace import HeaderColumns, Trace, TraceHeader
+
+
+def __getattr__(name):
+    # Library is loaded on first use, see seislib
+    if name == "lib":
+        return seislib.load("seissegy")
+    raise AttributeError(name)
 
-res = subprocess.run(["pkg-config", "--libs", "seissegy"], capture_output=True)
-lib_path = os.path.join(res.stdout.decode().split()[0][2:], "libseissegy.so")
-lib = CDLL(lib_path)
 
 (
     ERR_OK,
@@ -37,7 +55,7 @@ lib = CDLL(lib_path)
     ERR_FILE_WRITE,
 ) = (0, 1, 2, 3, 4, 5, 6, 7)
 
-(i8, u8, i16, u16, i32, u32, i64, u64, f32, f64, b64) = (
+i8, u8, i16, u16, i32, u32, i64, u64, f32, f64, b64 = (
     0,
     1,
     2,
@@ -105,99 +123,493 @@ class SegyBinHdr(Structure):
     ]
 
 
-class ISegy:
-    __seis_isegy_new = lib.seis_isegy_new
-    __seis_isegy_new.restype = c_void_p
-    __seis_isegy_unref = lib.seis_isegy_unref
-    __seis_isegy_unref.argtypes = [POINTER(POINTER(c_void_p))]
-    __seis_isegy_get_error = lib.seis_isegy_get_error
-    __seis_isegy_get_error.argtypes = [c_void_p]
-    __seis_isegy_get_error.restype = POINTER(SegyError)
-    __seis_isegy_open = lib.seis_isegy_open
-    __seis_isegy_open.argtypes = [c_void_p, c_char_p]
-    __seis_isegy_read_trace = lib.seis_isegy_read_trace
-    __seis_isegy_read_trace.argtypes = [c_void_p]
-    __seis_isegy_read_trace.restype = c_void_p
-    __seis_isegy_read_trace_header = lib.seis_isegy_read_trace_header
-    __seis_isegy_read_trace_header.argtypes = [c_void_p]
-    __seis_isegy_read_trace_header.restype = c_void_p
-    __seis_isegy_get_text_headers_num = lib.seis_isegy_get_text_headers_num
-    __seis_isegy_get_text_headers_num.argtypes = [c_void_p]
-    __seis_isegy_get_text_headers_num.restype = c_size_t
-    __seis_isegy_get_text_header = lib.seis_isegy_get_text_header
-    __seis_isegy_get_text_header.argtypes = [c_void_p, c_size_t]
-    __seis_isegy_get_text_header.restype = c_char_p
-    __seis_isegy_get_binary_header = lib.seis_isegy_get_binary_header
-    __seis_isegy_get_binary_header.argtypes = [c_void_p]
-    __seis_isegy_get_binary_header.restype = POINTER(SegyBinHdr)
-    __seis_isegy_end_of_data = lib.seis_isegy_end_of_data
-    __seis_isegy_end_of_data.argtypes = [c_void_p]
-    __seis_isegy_end_of_data.restype = c_bool
-    __seis_isegy_rewind = lib.seis_isegy_rewind
-    __seis_isegy_rewind.argtypes = [c_void_p]
-    __seis_isegy_remap_trace_header = lib.seis_isegy_remap_trace_header
-    __seis_isegy_remap_trace_header.argtypes = [c_void_p, c_char_p, c_int, c_int, c_int]
-
-    def __init__(self, file_name):
-        self.pointer = pointer
-        self.__pimpl = self.__seis_isegy_new()
-        if self.__pimpl == 0:
-            raise RuntimeError("No memory")
-        self.__pimpl = cast(self.__pimpl, POINTER(c_void_p))
-        code = self.__seis_isegy_open(self.__pimpl, file_name.encode())
-        self.__err = self.__seis_isegy_get_error(self.__pimpl)
-        if code != ERR_OK:
-            raise RuntimeError(self.__err.contents.message)
-
-    def remap_trace_header(self, *args):
-        for a in args:
-            self.__seis_isegy_remap_trace_header(
-                self.__pimpl,
-                a["hdr_name"].encode(),
-                a["hdr_num"],
-                a["offset"],
-                a["format"],
+class _Input(Counted):
+    """Reading shared by ISegy and ISU. Traces are read from the file
+    directly by TraceFile, while the C reader is used when samples can't
+    be decoded in Python. With "mmap" backend fixed length files are
+    memory mapped and sequential reads go through the map as well. Map
+    pays off for blocks, read_samples, read_trace_into and header tables:
+    Trace and TraceHeader objects from it get every header set by its own
+    ctypes call, which costs about 100 us per trace, so traces() and
+    headers() are faster with "c" backend. enable_stats starts counting reads, see seisstats. Subclasses wrap
+    their C reader by _c_end_of_data, _c_read_trace and _c_read_header,
+    which raise RuntimeError on errors, and _c_rewind, _c_remap and
+    _c_close"""
+
+    _kind = None
+    _cache = None
+    _file = None
+    _stats_methods = seisstats.READER
+
+    def _init_input(self, file_name, backend):
+        if backend not in ("c", "mmap"):
+            raise ValueError("Unknown backend")
+        self.file_name = file_name
+        self.backend = backend
+        self._remaps = []
+        self._file = None
+        self._pos = None
+        self._gathers = {}
+        self._cube = None
+
+    def trace_file(self):
+        """TraceFile of this reader with current header remaps, created on
+        first use"""
+        if self._file is None:
+            self._file = TraceFile(
+                self.file_name, self._kind, self._remaps, self.backend == "mmap"
             )
-            if self.__err.contents.code != ERR_OK:
-                raise RuntimeError(self.__err.contents.message)
-
-    def read_trace(self):
-        if self.__seis_isegy_end_of_data(self.__pimpl):
+            if self._stats is not None:
+                self._stats_attach(self._stats)
+        return self._file
+
+    def _stats_attach(self, st):
+        if self._file is not None:
+            st.trace_file(self._file)
+
+    def _close_file(self):
+        """Close TraceFile, it is opened again on next use"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _indexed(self):
+        try:
+            return self.trace_file().decodable
+        except ValueError:
+            return False
+
+    def _samp_int(self):
+        """Sample interval in microseconds for windows of C backend, 0 if
+        it is taken from SAMP_INT of every trace"""
+        return 0
+
+    def _mapped(self):
+        if self.backend != "mmap":
+            return False
+        try:
+            return self.trace_file().map is not None and self._indexed()
+        except ValueError:
+            return False
+
+    def memmap(self):
+        """np.memmap of all traces as (header, samples) records. Raises
+        ValueError if the file could not be mapped"""
+        f = self.trace_file() if self.backend == "mmap" else None
+        if f is None or f.map is None:
+            raise ValueError("File is not memory mapped")
+        return f.map
+
+    def _index(self, i, allow_end=False):
+        num = len(self)
+        if i < 0:
+            i += num
+        if i < 0 or i > num or (i == num and not allow_end):
+            raise IndexError("Trace number out of range")
+        return i
+
+    def rewind(self):
+        self._pos = 0 if self._mapped() else None
+        self._c_rewind()
+
+    def seek(self, i):
+        """Position reader so that next read returns trace number i"""
+        i = self._index(i, True)
+        if self._indexed():
+            self._pos = i
+        else:
+            self.rewind()
+            self._c_skip(i)
+
+    def __len__(self):
+        return len(self.trace_file())
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return self._traces_list(np.arange(*i.indices(len(self))))
+        if isinstance(i, (list, tuple, np.ndarray)):
+            return self._traces_list([self._index(j) for j in i])
+        i = self._index(i)
+        if self._cache is not None:
+            return self._cache.trace(i, self.__load_trace)
+        return self.__load_trace(i)
+
+    def __load_trace(self, i):
+        if self._indexed():
+            return self._trace_at(i)
+        self.seek(i)
+        return self.read_trace()
+
+    def header(self, i):
+        """TraceHeader of trace number i. Reader position is undefined
+        afterwards unless the file is indexed"""
+        i = self._index(i)
+        if self._cache is not None:
+            return self._cache.header(i, self.__load_header)
+        return self.__load_header(i)
+
+    def __load_header(self, i):
+        if self._indexed():
+            return self.trace_file().header(i)
+        self.seek(i)
+        return self.read_header()
+
+    def enable_cache(self, max_bytes=256 << 20, header_bytes=0):
+        """Keep traces got by number (reader[i], gathers, traces_at) in
+        LRU cache of max_bytes and headers got by header(i) in one of
+        header_bytes, see seiscache.TraceCache. Cached traces are shared,
+        so they should not be changed. Windowed reads and reads of samples
+        arrays bypass the cache"""
+        self._cache = seiscache.TraceCache(max_bytes, header_bytes)
+
+    def disable_cache(self):
+        self._cache = None
+
+    def cache_stats(self):
+        """Dict of hits, misses, evictions and sizes of traces and headers
+        caches, None if cache is not enabled"""
+        return None if self._cache is None else self._cache.snapshot()
+
+    def _trace_at(self, i, window=None):
+        return self.trace_file().trace(i, window)
+
+    def _read_next(self, header_only=False, window=None):
+        f = self.trace_file()
+        if self._pos >= len(f):
             raise StopIteration
-        ptr = self.__seis_isegy_read_trace(self.__pimpl)
-        if self.__err.contents.code != ERR_OK:
-            raise RuntimeError(self.__err.contents.message)
-        return Trace(ptr=ptr)
-
-    def read_header(self):
-        if self.__seis_isegy_end_of_data(self.__pimpl):
+        res = f.header(self._pos) if header_only else f.trace(self._pos, window)
+        self._pos += 1
+        return res
+
+    def select(self, where, keys=None):
+        """Numbers of traces with headers matching where, found by one pass
+        over headers only. where is "KEY op value" string, e.g.
+        "OFFSET < 500" (op is <, <=, >, >=, == or !=), list of such strings
+        which should all hold, or function of header table of keys
+        returning boolean array"""
+        return seisheader.select(self.read_header_table, where, keys)
+
+    def filtered(self, where, keys=None, dtype=None, window=None):
+        """Iterate over traces matching where, see select. Samples are
+        read only for these traces, see traces_at"""
+        return self.traces_at(self.select(where, keys), dtype, window)
+
+    def traces_at(self, indices, dtype=None, window=None):
+        """Iterate over traces with given ascending numbers. They are read
+        by random access when the file is indexed and by skipping headers
+        of the others otherwise. dtype and window are used like by
+        traces(). Reader position is undefined during and after iteration"""
+        cache = self._cache if dtype is None and window is None else None
+        if self._indexed():
+            for i in indices:
+                if cache is not None:
+                    yield cache.trace(i, self._trace_at)
+                elif dtype is None:
+                    yield self._trace_at(i, window)
+                else:
+                    yield self._samples_at(i, dtype, window)
+            return
+        self.rewind()
+        pos = 0
+        for i in indices:
+            if cache is not None and i in cache.traces:
+                # Skipped along with the next missing trace
+                yield cache.trace(i, None)
+                continue
+            self._c_skip(i - pos)
+            pos = i + 1
+            if cache is not None:
+                yield cache.trace(i, lambda i: self.read_trace())
+            elif dtype is None:
+                yield self.read_trace(window)
+            else:
+                yield self.read_samples(dtype, window)
+
+    def _samples_at(self, i, dtype, window=None):
+        return self.trace_file().read_samples(i, dtype=dtype, window=window)
+
+    def _read_next_samples(self, dtype, window=None):
+        f = self.trace_file()
+        if self._pos >= len(f):
             raise StopIteration
-        ptr = self.__seis_isegy_read_trace_header(self.__pimpl)
-        if self.__err.contents.code != ERR_OK:
-            raise RuntimeError(self.__err.contents.message)
-        return TraceHeader(ptr=ptr)
+        res = f.read_samples(self._pos, dtype=dtype, window=window)
+        self._pos += 1
+        return res
 
-    def get_text_headers(self):
-        num = self.__seis_isegy_get_text_headers_num(self.__pimpl)
-        lst = []
-        for i in range(num):
-            lst.append(self.__seis_isegy_get_text_header(self.__pimpl, i))
-        return lst
+    def _read_next_into(self, samples_out, header_out):
+        f = self.trace_file()
+        if self._pos >= len(f):
+            raise StopIteration
+        num = f.read_into(self._pos, samples_out, header_out)
+        self._pos += 1
+        return num
 
-    def get_binary_header(self):
-        return self.__seis_isegy_get_binary_header(self.__pimpl).contents
+    def _read_next_reuse(self, trc):
+        f = self.trace_file()
+        if self._pos >= len(f):
+            raise StopIteration
+        num = f.samples_num(self._pos)
+        if trc is None or trc.samples_num() != num:
+            trc = Trace(samp_num=num)
+        f.read_into(self._pos, trc.samples(), trc.header())
+        self._pos += 1
+        return trc
+
+    def _read_next_block(self, n, out, dtype, keys, window=None):
+        f = self.trace_file()
+        stop = min(self._pos + n, len(f))
+        if stop == self._pos:
+            raise StopIteration
+        if out is not None:
+            out = out[: stop - self._pos]
+        res = f.read_block(np.arange(self._pos, stop), out, dtype, keys, window)
+        self._pos = stop
+        return res
+
+    def gather_index(self, *keys):
+        """GatherIndex by key headers. It is loaded from the file saved next
+        to the data or built by one header scan and saved there"""
+        keys = tuple(k.upper() for k in keys)
+        idx = self._gathers.get(keys)
+        if idx is None:
+            idx = GatherIndex.load(self.file_name, keys, self._remaps)
+        if idx is None:
+            idx = GatherIndex.from_table(keys, self.read_header_table(keys))
+            idx.save(self.file_name, self._remaps)
+        self._gathers[keys] = idx
+        return idx
+
+    def gather(self, dtype=None, **keys):
+        """List of traces with given header values, e.g. gather(cdp=1234).
+        With dtype it is 2D array of their samples in that dtype instead"""
+        idx = self.gather_index(*keys)
+        traces = idx.traces(*keys.values())
+        if dtype is None:
+            return self._traces_list(traces)
+        return self._block_at(traces, dtype)
+
+    def gathers(self, *keys, dtype=None):
+        """Iterate over pairs of key values tuple and list of traces for
+        every gather, e.g. gathers("ffid"). With dtype 2D arrays of
+        samples in that dtype are given instead of lists"""
+        for values, traces in self.gather_index(*keys):
+            if dtype is None:
+                yield values, self._traces_list(traces)
+            else:
+                yield values, self._block_at(traces, dtype)
+
+    def _block_at(self, traces, dtype):
+        """Samples of traces with given numbers as rows of array of dtype,
+        decoded straight into it when samples are read by TraceFile"""
+        if self._indexed():
+            return self.trace_file().read_block(traces, dtype=dtype)
+        rows = self._traces_list(traces, dtype)
+        return np.stack(rows) if rows else np.empty((0, 0), dtype)
+
+    def _traces_list(self, traces, dtype=None):
+        """List of traces with given numbers in their order, samples arrays
+        of dtype if it is given. They are read by traces_at, so files
+        without index are passed once"""
+        order, inverse = np.unique(np.asarray(traces, np.int64), return_inverse=True)
+        rows = list(self.traces_at(order, dtype))
+        return [rows[j] for j in inverse.ravel()]
+
+    @property
+    def cube(self):
+        """Cube of post-stack 3D volume by INLINE and XLINE headers, its
+        geometry is found on first use"""
+        if self._cube is None:
+            self._cube = Cube(self.trace_file())
+        return self._cube
+
+    def parallel_map(self, func, workers=None, chunk=4096, keys=None, **kwargs):
+        """Call func(samples, headers, first) for ranges of chunk traces in
+        worker processes, see seisparallel.parallel_map"""
+        return seisparallel.parallel_map(
+            self.trace_file(), func, workers, chunk, keys, **kwargs
+        )
+
+    def as_array(self, dtype=np.float64, chunk=1024):
+        """Lazy (traces, samples) array of samples in dtype which reads only
+        indexed parts of the file, see seisarray.SeisArray"""
+        return SeisArray(self, dtype, chunk)
+
+    def scan(self, keys=None, **kwargs):
+        """Report of header and amplitude statistics made by one pass over
+        traces, see seisscan.scan"""
+        return seisscan.scan(self, keys, **kwargs)
+
+    def _read_mapped_table(self, keys, start, count):
+        f = self.trace_file()
+        stop = len(f) if count is None else min(start + count, len(f))
+        self._pos = max(stop, start)
+        return f.header_table(keys, slice(start, stop))
 
-    def traces(self):
-        return self.TraceIter(self)
+    def remap_trace_header(self, *args):
+        self._close_file()
+        if self._cache is not None:
+            self._cache.clear()
+        self._gathers = {}
+        self._cube = None
+        self._pos = None
+        for a in args:
+            self._remaps.append(a)
+            self._c_remap(a)
+
+    def read_trace(self, window=None):
+        """Read next trace, only window of its samples if it is given, see
+        traces"""
+        if self._pos is not None:
+            return self._read_next(window=window)
+        if self._c_end_of_data():
+            raise StopIteration
+        ptr = self._c_read_trace()
+        if window is None:
+            return Trace(ptr=ptr)
+        return seistrace.window_trace(Trace(ptr=ptr), window, self._samp_int())
+
+    def read_samples(self, dtype=np.float64, window=None):
+        """Samples of the next trace as new array of dtype, without Trace.
+        Python backend decodes them straight into dtype"""
+        if self._pos is not None:
+            return self._read_next_samples(dtype, window)
+        return seistrace.read_samples(
+            self.__read_trace_ptr, dtype, window, self._samp_int()
+        )
+
+    def read_trace_into(self, samples_out, header_out=None):
+        """Read next trace without creating Trace for it. Samples are
+        written to the beginning of 1D array samples_out in its dtype and
+        TraceHeader header_out is made to hold the trace headers. Returns
+        number of samples. Both objects are overwritten by the next call,
+        so values that should be kept must be copied before it"""
+        if self._pos is not None:
+            return self._read_next_into(samples_out, header_out)
+        return seistrace.read_trace_into(self.__read_trace_ptr, samples_out, header_out)
+
+    def _read_reuse(self, trc):
+        """Read next trace into trc, new Trace is created if trc is None or
+        does not fit"""
+        if self._pos is not None:
+            return self._read_next_reuse(trc)
+        ptr = self.__read_trace_ptr()
+        if ptr is None:
+            raise StopIteration
+        if trc is None:
+            return Trace(ptr=ptr)
+        trc.rebind(ptr)
+        return trc
 
-    def headers(self):
+    def read_header(self):
+        if self._pos is not None:
+            return self._read_next(True)
+        if self._c_end_of_data():
+            raise StopIteration
+        return TraceHeader(ptr=self._c_read_header())
+
+    def read_block(self, n, out=None, dtype=np.float64, keys=None, window=None):
+        """Read next n traces into rows of 2D array out, which is allocated
+        with given dtype if None. All traces should have the same length.
+        Returns filled part of out, plus header table of keys if they are
+        given. With window only these samples are read, see traces. Raises
+        StopIteration at the end of data"""
+        if out is not None:
+            n = min(n, out.shape[0])
+        if self._pos is not None:
+            return self._read_next_block(n, out, dtype, keys, window)
+        return seistrace.read_block(
+            self.__read_trace_ptr, n, out, dtype, keys, window, self._samp_int()
+        )
+
+    def __read_trace_ptr(self):
+        if self._c_end_of_data():
+            return None
+        return self._c_read_trace()
+
+    def read_header_table(self, keys, start=0, count=None):
+        """Read headers listed in keys for count traces beginning from
+        trace number start (up to the end of data if count is None).
+        Returns dict of NumPy columns, int64 or float64 for each key.
+        Reader stays positioned after the last read trace"""
+        if self._mapped():
+            return self._read_mapped_table(keys, start, count)
+        self.rewind()
+        self._c_skip(start)
+        # Columns grow as needed, count may be far beyond the end of data
+        cols = HeaderColumns(keys, 1024 if count is None else min(count, 1024))
+        while count is None or len(cols) < count:
+            if self._c_end_of_data():
+                break
+            cols.append(self._c_read_header())
+        return cols.columns()
+
+    def traces(self, prefetch=None, recycle=False, dtype=None, window=None):
+        """Iterate over traces. With prefetch up to that number of traces
+        are read ahead by a background thread, see seisqueue.ReadAhead.
+        Such iterator also supports async for.
+
+        With recycle every step returns the same Trace object holding the
+        next trace. Arrays from its samples() and headers from its header()
+        keep their memory alive, but the next step may refill it in place,
+        so values that should be kept must be copied. It can't be combined
+        with other options.
+
+        With dtype every step returns array of samples in that dtype, e.g.
+        np.float32, instead of Trace, see read_samples.
+
+        With window only part of every trace is read: (t0, t1) in seconds
+        from the first sample or slice of sample numbers. SAMP_NUM and
+        DELAY_TIME headers of such traces describe the window, see
+        seistrace.window_header. The Python backend reads only bytes of
+        the window"""
+        if recycle and (prefetch or dtype is not None or window is not None):
+            raise ValueError("Only whole traces read in order can be recycled")
+        if not prefetch:
+            return self.TraceIter(self, recycle, dtype, window)
+        if dtype is None:
+            return ReadAhead(lambda: self.read_trace(window), prefetch, self.rewind)
+        return ReadAhead(
+            lambda: self.read_samples(dtype, window), prefetch, self.rewind
+        )
+
+    def headers(self, prefetch=None):
+        if prefetch:
+            return ReadAhead(self.read_header, prefetch, self.rewind)
         return self.HeaderIter(self)
 
+    def blocks(
+        self, n, out=None, dtype=np.float64, keys=None, prefetch=None, window=None
+    ):
+        """Iterate over blocks of n traces. Every block is written into
+        the same array, so it is valid until the next step. With prefetch
+        blocks are read ahead by a background thread into arrays of their
+        own, so out can't be given. window is used like by traces"""
+        if prefetch:
+            if out is not None:
+                raise ValueError("Read ahead blocks can't share out array")
+            return ReadAhead(
+                lambda: self.read_block(n, None, dtype, keys, window),
+                prefetch,
+                self.rewind,
+            )
+        return self.BlockIter(self, n, out, dtype, keys, window)
+
     def end_of_data(self):
-        return self.__seis_isegy_end_of_data(self.__pimpl)
+        if self._pos is not None:
+            return self._pos >= len(self)
+        return self._c_end_of_data()
+
+    def _c_skip(self, num):
+        for i in range(num):
+            if self._c_end_of_data():
+                break
+            self._c_read_header()
 
     def close(self):
-        self.__seis_isegy_unref(self.pointer(self.__pimpl))
+        try:
+            self._close_file()
+        finally:
+            self._c_close()
 
     def __enter__(self):
         return self
@@ -209,69 +621,258 @@ class ISegy:
         self.close()
 
     class TraceIter:
-        def __init__(self, isegy):
-            self.__isegy = isegy
+        def __init__(self, reader, recycle=False, dtype=None, window=None):
+            self.__reader = reader
+            self.__recycle = recycle
+            self.__dtype = dtype
+            self.__window = window
+            self.__trc = None
 
         def __iter__(self):
-            self.__isegy._ISegy__seis_isegy_rewind(self.__isegy._ISegy__pimpl)
+            self.__reader.rewind()
             return self
 
         def __next__(self):
-            return self.__isegy.read_trace()
+            if self.__dtype is not None:
+                return self.__reader.read_samples(self.__dtype, self.__window)
+            if self.__recycle:
+                self.__trc = self.__reader._read_reuse(self.__trc)
+                return self.__trc
+            return self.__reader.read_trace(self.__window)
 
     class HeaderIter:
-        def __init__(self, isegy):
-            self.__isegy = isegy
+        def __init__(self, reader):
+            self.__reader = reader
+
+        def __iter__(self):
+            self.__reader.rewind()
+            return self
+
+        def __next__(self):
+            return self.__reader.read_header()
+
+    class BlockIter:
+        def __init__(self, reader, n, out, dtype, keys, window=None):
+            self.__reader = reader
+            self.__window = window
+            self.__n = n
+            self.__out = out
+            self.__dtype = dtype
+            self.__keys = keys
 
         def __iter__(self):
-            self.__isegy._ISegy__seis_isegy_rewind(self.__isegy._ISegy__pimpl)
+            self.__reader.rewind()
             return self
 
         def __next__(self):
-            return self.__isegy.read_header()
-
-
-class OSegy:
-    __seis_osegy_new = lib.seis_osegy_new
-    __seis_osegy_new.restype = c_void_p
-    __seis_osegy_unref = lib.seis_osegy_unref
-    __seis_osegy_unref.argtypes = [POINTER(POINTER(c_void_p))]
-    __seis_osegy_get_error = lib.seis_osegy_get_error
-    __seis_osegy_get_error.argtypes = [c_void_p]
-    __seis_osegy_get_error.restype = POINTER(SegyError)
-    __seis_osegy_open = lib.seis_osegy_open
-    __seis_osegy_open.argtypes = [c_void_p, c_char_p]
-    __seis_osegy_write_trace = lib.seis_osegy_write_trace
-    __seis_osegy_write_trace.argtypes = [c_void_p, c_void_p]
-    __seis_osegy_set_text_header = lib.seis_osegy_set_text_header
-    __seis_osegy_set_text_header.argtypes = [c_void_p, c_char_p]
-    __seis_osegy_set_binary_header = lib.seis_osegy_set_binary_header
-    __seis_osegy_set_binary_header.argtypes = [c_void_p, POINTER(SegyBinHdr)]
-    __seis_osegy_add_ext_text_header = lib.seis_osegy_add_ext_text_header
-    __seis_osegy_add_ext_text_header.argtypes = [c_void_p, c_char]
-    __seis_osegy_add_trailer_stanza = lib.seis_osegy_add_trailer_stanza
-    __seis_osegy_add_trailer_stanza.argtypes = [c_void_p, c_char_p]
-    __seis_osegy_remap_trace_header = lib.seis_osegy_remap_trace_header
-    __seis_osegy_remap_trace_header.argtypes = [c_void_p, c_char_p, c_int, c_int, c_int]
-
-    def __init__(self, file_name, text_header=None, bin_header=None):
+            res = self.__reader.read_block(
+                self.__n, self.__out, self.__dtype, self.__keys, self.__window
+            )
+            if self.__out is None:
+                self.__out = (res[0] if self.__keys else res).base
+            return res
+
+
+class ISegy(_Input):
+    _kind = "segy"
+
+    __seis_isegy_new = Func("seissegy", "seis_isegy_new", restype=c_void_p)
+    __seis_isegy_unref = Func(
+        "seissegy", "seis_isegy_unref", [POINTER(POINTER(c_void_p))]
+    )
+    __seis_isegy_get_error = Func(
+        "seissegy", "seis_isegy_get_error", [c_void_p], POINTER(SegyError)
+    )
+    __seis_isegy_open = Func("seissegy", "seis_isegy_open", [c_void_p, c_char_p])
+    __seis_isegy_read_trace = Func(
+        "seissegy", "seis_isegy_read_trace", [c_void_p], c_void_p
+    )
+    __seis_isegy_read_trace_header = Func(
+        "seissegy", "seis_isegy_read_trace_header", [c_void_p], c_void_p
+    )
+    __seis_isegy_get_text_headers_num = Func(
+        "seissegy", "seis_isegy_get_text_headers_num", [c_void_p], c_size_t
+    )
+    __seis_isegy_get_text_header = Func(
+        "seissegy", "seis_isegy_get_text_header", [c_void_p, c_size_t], c_char_p
+    )
+    __seis_isegy_get_binary_header = Func(
+        "seissegy", "seis_isegy_get_binary_header", [c_void_p], POINTER(SegyBinHdr)
+    )
+    __seis_isegy_end_of_data = Func(
+        "seissegy", "seis_isegy_end_of_data", [c_void_p], c_bool
+    )
+    __seis_isegy_rewind = Func("seissegy", "seis_isegy_rewind", [c_void_p])
+    __seis_isegy_remap_trace_header = Func(
+        "seissegy",
+        "seis_isegy_remap_trace_header",
+        [c_void_p, c_char_p, c_int, c_int, c_int],
+    )
+
+    def __init__(self, file_name, backend="c"):
+        self._init_input(file_name, backend)
+        self.pointer = pointer
+        self.__pimpl = self.__seis_isegy_new()
+        if self.__pimpl == 0:
+            raise RuntimeError("No memory")
+        self.__pimpl = cast(self.__pimpl, POINTER(c_void_p))
+        code = self.__seis_isegy_open(self.__pimpl, file_name.encode())
+        self.__err = self.__seis_isegy_get_error(self.__pimpl)
+        if code != ERR_OK:
+            raise RuntimeError(self.__err.contents.message)
+        if backend == "mmap":
+            self.rewind()
+
+    def get_text_headers(self):
+        num = self.__seis_isegy_get_text_headers_num(self.__pimpl)
+        lst = []
+        for i in range(num):
+            lst.append(self.__seis_isegy_get_text_header(self.__pimpl, i))
+        return lst
+
+    def get_binary_header(self):
+        return self.__seis_isegy_get_binary_header(self.__pimpl).contents
+
+    def _samp_int(self):
+        bh = self.get_binary_header()
+        if bh.SEGY_rev_major_ver >= 2 and bh.ext_samp_int > 0:
+            return bh.ext_samp_int
+        return bh.samp_int
+
+    def _stats_sample_size(self):
+        return seiscodec.SAMPLE_SIZE.get(self.get_binary_header().format_code, 4)
+
+    def _c_remap(self, a):
+        self.__seis_isegy_remap_trace_header(
+            self.__pimpl,
+            a["hdr_name"].encode(),
+            a["hdr_num"],
+            a["offset"],
+            a["format"],
+        )
+        self.__check()
+
+    def _c_end_of_data(self):
+        return self.__seis_isegy_end_of_data(self.__pimpl)
+
+    def _c_read_trace(self):
+        ptr = self.__seis_isegy_read_trace(self.__pimpl)
+        self.__check()
+        return ptr
+
+    def _c_read_header(self):
+        ptr = self.__seis_isegy_read_trace_header(self.__pimpl)
+        self.__check()
+        return ptr
+
+    def _c_rewind(self):
+        self.__seis_isegy_rewind(self.__pimpl)
+
+    def _c_close(self):
+        self.__seis_isegy_unref(self.pointer(self.__pimpl))
+
+    def __check(self):
+        if self.__err.contents.code != ERR_OK:
+            raise RuntimeError(self.__err.contents.message)
+
+
+class _Output(Counted):
+    """Bulk and background writing shared by OSegy and OSU. With
+    write_behind traces and blocks are queued and written by a background
+    thread, keeping up to that number of them waiting. flush() waits for
+    the queue, close() also writes everything before closing the file.
+    enable_stats starts counting writes, see seisstats. Subclasses provide
+    _write_trace"""
+
+    _behind = None
+    _stats_methods = seisstats.WRITER
+
+    def write_trace(self, trc):
+        """Write trace. With write_behind it is only queued, so trc should
+        not be changed afterwards"""
+        if self._behind is None:
+            self._write_trace(trc)
+        else:
+            self._behind.put(self._write_trace, trc)
+
+    def write_block(self, samples, headers=None):
+        """Write rows of 2D samples array as traces. headers is table of
+        columns with the value for every row, like one from
+        read_header_table. Headers without column keep default values"""
+        if self._behind is None:
+            seistrace.write_block(self._write_trace, samples, headers)
+        else:
+            headers = {k: np.array(v) for k, v in (headers or {}).items()}
+            self._behind.put(
+                seistrace.write_block, self._write_trace, np.array(samples), headers
+            )
+
+    def flush(self):
+        if self._behind is not None:
+            self._behind.flush()
+
+    def _close_behind(self):
+        # Failed queue is kept, so its error is raised by later writes too
+        if self._behind is not None:
+            self._behind.close()
+            self._behind = None
+
+
+class OSegy(_Output):
+    __seis_osegy_new = Func("seissegy", "seis_osegy_new", restype=c_void_p)
+    __seis_osegy_unref = Func(
+        "seissegy", "seis_osegy_unref", [POINTER(POINTER(c_void_p))]
+    )
+    __seis_osegy_get_error = Func(
+        "seissegy", "seis_osegy_get_error", [c_void_p], POINTER(SegyError)
+    )
+    __seis_osegy_open = Func("seissegy", "seis_osegy_open", [c_void_p, c_char_p])
+    __seis_osegy_write_trace = Func(
+        "seissegy", "seis_osegy_write_trace", [c_void_p, c_void_p]
+    )
+    __seis_osegy_set_text_header = Func(
+        "seissegy", "seis_osegy_set_text_header", [c_void_p, c_char_p]
+    )
+    __seis_osegy_set_binary_header = Func(
+        "seissegy", "seis_osegy_set_binary_header", [c_void_p, POINTER(SegyBinHdr)]
+    )
+    __seis_osegy_add_ext_text_header = Func(
+        "seissegy", "seis_osegy_add_ext_text_header", [c_void_p, c_char]
+    )
+    __seis_osegy_add_trailer_stanza = Func(
+        "seissegy", "seis_osegy_add_trailer_stanza", [c_void_p, c_char_p]
+    )
+    __seis_osegy_remap_trace_header = Func(
+        "seissegy",
+        "seis_osegy_remap_trace_header",
+        [c_void_p, c_char_p, c_int, c_int, c_int],
+    )
+
+    def __init__(self, file_name, text_header=None, bin_header=None, write_behind=None):
         self.pointer = pointer
         self.__pimpl = cast(self.__seis_osegy_new(), POINTER(c_void_p))
         if self.__pimpl == 0:
             raise RuntimeError("No memory")
         if text_header:
             self.__seis_osegy_set_text_header(self.__pimpl, text_header)
+        self.__format_code = None
         if bin_header:
             self.__seis_osegy_set_binary_header(self.__pimpl, bin_header)
+            self.__format_code = bin_header.format_code
         code = self.__seis_osegy_open(self.__pimpl, file_name.encode())
         self.__err = self.__seis_osegy_get_error(self.__pimpl)
         if code != ERR_OK:
             raise RuntimeError(self.__err.contents.message)
+        if write_behind:
+            self._behind = WriteBehind(write_behind)
 
     def close(self):
-        if self.__pimpl != 0:
-            self.__seis_osegy_unref(self.pointer(self.__pimpl))
-            self.__pimpl = 0
+        try:
+            self._close_behind()
+        finally:
+            if self.__pimpl != 0:
+                self.__seis_osegy_unref(self.pointer(self.__pimpl))
+                self.__pimpl = 0
 
     def __enter__(self):
         return self
@@ -294,37 +895,40 @@ class OSegy:
             if self.__err.contents.code != ERR_OK:
                 raise RuntimeError(self.__err.contents.message)
 
-    def write_trace(self, trc):
+    def _write_trace(self, trc):
         self.__seis_osegy_write_trace(self.__pimpl, trc._Trace__pimpl)
         if self.__err.contents.code != ERR_OK:
             raise RuntimeError(self.__err.contents.message)
 
-
-class ISU:
-    __seis_isu_new = lib.seis_isu_new
-    __seis_isu_new.restype = c_void_p
-    __seis_isu_unref = lib.seis_isu_unref
-    __seis_isu_unref.argtypes = [POINTER(POINTER(c_void_p))]
-    __seis_isu_get_error = lib.seis_isu_get_error
-    __seis_isu_get_error.argtypes = [c_void_p]
-    __seis_isu_get_error.restype = POINTER(SegyError)
-    __seis_isu_open = lib.seis_isu_open
-    __seis_isu_open.argtypes = [c_void_p, c_char_p]
-    __seis_isu_read_trace = lib.seis_isu_read_trace
-    __seis_isu_read_trace.argtypes = [c_void_p]
-    __seis_isu_read_trace.restype = c_void_p
-    __seis_isu_read_trace_header = lib.seis_isu_read_trace_header
-    __seis_isu_read_trace_header.argtypes = [c_void_p]
-    __seis_isu_read_trace_header.restype = c_void_p
-    __seis_isu_end_of_data = lib.seis_isu_end_of_data
-    __seis_isu_end_of_data.argtypes = [c_void_p]
-    __seis_isu_end_of_data.restype = c_bool
-    __seis_isu_rewind = lib.seis_isu_rewind
-    __seis_isu_rewind.argtypes = [c_void_p]
-    __seis_isu_remap_trace_header = lib.seis_isu_remap_trace_header
-    __seis_isu_remap_trace_header.argtypes = [c_void_p, c_char_p, c_int, c_int]
-
-    def __init__(self, file_name):
+    def _stats_sample_size(self):
+        return seiscodec.SAMPLE_SIZE.get(self.__format_code, 4)
+
+
+class ISU(_Input):
+    _kind = "su"
+
+    __seis_isu_new = Func("seissegy", "seis_isu_new", restype=c_void_p)
+    __seis_isu_unref = Func("seissegy", "seis_isu_unref", [POINTER(POINTER(c_void_p))])
+    __seis_isu_get_error = Func(
+        "seissegy", "seis_isu_get_error", [c_void_p], POINTER(SegyError)
+    )
+    __seis_isu_open = Func("seissegy", "seis_isu_open", [c_void_p, c_char_p])
+    __seis_isu_read_trace = Func(
+        "seissegy", "seis_isu_read_trace", [c_void_p], c_void_p
+    )
+    __seis_isu_read_trace_header = Func(
+        "seissegy", "seis_isu_read_trace_header", [c_void_p], c_void_p
+    )
+    __seis_isu_end_of_data = Func(
+        "seissegy", "seis_isu_end_of_data", [c_void_p], c_bool
+    )
+    __seis_isu_rewind = Func("seissegy", "seis_isu_rewind", [c_void_p])
+    __seis_isu_remap_trace_header = Func(
+        "seissegy", "seis_isu_remap_trace_header", [c_void_p, c_char_p, c_int, c_int]
+    )
+
+    def __init__(self, file_name, backend="c"):
+        self._init_input(file_name, backend)
         self.pointer = pointer
         self.__pimpl = cast(self.__seis_isu_new(), POINTER(c_void_p))
         if self.__pimpl == 0:
@@ -333,94 +937,59 @@ class ISU:
         self.__err = self.__seis_isu_get_error(self.__pimpl)
         if code != ERR_OK:
             raise RuntimeError(self.__err.contents.message)
+        if backend == "mmap":
+            self.rewind()
+
+    def _c_remap(self, a):
+        self.__seis_isu_remap_trace_header(
+            self.__pimpl,
+            a["hdr_name"].encode(),
+            a["offset"],
+            a["format"],
+        )
+        self.__check()
+
+    def _c_end_of_data(self):
+        return self.__seis_isu_end_of_data(self.__pimpl)
 
-    def remap_trace_header(self, *args):
-        for a in args:
-            self.__seis_isu_remap_trace_header(
-                self.__pimpl,
-                a["hdr_name"].encode(),
-                a["offset"],
-                a["format"],
-            )
-            if self.__err.contents.code != ERR_OK:
-                raise RuntimeError(self.__err.contents.message)
-
-    def read_trace(self):
-        if self.__seis_isu_end_of_data(self.__pimpl):
-            raise StopIteration
+    def _c_read_trace(self):
         ptr = self.__seis_isu_read_trace(self.__pimpl)
-        if self.__err.contents.code != ERR_OK:
-            raise RuntimeError(self.__err.contents.message)
-        return Trace(ptr=ptr)
+        self.__check()
+        return ptr
 
-    def read_header(self):
-        if self.__seis_isu_end_of_data(self.__pimpl):
-            raise StopIteration
+    def _c_read_header(self):
         ptr = self.__seis_isu_read_trace_header(self.__pimpl)
-        if self.__err.contents.code != ERR_OK:
-            raise RuntimeError(self.__err.contents.message)
-        return TraceHeader(ptr=ptr)
-
-    def end_of_data(self):
-        return self.__seis_isu_end_of_data(self.__pimpl)
-
-    def traces(self):
-        return self.TraceIter(self)
+        self.__check()
+        return ptr
 
-    def headers(self):
-        return self.HeaderIter(self)
+    def _c_rewind(self):
+        self.__seis_isu_rewind(self.__pimpl)
 
-    def close(self):
+    def _c_close(self):
         self.__seis_isu_unref(self.pointer(self.__pimpl))
 
-    def __enter__(self):
-        return self
-
-    def __exit__(self, *exec_info):
-        self.close()
-
-    def __del__(self):
-        self.close()
-
-    class TraceIter:
-        def __init__(self, isu):
-            self.__isu = isu
-
-        def __iter__(self):
-            self.__isu._ISU__seis_isu_rewind(self.__isu._ISU__pimpl)
-            return self
-
-        def __next__(self):
-            return self.__isu.read_trace()
+    def __check(self):
+        if self.__err.contents.code != ERR_OK:
+            raise RuntimeError(self.__err.contents.message)
 
-    class HeaderIter:
-        def __init__(self, isu):
-            self.__isu = isu
 
-        def __iter__(self):
-            self.__isu._ISU__seis_isu_rewind(self.__isu._ISU__pimpl)
-            return self
-
-        def __next__(self):
-            return self.__isu.read_header()
-
-
-class OSU:
-    __seis_osu_new = lib.seis_osu_new
-    __seis_osu_new.restype = c_void_p
-    __seis_osu_unref = lib.seis_osu_unref
-    __seis_osu_unref.argtypes = [POINTER(POINTER(c_void_p))]
-    __seis_osu_get_error = lib.seis_osu_get_error
-    __seis_osu_get_error.argtypes = [c_void_p]
-    __seis_osu_get_error.restype = POINTER(SegyError)
-    __seis_osu_open = lib.seis_osu_open
-    __seis_osu_open.argtypes = [c_void_p, c_char_p]
-    __seis_osu_write_trace = lib.seis_osu_write_trace
-    __seis_osu_write_trace.argtypes = [c_void_p, c_void_p]
-    __seis_osu_remap_trace_header = lib.seis_osu_remap_trace_header
-    __seis_osu_remap_trace_header.argtypes = [c_void_p, c_char_p, c_int, c_int, c_int]
-
-    def __init__(self, file_name):
+class OSU(_Output):
+    __seis_osu_new = Func("seissegy", "seis_osu_new", restype=c_void_p)
+    __seis_osu_unref = Func("seissegy", "seis_osu_unref", [POINTER(POINTER(c_void_p))])
+    __seis_osu_get_error = Func(
+        "seissegy", "seis_osu_get_error", [c_void_p], POINTER(SegyError)
+    )
+    __seis_osu_open = Func("seissegy", "seis_osu_open", [c_void_p, c_char_p])
+    __seis_osu_write_trace = Func(
+        "seissegy", "seis_osu_write_trace", [c_void_p, c_void_p]
+    )
+    __seis_osu_remap_trace_header = Func(
+        "seissegy",
+        "seis_osu_remap_trace_header",
+        [c_void_p, c_char_p, c_int, c_int],
+    )
+
+    def __init__(self, file_name, write_behind=None):
         self.pointer = pointer
         self.__pimpl = cast(self.__seis_osu_new(), POINTER(c_void_p))
         if self.__pimpl == 0:
@@ -429,6 +998,8 @@ class OSU:
         self.__err = self.__seis_osu_get_error(self.__pimpl)
         if code != ERR_OK:
             raise RuntimeError(self.__err.contents.message)
+        if write_behind:
+            self._behind = WriteBehind(write_behind)
 
     def remap_trace_header(self, *args):
         for a in args:
@@ -441,13 +1012,16 @@ class OSU:
             if self.__err.contents.code != ERR_OK:
                 raise RuntimeError(self.__err.contents.message)
 
-    def write_trace(self, trc):
+    def _write_trace(self, trc):
         self.__seis_osu_write_trace(self.__pimpl, trc._Trace__pimpl)
         if self.__err.contents.code != ERR_OK:
             raise RuntimeError(self.__err.contents.message)
 
     def close(self):
-        self.__seis_osu_unref(self.pointer(self.__pimpl))
+        try:
+            self._close_behind()
+        finally:
+            self.__seis_osu_unref(self.pointer(self.__pimpl))
 
     def __enter__(self):
         return self
@@ -459,8 +1033,7 @@ class OSU:
         self.close()
 
 
-__ascii_to_ebcdic = lib.ascii_to_ebcdic
-__ascii_to_ebcdic.argtypes = [c_char_p]
+__ascii_to_ebcdic = Func("seissegy", "ascii_to_ebcdic", [c_char_p])
 
 
 def ascii_to_ebcdic(string):
@@ -469,8 +1042,7 @@ def ascii_to_ebcdic(string):
     return mutable.value
 
 
-__ebcdic_to_ascii = lib.ebcdic_to_ascii
-__ebcdic_to_ascii.argtypes = [c_char_p]
+__ebcdic_to_ascii = Func("seissegy", "ebcdic_to_ascii", [c_char_p])
 
 
 def ebcdic_to_ascii(string):
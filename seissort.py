@@ -0,0 +1,128 @@
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from seissegy import ISU, OSU, ISegy, OSegy
+
+# Memory taken by Trace object besides its samples, mostly C header
+TRACE_OVERHEAD = 1024
+# Run files written at once, keeps file descriptors under common limits
+MAX_OPEN_RUNS = 256
+
+
+def sort(
+    reader, writer, keys, memory=256 << 20, method=None, tmp_dir=None, progress=None
+):
+    """Write traces of ISegy or ISU reader to OSegy or OSU writer ordered
+    by header keys, e.g. ["CDP", "OFFSET"]. Traces with equal keys keep
+    file order. Returns number of written traces.
+
+    Order is found by one pass over key headers (reader.gather_index, so
+    it is saved for later runs). Then traces are moved in chunks which
+    fit into memory bytes:
+
+    "permute" reads traces of every chunk of output by their numbers in
+    file order, which needs one pass over the file per chunk, or random
+    reads when the file is indexed.
+
+    "runs" reads the file once in order and writes every trace to run
+    file of its output chunk in tmp_dir. Then runs are read one by one
+    and written out in order. Both passes are sequential. Files needing
+    more than MAX_OPEN_RUNS runs are distributed in several passes.
+
+    Default method is "permute" if all traces fit into memory and "runs"
+    otherwise. progress(phase, done, total) is called after every chunk
+    with phase "scan", "runs" or "write"."""
+    keys = [k.upper() for k in keys]
+    report = progress or (lambda phase, done, total: None)
+    report("scan", 0, 1)
+    order = reader.gather_index(*keys).order
+    report("scan", 1, 1)
+    chunk = max(memory // _trace_bytes(reader), 1)
+    if method is None:
+        method = "permute" if order.size <= chunk else "runs"
+    if method == "permute":
+        _permute(reader, writer, order, chunk, report)
+    elif method == "runs":
+        _runs(reader, writer, order, chunk, tmp_dir, report)
+    else:
+        raise ValueError("Unknown method")
+    return order.size
+
+
+def _permute(reader, writer, order, chunk, report):
+    for lo in range(0, order.size, chunk):
+        members = np.sort(order[lo : lo + chunk])
+        traces = list(reader.traces_at(members))
+        for j in np.searchsorted(members, order[lo : lo + chunk]):
+            writer.write_trace(traces[j])
+        report("write", min(lo + chunk, order.size), order.size)
+
+
+def _runs(reader, writer, order, chunk, tmp_dir, report):
+    num = order.size
+    rank = np.empty(num, dtype=np.int64)
+    rank[order] = np.arange(num)
+    nruns = -(-num // chunk)
+    tmp = tempfile.mkdtemp(prefix="seissort", dir=tmp_dir)
+    try:
+        names = [os.path.join(tmp, "run{}".format(b)) for b in range(nruns)]
+        done = 0
+        # Every pass fills up to MAX_OPEN_RUNS runs, one pass is enough
+        # unless the file is many times larger than memory
+        for first in range(0, nruns, MAX_OPEN_RUNS):
+            group = names[first : first + MAX_OPEN_RUNS]
+            if len(group) == nruns:
+                traces, run_of = reader.traces(), (rank // chunk).tolist()
+            else:
+                members = np.sort(order[first * chunk : (first + len(group)) * chunk])
+                traces = reader.traces_at(members)
+                run_of = (rank[members] // chunk - first).tolist()
+            runs = [_run_writer(reader, name) for name in group]
+            try:
+                for j, trc in enumerate(traces):
+                    runs[run_of[j]].write_trace(trc)
+                    done += 1
+                    if done % chunk == 0 or done == num:
+                        report("runs", done, num)
+            finally:
+                for r in runs:
+                    r.close()
+        for b, name in enumerate(names):
+            lo = b * chunk
+            # Run holds traces of output chunk b in file order
+            members = np.sort(order[lo : lo + chunk])
+            with _run_reader(reader, name) as run:
+                traces = list(run.traces())
+            for j in np.searchsorted(members, order[lo : lo + chunk]):
+                writer.write_trace(traces[j])
+            os.remove(name)
+            report("write", min(lo + chunk, num), num)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def _run_writer(reader, name):
+    if isinstance(reader, ISU):
+        w = OSU(name)
+    else:
+        w = OSegy(name, bin_header=reader.get_binary_header())
+    w.remap_trace_header(*reader._remaps)
+    return w
+
+
+def _run_reader(reader, name):
+    r = ISU(name) if isinstance(reader, ISU) else ISegy(name)
+    r.remap_trace_header(*reader._remaps)
+    return r
+
+
+def _trace_bytes(reader):
+    try:
+        num = reader.trace_file().samp_num
+    except ValueError:
+        reader.rewind()
+        num = reader.read_trace().samples_num()
+    return num * 8 + TRACE_OVERHEAD
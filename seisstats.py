@@ -0,0 +1,227 @@
+import time
+
+import numpy as np
+
+from seisheader import HEADER_SIZE
+
+_clock = time.perf_counter
+
+
+class Stats:
+    """Counters of one reader or writer. time is spent in its counted
+    methods, c_time is the part of it spent in libseissegy calls and
+    io_time in reads of the Python backend, the rest is Python time.
+    Memory mapped reads are counted as Python time. bytes are trace
+    headers and samples in file format"""
+
+    def __init__(self, sample_size=4, callback=None, every=1000):
+        self.sample_size = sample_size
+        self.callback = callback
+        self.every = every
+        self.traces = 0
+        self.headers = 0
+        self.samples = 0
+        self.rewinds = 0
+        self.seeks = 0
+        self.time = 0.0
+        self.c_time = 0.0
+        self.io_time = 0.0
+        self.names = []
+        self.files = []
+        self.__depth = 0
+        self.__next = every
+
+    def snapshot(self):
+        return {
+            "traces": self.traces,
+            "headers": self.headers,
+            "samples": self.samples,
+            "bytes": (self.traces + self.headers) * HEADER_SIZE
+            + self.samples * self.sample_size,
+            "rewinds": self.rewinds,
+            "seeks": self.seeks,
+            "time": self.time,
+            "c_time": self.c_time,
+            "io_time": self.io_time,
+            "python_time": max(self.time - self.c_time - self.io_time, 0.0),
+        }
+
+    def report(self):
+        if self.callback is not None:
+            self.callback(self.snapshot())
+
+    def method(self, func, count):
+        """Wrap bound method, count is called with stats, result and
+        arguments after every successful call"""
+
+        def call(*args, **kwargs):
+            self.__depth += 1
+            start = _clock()
+            try:
+                res = func(*args, **kwargs)
+            finally:
+                self.__depth -= 1
+                # Nested counted calls, e.g. rewind by seek, are timed once
+                if not self.__depth:
+                    self.time += _clock() - start
+            if count is not None:
+                count(self, res, args)
+                if self.every and self.traces + self.headers >= self.__next:
+                    self.__next = self.traces + self.headers + self.every
+                    self.report()
+            return res
+
+        return call
+
+    def c_call(self, func):
+        def call(*args):
+            start = _clock()
+            try:
+                return func(*args)
+            finally:
+                self.c_time += _clock() - start
+
+        return call
+
+    def io_call(self, func):
+        def call(*args):
+            start = _clock()
+            try:
+                return func(*args)
+            finally:
+                self.io_time += _clock() - start
+
+        return call
+
+    def trace_file(self, trace_file):
+        """Count time of reads by TraceFile until detach"""
+        trace_file._TraceFile__read_into = self.io_call(
+            trace_file._TraceFile__read_into
+        )
+        self.files.append(trace_file)
+
+    def detach(self):
+        """Stop counting reads of TraceFile objects"""
+        for f in self.files:
+            f.__dict__.pop("_TraceFile__read_into", None)
+        self.files = []
+
+
+def _trace(st, res, args):
+    st.traces += 1
+    st.samples += res.samples_num()
+
+
+def _into(st, res, args):
+    st.traces += 1
+    st.samples += res
+
+
+def _samples(st, res, args):
+    st.traces += 1
+    st.samples += res.size
+
+
+def _header(st, res, args):
+    st.headers += 1
+
+
+def _block(st, res, args):
+    block = res[0] if isinstance(res, tuple) else res
+    # Written blocks may be nested sequences
+    st.traces += len(block)
+    st.samples += np.size(block)
+
+
+def _table(st, res, args):
+    st.headers += len(next(iter(res.values()), ()))
+
+
+def _rewind(st, res, args):
+    st.rewinds += 1
+
+
+def _seek(st, res, args):
+    st.seeks += 1
+
+
+def _written(st, res, args):
+    _trace(st, args[0], args)
+
+
+def _written_block(st, res, args):
+    _block(st, args[0], args)
+
+
+READER = {
+    "read_trace": _trace,
+    "read_trace_into": _into,
+    "_read_reuse": _trace,
+    "read_samples": _samples,
+    "_block_at": _block,
+    "_samples_at": _samples,
+    "read_header": _header,
+    "read_block": _block,
+    "read_header_table": _table,
+    "_trace_at": _trace,
+    "rewind": _rewind,
+    "seek": _seek,
+    "end_of_data": None,
+}
+
+WRITER = {"write_trace": _written, "write_block": _written_block, "flush": None}
+
+
+class Counted:
+    """Opt-in counters of readers and writers. Methods listed in
+    _stats_methods and libseissegy functions are wrapped on the instance
+    only while counting is enabled, so objects without stats run plain
+    class code. Subclasses may override _stats_sample_size and
+    _stats_attach"""
+
+    _stats = None
+    _stats_methods = {}
+
+    def enable_stats(self, callback=None, every=1000):
+        """Start counting from zero. callback(snapshot) is called after
+        every that number of traces and headers and by disable_stats"""
+        self.disable_stats()
+        st = Stats(self._stats_sample_size(), callback, every)
+        for name, count in self._stats_methods.items():
+            setattr(self, name, st.method(getattr(self, name), count))
+            st.names.append(name)
+        for name in _c_functions(type(self)):
+            setattr(self, name, st.c_call(getattr(self, name)))
+            st.names.append(name)
+        self._stats = st
+        self._stats_attach(st)
+
+    def disable_stats(self):
+        """Stop counting, the last snapshot is given to callback"""
+        st = self._stats
+        if st is None:
+            return
+        for name in st.names:
+            self.__dict__.pop(name, None)
+        st.detach()
+        self._stats = None
+        st.report()
+
+    def stats(self):
+        """Snapshot dict of counters, None if they are not enabled"""
+        return None if self._stats is None else self._stats.snapshot()
+
+    def _stats_sample_size(self):
+        return 4
+
+    def _stats_attach(self, st):
+        """Called when counting starts, e.g. to count objects used by
+        this one with st.trace_file"""
+
+
+def _c_functions(cls):
+    names = []
+    for c in cls.__mro__:
+        prefix = "_{}__seis_".format(c.__name__)
+        names += [n for n in vars(c) if n.startswith(prefix)]
+    return names
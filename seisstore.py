@@ -0,0 +1,279 @@
+import json
+import lzma
+import os
+import zlib
+
+import numpy as np
+
+import seisheader
+from seistrace import sample_range, window_table
+
+VERSION = 1
+CODECS = (None, "zlib", "lzma")
+
+
+def export(
+    reader,
+    path,
+    chunks=(1024, 256),
+    codec="zlib",
+    level=6,
+    dtype=np.float32,
+    quantize=None,
+    shuffle=True,
+    keys=None,
+):
+    """Copy traces of ISegy or ISU reader of equal length to store in
+    directory path and return Store of it. Header columns of keys (all
+    headers of the file kind by default) are kept in their file types one
+    file per key. Samples are cut into chunks of (traces, samples) shape
+    and every chunk is compressed by codec, None, "zlib" or "lzma" with
+    compression level. dtype is type of stored samples, float32 keeps 4
+    byte formats exactly. With quantize = 8 or 16 they are stored as
+    integers of that size scaled by the largest absolute value of every
+    chunk, which is lossy. shuffle groups bytes of samples by their
+    position in sample before compression, which usually makes floating
+    point chunks smaller"""
+    if codec not in CODECS:
+        raise ValueError("Unknown codec")
+    if quantize not in (None, 8, 16):
+        raise ValueError("Samples could be quantized to 8 or 16 bits")
+    flds = seisheader.fields(reader._kind, reader._remaps)
+    keys = [k.upper() for k in (flds if keys is None else keys)]
+    types = {k: flds[k][1] for k in keys}
+    stored = np.dtype("i{}".format(quantize // 8)) if quantize else np.dtype(dtype)
+    os.makedirs(os.path.join(path, "headers"), exist_ok=True)
+    ct, cs = chunks
+    offsets, sizes, scales = [], [], []
+    cols = {k: open(_column_name(path, k), "wb") for k in keys}
+    try:
+        with open(os.path.join(path, "samples.bin"), "wb") as data:
+            num = samp_num = 0
+            reader.rewind()
+            for block, table in reader.blocks(ct, dtype=dtype, keys=keys):
+                if num and block.shape[1] != samp_num:
+                    raise ValueError("Traces have different length")
+                samp_num = block.shape[1]
+                for k in keys:
+                    cols[k].write(table[k].astype(types[k]).tobytes())
+                row = []
+                for lo in range(0, max(samp_num, 1), cs):
+                    part = block[:, lo : lo + cs]
+                    scale = 1.0
+                    if quantize:
+                        part, scale = _quantize(part, stored)
+                    raw = _pack(
+                        np.ascontiguousarray(part, stored), codec, level, shuffle
+                    )
+                    row.append((data.tell(), len(raw), scale))
+                    data.write(raw)
+                offsets.append([r[0] for r in row])
+                sizes.append([r[1] for r in row])
+                scales.append([r[2] for r in row])
+                num += block.shape[0]
+    finally:
+        for f in cols.values():
+            f.close()
+    np.savez(
+        os.path.join(path, "index.npz"),
+        offsets=_grid(offsets, np.int64),
+        sizes=_grid(sizes, np.int64),
+        scales=_grid(scales, np.float64),
+    )
+    samp_int = reader.trace_file().samp_int if reader._indexed() else None
+    if samp_int is None and num:
+        reader.rewind()
+        samp_int = float(reader.read_header().get("SAMP_INT"))
+    meta = {
+        "version": VERSION,
+        "source": reader.file_name,
+        "kind": reader._kind,
+        "traces": num,
+        "samp_num": samp_num,
+        "samp_int": samp_int or 0.0,
+        "chunks": [ct, cs],
+        "codec": codec,
+        "dtype": np.dtype(dtype).str,
+        "stored": stored.str,
+        "quantize": quantize,
+        "shuffle": shuffle,
+        "headers": types,
+    }
+    with open(os.path.join(path, "meta.json"), "w") as f:
+        json.dump(meta, f, indent=1)
+    return Store(path)
+
+
+def restore(store, writer):
+    """Write all traces of Store to OSegy or OSU writer with all stored
+    headers"""
+    ct = store.chunks[0]
+    for lo in range(0, len(store), ct):
+        samples, table = store.read_block(slice(lo, lo + ct), keys=store.keys)
+        writer.write_block(samples, table)
+
+
+class Store:
+    """Reader of directory written by export. Header columns are memory
+    mapped, so header queries touch only their columns, and block reads
+    load and decompress only chunks which hold requested traces and
+    samples. Decoded chunks are not kept"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+        if meta["version"] > VERSION:
+            raise ValueError("Store is written by newer version")
+        self.meta = meta
+        self.kind = meta["kind"]
+        self.samp_num = meta["samp_num"]
+        self.samp_int = meta["samp_int"]
+        self.chunks = tuple(meta["chunks"])
+        self.dtype = np.dtype(meta["dtype"])
+        self.fields = meta["headers"]
+        self.keys = list(self.fields)
+        self.__stored = np.dtype(meta["stored"])
+        self.__num = meta["traces"]
+        with np.load(os.path.join(path, "index.npz")) as z:
+            self.__offsets = z["offsets"]
+            self.__sizes = z["sizes"]
+            self.__scales = z["scales"]
+        self.__columns = {}
+        self.__fd = None
+        self.__fd = os.open(os.path.join(path, "samples.bin"), os.O_RDONLY)
+
+    def __len__(self):
+        return self.__num
+
+    def close(self):
+        self.__columns = {}
+        if self.__fd is not None:
+            os.close(self.__fd)
+            self.__fd = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exec_info):
+        self.close()
+
+    def __del__(self):
+        self.close()
+
+    def column(self, key):
+        """Memory mapped column of header key in its file type"""
+        key = key.upper()
+        col = self.__columns.get(key)
+        if col is None:
+            if key not in self.fields:
+                raise ValueError("No such header")
+            tp = np.dtype(self.fields[key])
+            if self.__num:
+                col = np.memmap(_column_name(self.path, key), tp, mode="r")
+            else:
+                col = np.empty(0, tp)
+            self.__columns[key] = col
+        return col
+
+    def header_table(self, keys, indices=slice(None)):
+        """Dict of int64/float64 columns of keys for traces with given
+        numbers (array of them or slice)"""
+        return {
+            k.upper(): np.array(
+                self.column(k)[indices], seisheader.value_dtype(self.fields[k.upper()])
+            )
+            for k in keys
+        }
+
+    def select(self, where, keys=None):
+        """Numbers of traces with headers matching where, see
+        ISegy.select"""
+        return seisheader.select(self.header_table, where, keys)
+
+    def read_chunk(self, row, col):
+        """Decoded chunk number col of samples of chunk number row of
+        traces"""
+        size = int(self.__sizes[row, col])
+        raw = os.pread(self.__fd, size, int(self.__offsets[row, col]))
+        if len(raw) != size:
+            raise RuntimeError("Unexpected end of file")
+        ct, cs = self.chunks
+        shape = (
+            min(ct, self.__num - row * ct),
+            min(cs, self.samp_num - col * cs),
+        )
+        meta = self.meta
+        block = _unpack(raw, meta["codec"], self.__stored, shape, meta["shuffle"])
+        if meta["quantize"]:
+            return block * self.__scales[row, col]
+        return block
+
+    def read_block(self, indices, out=None, dtype=np.float64, keys=None, window=None):
+        """Read samples of traces with given numbers (array of them or
+        slice) into rows of out, like TraceFile.read_block. With window
+        only its samples are read, see seistrace.sample_range. Only chunks
+        holding them are loaded"""
+        if isinstance(indices, slice):
+            indices = np.arange(*indices.indices(self.__num))
+        indices = np.atleast_1d(indices)
+        first, stop = 0, self.samp_num
+        if window is not None:
+            first, stop = sample_range(window, self.samp_num, self.samp_int)
+        if out is None:
+            out = np.empty((indices.size, stop - first), dtype=dtype)
+        elif out.shape[1] != stop - first:
+            raise ValueError("Trace length differs from block width")
+        ct, cs = self.chunks
+        rows = indices // ct
+        for row in np.unique(rows):
+            sel = np.flatnonzero(rows == row)
+            local = indices[sel] - row * ct
+            for col in range(first // cs, -(-stop // cs)):
+                lo = col * cs
+                a, b = max(first, lo), min(stop, lo + cs)
+                chunk = self.read_chunk(row, col)
+                out[sel, a - first : b - first] = chunk[local, a - lo : b - lo]
+        if keys is None:
+            return out
+        table = self.header_table(keys, indices)
+        if window is not None:
+            window_table(table, first, stop - first, self.samp_int)
+        return out, table
+
+
+def _column_name(path, key):
+    return os.path.join(path, "headers", key + ".bin")
+
+
+def _grid(rows, dtype):
+    return np.array(rows, dtype=dtype).reshape(len(rows), len(rows[0]) if rows else 0)
+
+
+def _quantize(part, stored):
+    peak = float(np.abs(part).max()) if part.size else 0.0
+    scale = peak / np.iinfo(stored).max if peak else 1.0
+    return np.rint(part / scale), scale
+
+
+def _pack(block, codec, level, shuffle):
+    raw = block.tobytes()
+    size = block.dtype.itemsize
+    if shuffle and size > 1:
+        raw = np.frombuffer(raw, np.uint8).reshape(-1, size).T.tobytes()
+    if codec == "zlib":
+        return zlib.compress(raw, level)
+    if codec == "lzma":
+        return lzma.compress(raw, preset=level)
+    return raw
+
+
+def _unpack(raw, codec, dtype, shape, shuffle):
+    if codec == "zlib":
+        raw = zlib.decompress(raw)
+    elif codec == "lzma":
+        raw = lzma.decompress(raw)
+    size = dtype.itemsize
+    if shuffle and size > 1:
+        raw = np.frombuffer(raw, np.uint8).reshape(size, -1).T.tobytes()
+    return np.frombuffer(raw, dtype).reshape(shape)
@@ -1,7 +1,4 @@
-import os
-import subprocess
 from ctypes import (
-    CDLL,
     POINTER,
     c_bool,
     c_char_p,
@@ -12,44 +9,57 @@ from ctypes import (
     pointer,
 )
 
+import numpy as np
 from numpy.ctypeslib import as_array
 
-res = subprocess.run(["pkg-config", "--libs", "seistrace"], capture_output=True)
-lib_path = os.path.join(res.stdout.decode().split()[0][2:], "libseistrace.so")
-lib = CDLL(lib_path)
+import seislib
+from seislib import Func
+
+
+def __getattr__(name):
+    # Library is loaded on first use, see seislib
+    if name == "lib":
+        return seislib.load("seistrace")
+    raise AttributeError(name)
 
 
 class TraceHeader:
-    __seis_trace_header_new = lib.seis_trace_header_new
-    __seis_trace_header_new.restype = c_void_p
-    __seis_trace_header_ref = lib.seis_trace_header_ref
-    __seis_trace_header_ref.argtypes = [POINTER(POINTER(c_void_p))]
-    __seis_trace_header_ref.restype = c_void_p
-    __seis_trace_header_unref = lib.seis_trace_header_unref
-    __seis_trace_header_unref.argtypes = [POINTER(POINTER(c_void_p))]
-    __seis_trace_header_set_int = lib.seis_trace_header_set_int
-    __seis_trace_header_set_int.argtypes = [c_void_p, c_char_p, c_longlong]
-    __seis_trace_header_set_real = lib.seis_trace_header_set_real
-    __seis_trace_header_set_real.argtypes = [c_void_p, c_char_p, c_double]
-    __seis_trace_header_get = lib.seis_trace_header_get
-    __seis_trace_header_get.argtypes = [c_void_p, c_char_p]
-    __seis_trace_header_get.restype = POINTER(c_void_p)
-    __seis_trace_header_value_is_int = lib.seis_trace_header_value_is_int
-    __seis_trace_header_value_is_int.argtypes = [c_void_p]
-    __seis_trace_header_value_is_int.restype = c_bool
-    __seis_trace_header_value_is_real = lib.seis_trace_header_value_is_real
-    __seis_trace_header_value_is_real.argtypes = [c_void_p]
-    __seis_trace_header_value_is_real.restype = c_bool
-    __seis_trace_header_value_get_int = lib.seis_trace_header_value_get_int
-    __seis_trace_header_value_get_int.argtypes = [c_void_p]
-    __seis_trace_header_value_get_int.restype = POINTER(c_longlong)
-    __seis_trace_header_value_get_real = lib.seis_trace_header_value_get_real
-    __seis_trace_header_value_get_real.argtypes = [c_void_p]
-    __seis_trace_header_value_get_real.restype = POINTER(c_double)
-    __seis_trace_header_exists = lib.seis_trace_header_exists
-    __seis_trace_header_exists.argtypes = [c_void_p, c_char_p]
-    __seis_trace_header_exists.restype = c_bool
+    __seis_trace_header_new = Func(
+        "seistrace", "seis_trace_header_new", restype=c_void_p
+    )
+    __seis_trace_header_ref = Func(
+        "seistrace", "seis_trace_header_ref", [POINTER(POINTER(c_void_p))], c_void_p
+    )
+    __seis_trace_header_unref = Func(
+        "seistrace", "seis_trace_header_unref", [POINTER(POINTER(c_void_p))]
+    )
+    __seis_trace_header_set_int = Func(
+        "seistrace", "seis_trace_header_set_int", [c_void_p, c_char_p, c_longlong]
+    )
+    __seis_trace_header_set_real = Func(
+        "seistrace", "seis_trace_header_set_real", [c_void_p, c_char_p, c_double]
+    )
+    __seis_trace_header_get = Func(
+        "seistrace", "seis_trace_header_get", [c_void_p, c_char_p], POINTER(c_void_p)
+    )
+    __seis_trace_header_value_is_int = Func(
+        "seistrace", "seis_trace_header_value_is_int", [c_void_p], c_bool
+    )
+    __seis_trace_header_value_is_real = Func(
+        "seistrace", "seis_trace_header_value_is_real", [c_void_p], c_bool
+    )
+    __seis_trace_header_value_get_int = Func(
+        "seistrace", "seis_trace_header_value_get_int", [c_void_p], POINTER(c_longlong)
+    )
+    __seis_trace_header_value_get_real = Func(
+        "seistrace", "seis_trace_header_value_get_real", [c_void_p], POINTER(c_double)
+    )
+    __seis_trace_header_exists = Func(
+        "seistrace", "seis_trace_header_exists", [c_void_p, c_char_p], c_bool
+    )
     ptr_own = True
+    # Trace reference of headers taken from Trace.header
+    _owner = None
 
     def __init__(self, ptr=None) -> None:
         self.pointer = pointer
@@ -69,6 +79,16 @@ class TraceHeader:
         if self.ptr_own:
             self.__seis_trace_header_unref(self.pointer(self.__pimpl))
 
+    def rebind(self, ptr):
+        """Refer to C header ptr instead of the current header. ptr gets a
+        reference of its own, so it stays valid after its trace is freed"""
+        ptr = self.__seis_trace_header_ref(self.pointer(cast(ptr, POINTER(c_void_p))))
+        if self.ptr_own:
+            self.__seis_trace_header_unref(self.pointer(self.__pimpl))
+        self.ptr_own = True
+        self._owner = None
+        self.__pimpl = cast(ptr, POINTER(c_void_p))
+
     def set(self, hdr_name, val):
         """Cast val whether to inti or to float to write header
         in appropriate format"""
@@ -90,6 +110,83 @@ class TraceHeader:
         return res[0]
 
 
+class HeaderColumns:
+    """Collects values of chosen headers straight from C header pointers
+    into NumPy columns, without creating TraceHeader for every trace.
+    Column dtype is int64 or float64 as reported by the first header"""
+
+    def __init__(self, keys, capacity=1024):
+        self.__get = TraceHeader._TraceHeader__seis_trace_header_get
+        self.__is_int = TraceHeader._TraceHeader__seis_trace_header_value_is_int
+        self.__get_int = TraceHeader._TraceHeader__seis_trace_header_value_get_int
+        self.__get_real = TraceHeader._TraceHeader__seis_trace_header_value_get_real
+        self.keys = list(keys)
+        self.__names = [k.encode() for k in self.keys]
+        self.__getters = None
+        self.__cols = None
+        self.__capacity = max(capacity, 1)
+        self.__size = 0
+
+    def __len__(self):
+        return self.__size
+
+    def append(self, ptr):
+        if self.__getters is None:
+            self.__init_columns(ptr)
+        if self.__size == self.__capacity:
+            self.__capacity *= 2
+            for c in self.__cols:
+                c.resize(self.__capacity, refcheck=False)
+        for name, getter, col in zip(self.__names, self.__getters, self.__cols):
+            v = self.__get(ptr, name)
+            if not v:
+                raise ValueError("No such header")
+            col[self.__size] = getter(v)[0]
+        self.__size += 1
+
+    def columns(self):
+        if self.__cols is None:
+            return {k: np.empty(0, dtype=np.int64) for k in self.keys}
+        return {k: c[: self.__size].copy() for k, c in zip(self.keys, self.__cols)}
+
+    def __init_columns(self, ptr):
+        self.__getters, self.__cols = [], []
+        for name in self.__names:
+            v = self.__get(ptr, name)
+            if not v:
+                raise ValueError("No such header")
+            if self.__is_int(v):
+                self.__getters.append(self.__get_int)
+                self.__cols.append(np.empty(self.__capacity, dtype=np.int64))
+            else:
+                self.__getters.append(self.__get_real)
+                self.__cols.append(np.empty(self.__capacity, dtype=np.float64))
+
+
+class HeaderSetter:
+    """Sets headers of TraceHeader objects from sequences of values in
+    order of keys, with names encoded and C setters chosen once, on the
+    first fill. Values of keys with true real flag are set as floating
+    point"""
+
+    def __init__(self, keys, real):
+        self.keys = list(keys)
+        self.__real = list(real)
+        self.__setters = None
+
+    def fill(self, hdr, values):
+        if self.__setters is None:
+            set_int = TraceHeader._TraceHeader__seis_trace_header_set_int
+            set_real = TraceHeader._TraceHeader__seis_trace_header_set_real
+            self.__setters = [
+                (k.encode(), set_real if r else set_int)
+                for k, r in zip(self.keys, self.__real)
+            ]
+        ptr = hdr._TraceHeader__pimpl
+        for (name, setter), v in zip(self.__setters, values):
+            setter(ptr, name, v)
+
+
 # class Samples:
 #     def __init__(self, pointer, num):
 #         self.ptr = pointer
@@ -109,23 +206,22 @@ class TraceHeader:
 
 
 class Trace:
-    __seis_trace_new = lib.seis_trace_new
-    __seis_trace_new.argtypes = [c_longlong]
-    __seis_trace_new.restype = c_void_p
-    __seis_trace_new_with_header = lib.seis_trace_new_with_header
-    __seis_trace_new_with_header.argtypes = [c_longlong, c_void_p]
-    __seis_trace_new_with_header.restype = c_void_p
-    __seis_trace_unref = lib.seis_trace_unref
-    __seis_trace_unref.argtypes = [POINTER(POINTER(c_void_p))]
-    __seis_trace_get_header = lib.seis_trace_get_header
-    __seis_trace_get_header.argtypes = [c_void_p]
-    __seis_trace_get_header.restype = c_void_p
-    __seis_trace_get_samples = lib.seis_trace_get_samples
-    __seis_trace_get_samples.argtypes = [c_void_p]
-    __seis_trace_get_samples.restype = POINTER(c_double)
-    __seis_trace_get_samples_num = lib.seis_trace_get_samples_num
-    __seis_trace_get_samples_num.argtypes = [c_void_p]
-    __seis_trace_get_samples_num.restype = c_longlong
+    __seis_trace_new = Func("seistrace", "seis_trace_new", [c_longlong], c_void_p)
+    __seis_trace_new_with_header = Func(
+        "seistrace", "seis_trace_new_with_header", [c_longlong, c_void_p], c_void_p
+    )
+    __seis_trace_unref = Func(
+        "seistrace", "seis_trace_unref", [POINTER(POINTER(c_void_p))]
+    )
+    __seis_trace_get_header = Func(
+        "seistrace", "seis_trace_get_header", [c_void_p], c_void_p
+    )
+    __seis_trace_get_samples = Func(
+        "seistrace", "seis_trace_get_samples", [c_void_p], POINTER(c_double)
+    )
+    __seis_trace_get_samples_num = Func(
+        "seistrace", "seis_trace_get_samples_num", [c_void_p], c_longlong
+    )
 
     def __init__(self, samp_num=None, hdr=None, ptr=None):
         self.pointer = pointer
@@ -134,13 +230,16 @@ class Trace:
         elif samp_num:
             if hdr:
                 self.__pimpl = cast(
-                    self.__seis_trace_new_with_header(samp_num, hdr.__pimpl),
+                    self.__seis_trace_new_with_header(
+                        samp_num, hdr._TraceHeader__pimpl
+                    ),
                     POINTER(c_void_p),
                 )
             else:
                 self.__pimpl = cast(self.__seis_trace_new(samp_num), POINTER(c_void_p))
         else:
             raise TypeError("Pointer or samp_num should be specified")
+        self.__ref = _TraceRef(self.__pimpl)
 
     def __enter__(self):
         return self
@@ -149,14 +248,239 @@ class Trace:
         self.__del__()
 
     def __del__(self):
-        self.__seis_trace_unref(self.pointer(self.__pimpl))
+        # C trace is freed when arrays and headers taken from it are gone too
+        self.__ref = None
+
+    def rebind(self, ptr):
+        """Take C trace ptr in place of the current one. The old one is
+        freed as soon as nothing taken from it is used"""
+        self.__pimpl = cast(ptr, POINTER(c_void_p))
+        self.__ref = _TraceRef(self.__pimpl)
 
     def header(self):
-        return TraceHeader(self.__seis_trace_get_header(self.__pimpl))
+        """TraceHeader of this trace, it keeps the trace alive"""
+        hdr = TraceHeader(self.__seis_trace_get_header(self.__pimpl))
+        hdr._owner = self.__ref
+        return hdr
+
+    def samples_num(self):
+        return self.__seis_trace_get_samples_num(self.__pimpl)
 
     def samples(self):
+        """Samples as NumPy array sharing memory with the trace. The array
+        and its views keep the trace alive, so they stay valid after the
+        Trace object is gone or rebound"""
         num = self.__seis_trace_get_samples_num(self.__pimpl)
+        if num == 0:
+            return np.empty(0)
         samp = self.__seis_trace_get_samples(self.__pimpl)
-        # samp = cast(samp, POINTER(c_double))
-        return as_array(samp, (num,))
-        #  return Samples(samp, num)
+        return np.asarray(_Samples(self.__ref, cast(samp, c_void_p).value, num))
+
+
+class _TraceRef:
+    """Reference of C trace shared by Trace and everything taken from it,
+    the trace is freed with the last one"""
+
+    def __init__(self, ptr):
+        self.pointer = pointer
+        self.unref = Trace._Trace__seis_trace_unref
+        self.ptr = ptr
+
+    def __del__(self):
+        self.unref(self.pointer(self.ptr))
+
+
+class _Samples:
+    """Exports samples memory to NumPy, arrays made from it hold it as
+    their base and so keep the trace reference"""
+
+    def __init__(self, ref, addr, num):
+        self.ref = ref
+        self.__array_interface__ = {
+            "shape": (num,),
+            "typestr": _DOUBLE,
+            "data": (addr, False),
+            "version": 3,
+        }
+
+
+_DOUBLE = np.dtype(np.float64).str
+
+
+def _samples_view(ptr):
+    """NumPy view of samples of C trace ptr, valid until it is unref'ed"""
+    num = Trace._Trace__seis_trace_get_samples_num(ptr)
+    return as_array(Trace._Trace__seis_trace_get_samples(ptr), (num,))
+
+
+def _header_ptr(ptr):
+    return Trace._Trace__seis_trace_get_header(ptr)
+
+
+def _unref(ptr):
+    Trace._Trace__seis_trace_unref(pointer(cast(ptr, POINTER(c_void_p))))
+
+
+def sample_range(window, num, samp_int=0):
+    """(first, stop) sample numbers of window clipped to num samples.
+    window is slice of sample numbers or (t0, t1) pair of times in seconds
+    from the first sample, which need samp_int in microseconds"""
+    if isinstance(window, slice):
+        first, stop, step = window.indices(num)
+        if step != 1:
+            raise ValueError("Window step should be 1")
+    else:
+        if samp_int <= 0:
+            raise ValueError("Unknown sample interval")
+        first, stop = (min(max(round(t * 1e6 / samp_int), 0), num) for t in window)
+    return first, max(first, stop)
+
+
+def window_header(hdr, first, num, samp_int):
+    """Make headers of TraceHeader describe window of num samples from
+    sample number first: SAMP_NUM is set to num and DELAY_TIME (ms) is
+    moved to the window start"""
+    hdr.set("SAMP_NUM", num)
+    hdr.set("DELAY_TIME", hdr.get("DELAY_TIME") + round(first * samp_int / 1000))
+
+
+def window_table(table, first, num, samp_int):
+    """window_header for SAMP_NUM and DELAY_TIME columns of header table"""
+    if "SAMP_NUM" in table:
+        table["SAMP_NUM"][:] = num
+    if "DELAY_TIME" in table:
+        table["DELAY_TIME"] += round(first * samp_int / 1000)
+    return table
+
+
+def window_trace(trc, window, samp_int=0):
+    """New Trace with window of samples and headers of trc, see
+    window_header. Sample interval is taken from SAMP_INT header of trc
+    if samp_int is 0"""
+    hdr = trc.header()
+    samp = trc.samples()
+    if samp_int <= 0:
+        samp_int = hdr.get("SAMP_INT")
+    first, stop = sample_range(window, samp.size, samp_int)
+    if stop == first:
+        raise ValueError("Window is empty")
+    res = Trace(samp_num=stop - first, hdr=hdr)
+    res.samples()[:] = samp[first:stop]
+    window_header(res.header(), first, stop - first, samp_int)
+    return res
+
+
+def _window_of(ptr, window, num, samp_int):
+    if samp_int <= 0:
+        samp_int = TraceHeader(_header_ptr(ptr)).get("SAMP_INT")
+    return sample_range(window, num, samp_int) + (samp_int,)
+
+
+def read_block(
+    read_trace_ptr,
+    n,
+    out=None,
+    dtype=np.float64,
+    keys=None,
+    window=None,
+    samp_int=0,
+):
+    """Fill rows of out with samples of up to n traces returned by
+    read_trace_ptr (None at the end of data). Samples are converted to
+    out.dtype in place, so no Trace objects are created on the way. With
+    window only these samples are taken, see sample_range, and SAMP_NUM
+    and DELAY_TIME of the header table describe the window. Sample
+    interval is taken from SAMP_INT header of traces if samp_int is 0"""
+    cols = HeaderColumns(keys, n) if keys else None
+    num = 0
+    first = 0
+    while num < n:
+        ptr = read_trace_ptr()
+        if ptr is None:
+            break
+        try:
+            samp = _samples_view(ptr)
+            if window is not None:
+                first, stop, used_int = _window_of(ptr, window, samp.size, samp_int)
+                samp = samp[first:stop]
+            if out is None:
+                out = np.empty((n, samp.size), dtype=dtype)
+            elif samp.size != out.shape[1]:
+                raise ValueError("Trace length differs from block width")
+            out[num] = samp
+            if cols is not None:
+                cols.append(_header_ptr(ptr))
+        finally:
+            _unref(ptr)
+        num += 1
+    if num == 0:
+        raise StopIteration
+    if cols is None:
+        return out[:num]
+    table = cols.columns()
+    if window is not None:
+        window_table(table, first, out.shape[1], used_int)
+    return out[:num], table
+
+
+def read_samples(read_trace_ptr, dtype=np.float64, window=None, samp_int=0):
+    """Samples of the next trace returned by read_trace_ptr as new array
+    of dtype, only window of them if it is given, see read_block"""
+    ptr = read_trace_ptr()
+    if ptr is None:
+        raise StopIteration
+    try:
+        samp = _samples_view(ptr)
+        if window is not None:
+            first, stop, _ = _window_of(ptr, window, samp.size, samp_int)
+            samp = samp[first:stop]
+        return samp.astype(dtype)
+    finally:
+        _unref(ptr)
+
+
+def read_trace_into(read_trace_ptr, samples_out, header_out=None):
+    """Copy samples of the next trace returned by read_trace_ptr into the
+    beginning of samples_out and rebind TraceHeader header_out to its
+    header. Returns number of samples"""
+    ptr = read_trace_ptr()
+    if ptr is None:
+        raise StopIteration
+    try:
+        samp = _samples_view(ptr)
+        if samp.size > samples_out.shape[0]:
+            raise ValueError("Trace is longer than samples_out")
+        samples_out[: samp.size] = samp
+        if header_out is not None:
+            header_out.rebind(_header_ptr(ptr))
+    finally:
+        _unref(ptr)
+    return samp.size
+
+
+def write_block(write_trace, samples, headers=None):
+    """Call write_trace for every row of 2D samples array with header
+    values taken from table headers (dict of columns, like the one from
+    read_header_table). One Trace is filled and passed for all rows, so
+    write_trace should not keep it. Rows are converted to the trace
+    buffer one by one, so e.g. float32 blocks are never widened whole"""
+    samples = np.asarray(samples)
+    headers = headers or {}
+    trc = Trace(samp_num=samples.shape[1])
+    buf = trc.samples()
+    hdr = _header_ptr(trc._Trace__pimpl)
+    cols = []
+    for k, v in headers.items():
+        v = np.asarray(v)
+        if v.dtype.kind in "iub":
+            setter = TraceHeader._TraceHeader__seis_trace_header_set_int
+        elif v.dtype.kind == "f":
+            setter = TraceHeader._TraceHeader__seis_trace_header_set_real
+        else:
+            raise TypeError("Header value could be only integer or floating point")
+        cols.append((k.encode(), setter, v.tolist()))
+    for j in range(samples.shape[0]):
+        buf[:] = samples[j]
+        for name, setter, vals in cols:
+            setter(hdr, name, vals[j])
+        write_trace(trc)
@@ -0,0 +1,77 @@
+import os
+import sys
+from ctypes import pointer
+
+import pytest
+
+# Modules of the package are kept in the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import seislib  # noqa: E402
+
+
+class FakeFunc:
+    """Stand-in for foreign function which checks arguments against
+    argtypes like ctypes does and records calls"""
+
+    def __init__(self, lib, name):
+        self.lib = lib
+        self.name = name
+        self.argtypes = None
+        self.restype = None
+
+    def __call__(self, *args):
+        if self.argtypes is not None and len(args) != len(self.argtypes):
+            raise TypeError(
+                "{} takes {} arguments ({} given)".format(
+                    self.name, len(self.argtypes), len(args)
+                )
+            )
+        self.lib.calls.append((self.name, args))
+        if self.name.endswith("_get_error"):
+            return self.lib.error
+        if self.name.endswith("_end_of_data"):
+            return 1
+        return 1 if self.name.endswith("_new") else 0
+
+
+class FakeLib:
+    """Library whose functions do nothing, constructors return 1, error
+    getters report no error and readers have no traces"""
+
+    def __init__(self):
+        from seissegy import SegyError
+
+        self.calls = []
+        self.error = pointer(SegyError(0, None))
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        f = FakeFunc(self, name)
+        setattr(self, name, f)
+        return f
+
+
+# Functions are bound to classes on first call, so fakes live as long as
+# the test session
+_fake = {}
+
+
+@pytest.fixture
+def c_libs():
+    """Calls to libseissegy and libseistrace, which are faked when they
+    can't be loaded. None with real libraries"""
+    if not _fake:
+        try:
+            seislib.load("seissegy")
+            seislib.load("seistrace")
+        except OSError:
+            _fake.update(seissegy=FakeLib(), seistrace=FakeLib())
+    if not _fake:
+        yield None
+        return
+    seislib._libs.update(_fake)
+    for lib in _fake.values():
+        lib.calls.clear()
+    yield _fake
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from benchmarks.generate import make_segy
+from seisarray import SeisArray
+from seisfile import TraceFile
+
+TRACES = 45
+SAMPLES = 30
+
+
+@pytest.fixture
+def segy(tmp_path, c_libs):
+    from seissegy import ISegy
+
+    name = str(tmp_path / "a.sgy")
+    make_segy(name, TRACES, SAMPLES)
+    with TraceFile(name) as f:
+        samples = f.read_block(slice(None))
+    with ISegy(name, backend="mmap") as f:
+        yield f, samples
+
+
+def test_indexing(segy):
+    f, samples = segy
+    a = SeisArray(f, chunk=10)
+    assert a.shape == (TRACES, SAMPLES) and len(a) == TRACES
+    np.testing.assert_array_equal(np.asarray(a), samples)
+    np.testing.assert_array_equal(a[3], samples[3])
+    np.testing.assert_array_equal(a[-1, 5], samples[-1, 5])
+    np.testing.assert_array_equal(a[::-7, 4:9], samples[::-7, 4:9])
+    np.testing.assert_array_equal(a[[9, 1, 9], [20, 2]], samples[[9, 1, 9]][:, [20, 2]])
+    assert a[[], :].shape == (0, SAMPLES)
+    with pytest.raises(IndexError):
+        a[0, 0, 0]
+
+
+def test_blocks(segy):
+    f, samples = segy
+    a = SeisArray(f, chunk=10)
+    firsts = [first for first, block in a.blocks(prefetch=2)]
+    assert firsts == [0, 10, 20, 30, 40]
+    rms = a.map_blocks(lambda b, first: np.sqrt((b**2).mean(axis=1)))
+    np.testing.assert_allclose(rms, np.sqrt((samples**2).mean(axis=1)))
+    total = a.reduce_blocks(lambda b, first: b.sum(axis=0), window=slice(0, 5))
+    np.testing.assert_allclose(total, samples[:, :5].sum(axis=0))
+    with pytest.raises(ValueError):
+        a.map_blocks(lambda b, first: b[:1])
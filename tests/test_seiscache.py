@@ -0,0 +1,60 @@
+from seiscache import ENTRY_OVERHEAD, LRU, TraceCache
+
+
+def test_lru_evicts_least_recent():
+    c = LRU(30)
+    loads = []
+
+    def load(key):
+        loads.append(key)
+        return key * 10
+
+    for k in (1, 2, 3):
+        assert c.get(k, load, lambda v: 10) == k * 10
+    assert c.get(1, load, lambda v: 10) == 10
+    c.get(4, load, lambda v: 10)
+    assert 2 not in c and 1 in c and 3 in c and 4 in c
+    assert loads == [1, 2, 3, 4]
+    assert c.snapshot() == {
+        "entries": 3,
+        "bytes": 30,
+        "max_bytes": 30,
+        "hits": 1,
+        "misses": 4,
+        "evictions": 1,
+    }
+
+
+def test_lru_sizes():
+    c = LRU(30)
+    c.put("a", 1, 20)
+    c.put("b", 2, 31)
+    assert "b" not in c and c.bytes == 20
+    c.put("a", 3, 5)
+    assert c.peek("a") == 3 and c.bytes == 5
+    c.put("c", 4, 25)
+    c.put("d", 5, 10)
+    assert list(map(c.peek, "acd")) == [None, None, 5] and c.bytes == 10
+    assert c.peek("x") is None and c.hits == 0
+    c.clear()
+    assert len(c) == 0 and c.bytes == 0
+
+
+def test_trace_cache_takes_header_from_trace():
+    class Trc:
+        def samples_num(self):
+            return 4
+
+        def header(self):
+            return "header"
+
+    c = TraceCache(10 * ENTRY_OVERHEAD, ENTRY_OVERHEAD)
+    trc = Trc()
+    assert c.trace(0, lambda i: trc) is trc
+    assert c.trace(0, None) is trc
+    assert c.header(0, None) == "header"
+    assert c.header(1, lambda i: "loaded") == "loaded"
+    assert c.header(1, None) == "loaded"
+    snap = c.snapshot()
+    assert snap["traces"]["hits"] == 1 and snap["headers"]["hits"] == 2
+    assert snap["traces"]["bytes"] == ENTRY_OVERHEAD + 32
@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+
+import seiscodec
+
+ORDERS = (">", "<")
+
+
+def values(format_code):
+    """Samples exactly representable in format_code"""
+    if format_code in (1, 5, 6):
+        return np.arange(-64, 64) / 8.0
+    # 64 bit integers are limited to ones exact in float64
+    bits = min(seiscodec.SAMPLE_SIZE[format_code] * 8, 52)
+    if format_code in (10, 11, 12, 15, 16):
+        return np.linspace(0, 2.0**bits - 1, 17).round()
+    return np.linspace(-(2.0 ** (bits - 1)), 2.0 ** (bits - 1) - 1, 17).round()
+
+
+@pytest.mark.parametrize("order", ORDERS)
+@pytest.mark.parametrize("format_code", sorted(seiscodec.SAMPLE_SIZE))
+def test_round_trip(format_code, order):
+    samples = np.stack([values(format_code)] * 2)
+    raw = seiscodec.encode(samples, format_code, order)
+    assert raw.dtype == np.uint8
+    assert raw.shape == (2, samples.shape[1] * seiscodec.SAMPLE_SIZE[format_code])
+    np.testing.assert_array_equal(seiscodec.decode(raw, format_code, order), samples)
+
+
+@pytest.mark.parametrize("order", ORDERS)
+@pytest.mark.parametrize("format_code", sorted(seiscodec.SAMPLE_SIZE))
+def test_decode_into_out(format_code, order):
+    samples = values(format_code)
+    raw = seiscodec.encode(samples, format_code, order)
+    out = np.empty(samples.size, np.float32)
+    assert seiscodec.decode(raw, format_code, order, out) is out
+    np.testing.assert_array_equal(out, samples.astype(np.float32))
+
+
+@pytest.mark.parametrize(
+    "bits, value",
+    [
+        (0xC276A000, -118.625),
+        (0x42640000, 100.0),
+        (0x41100000, 1.0),
+        (0xC1100000, -1.0),
+        (0x40800000, 0.5),
+        (0x00000000, 0.0),
+    ],
+)
+@pytest.mark.parametrize("order", ORDERS)
+def test_ibm_bit_patterns(bits, value, order):
+    raw = np.array([bits], order + "u4").view(np.uint8)
+    assert seiscodec.decode(raw, seiscodec.IBM, order)[0] == value
+    enc = seiscodec.encode(np.array([value]), seiscodec.IBM, order)
+    assert enc.view(order + "u4")[0] == bits
+
+
+def test_ibm_overflow_and_nan():
+    samples = np.array([1e80, -np.inf, np.nan, 1e-90])
+    raw = seiscodec.encode(samples, seiscodec.IBM).view(">u4")
+    assert list(raw) == [0x7FFFFFFF, 0xFFFFFFFF, 0, 0]
+
+
+def test_integers_are_clipped():
+    raw = seiscodec.encode(np.array([300.0, -300.0, 1.6]), 8)
+    np.testing.assert_array_equal(seiscodec.decode(raw, 8), [127, -128, 2])
+
+
+def test_int24_byte_order():
+    raw = seiscodec.encode(np.array([0x010203, -1]), seiscodec.I24, ">")
+    assert raw.tobytes() == b"\x01\x02\x03\xff\xff\xff"
+    raw = seiscodec.encode(np.array([0x010203]), seiscodec.U24, "<")
+    assert raw.tobytes() == b"\x03\x02\x01"
+
+
+def test_unsupported_format():
+    assert not seiscodec.supported(4)
+    with pytest.raises(ValueError):
+        seiscodec.raw_dtype(4)
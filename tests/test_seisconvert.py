@@ -0,0 +1,105 @@
+import numpy as np
+import pytest
+
+import seisconvert
+from benchmarks.generate import make_segy, make_su
+from seisfile import TraceFile
+
+TRACES = 30
+SAMPLES = 40
+# FFID is read from bytes of INLINE written by the generator
+REMAP = {"hdr_name": "FFID", "hdr_num": 0, "offset": 189, "format": 4}
+
+
+def test_output_remaps():
+    su = {"hdr_name": "CDP", "hdr_num": 1, "offset": 1, "format": 4}
+    assert seisconvert.output_remaps([REMAP, su], "su") == [
+        {"hdr_name": "FFID", "offset": 189, "format": 4}
+    ]
+    assert seisconvert.output_remaps([dict(su, hdr_num=0)], "segy")[0]["hdr_num"] == 0
+
+
+def test_parse_remap():
+    assert seisconvert.parse_remap("ffid:189:i4") == {
+        "hdr_name": "FFID",
+        "offset": 189,
+        "format": 4,
+    }
+    assert seisconvert.parse_remap("CDP:1:4:1")["hdr_num"] == 1
+    with pytest.raises(ValueError):
+        seisconvert.parse_remap("CDP:1")
+
+
+def test_layout(tmp_path):
+    name = str(tmp_path / "a.sgy")
+    make_segy(name, TRACES, SAMPLES, 1, "<")
+    with TraceFile(name) as f:
+        su = seisconvert.Layout(f, "su", None, [])
+        assert (su.format_code, su.first_offset) == (5, 0)
+        assert su.record_dtype.itemsize == 240 + SAMPLES * 4
+        segy = seisconvert.Layout(f, "segy", 3, [REMAP])
+        assert (segy.format_code, segy.byte_order, segy.same) == (3, "<", False)
+        head = segy.file_header(f, TRACES)
+        assert len(head) == 3600
+        assert np.frombuffer(head, "<i2", 1, 3224)[0] == 3
+        same = seisconvert.Layout(f, "segy", None, [])
+        rec = same.convert(f, 3, 7)
+        assert same.same and rec.shape == (4,)
+        np.testing.assert_array_equal(rec["samples"], f.read_records(3, 7)["samples"])
+
+
+@pytest.mark.parametrize("workers", [None, 2])
+def test_segy_to_su_and_back(tmp_path, workers):
+    src = str(tmp_path / "a.sgy")
+    make_segy(src, TRACES, SAMPLES, 1)
+    su = str(tmp_path / "a.su")
+    res = seisconvert.convert(src, su, chunk=7, workers=workers)
+    assert res["traces"] == TRACES
+    back = str(tmp_path / "b.sgy")
+    seisconvert.convert(su, back, format_code=1)
+    with TraceFile(src) as a, TraceFile(su, "su") as b, TraceFile(back) as c:
+        expect = a.read_block(slice(None))
+        np.testing.assert_array_equal(b.read_block(slice(None)), expect)
+        np.testing.assert_array_equal(c.read_block(slice(None)), expect)
+        assert c.format_code == 1 and len(c) == TRACES
+
+
+def test_remapped_segy_to_su(tmp_path):
+    src = str(tmp_path / "a.sgy")
+    make_segy(src, TRACES, SAMPLES)
+    dst = str(tmp_path / "a.su")
+    seisconvert.convert(src, dst, remaps=[REMAP])
+    out = seisconvert.output_remaps([REMAP], "su")
+    with TraceFile(src) as a, TraceFile(dst, "su", out) as b:
+        inline = a.header_table(["INLINE"], slice(None))["INLINE"]
+        ffid = b.header_table(["FFID"], slice(None))["FFID"]
+        np.testing.assert_array_equal(ffid, inline)
+
+
+def test_remapped_traces_to_su(tmp_path, c_libs):
+    # Variable length traces go through libseissegy
+    src = str(tmp_path / "a.sgy")
+    make_segy(src, TRACES, SAMPLES, fixed=False)
+    dst = str(tmp_path / "a.su")
+    res = seisconvert.convert(src, dst, remaps=[REMAP])
+    if c_libs is None:
+        assert res["traces"] == TRACES
+        return
+    calls = [
+        args
+        for name, args in c_libs["seissegy"].calls
+        if name == "seis_osu_remap_trace_header"
+    ]
+    assert [args[1:] for args in calls] == [(b"FFID", 189, 4)]
+
+
+def test_su_input(tmp_path):
+    src = str(tmp_path / "a.su")
+    make_su(src, TRACES, SAMPLES)
+    dst = str(tmp_path / "a.sgy")
+    seisconvert.convert(src, dst)
+    with TraceFile(src, "su") as a, TraceFile(dst) as b:
+        assert (b.format_code, b.byte_order, b.samp_int) == (5, ">", a.samp_int)
+        np.testing.assert_array_equal(
+            b.read_block(slice(None)), a.read_block(slice(None))
+        )
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from benchmarks.generate import make_segy
+from seiscube import Cube
+from seisfile import TraceFile
+
+SAMPLES = 8
+
+
+@pytest.fixture
+def volume(tmp_path):
+    """Two inlines of 240 crosslines sorted by inline"""
+    name = str(tmp_path / "a.sgy")
+    make_segy(name, 480, SAMPLES)
+    with TraceFile(name, mmap=True) as f:
+        yield f
+
+
+def test_geometry(volume):
+    cube = Cube(volume)
+    assert cube.shape == (2, 240, SAMPLES)
+    assert cube.regular and cube.sorting == "iline"
+    np.testing.assert_array_equal(cube.ilines, [1000, 1001])
+    samples = volume.read_block(slice(0, 480))
+    np.testing.assert_array_equal(cube.iline(1001), samples[240:])
+    np.testing.assert_array_equal(cube.xline(2003), samples[[3, 243]])
+    np.testing.assert_array_equal(cube.depth_slice(-1).ravel(), samples[:, -1])
+    np.testing.assert_array_equal(cube.as_array().reshape(480, SAMPLES), samples)
+    with pytest.raises(KeyError):
+        cube.iline(999)
+
+
+def test_irregular(tmp_path):
+    name = str(tmp_path / "a.sgy")
+    make_segy(name, 250, SAMPLES)
+    with TraceFile(name) as f:
+        cube = Cube(f)
+        assert cube.shape == (2, 240, SAMPLES)
+        assert not cube.regular and cube.sorting is None
+        line = cube.iline(1001)
+        np.testing.assert_array_equal(line[:10], f.read_block(slice(240, 250)))
+        assert not line[10:].any()
+        with pytest.raises(ValueError):
+            cube.as_array()
+
+
+def test_duplicates(volume):
+    # Every CDP holds two traces
+    with pytest.raises(ValueError):
+        Cube(volume, "FFID", "CDP")
+    first = Cube(volume, "FFID", "CDP", duplicates="first")
+    last = Cube(volume, "FFID", "CDP", duplicates="last")
+    assert first.shape == last.shape == (2, 240, SAMPLES)
+    assert not first.regular and not last.regular
+    np.testing.assert_array_equal(first.grid[0, :120], np.arange(0, 240, 2))
+    np.testing.assert_array_equal(last.grid[1, 120:], np.arange(241, 480, 2))
+    assert np.all(first.grid[0, 120:] == -1)
+    with pytest.raises(ValueError):
+        Cube(volume, duplicates="any")
@@ -0,0 +1,104 @@
+import os
+
+import numpy as np
+import pytest
+
+from benchmarks.generate import make_segy, make_su
+from seisfile import TraceFile
+
+SAMPLES = 12
+COUNTS = [30, 20, 25]
+
+
+@pytest.fixture
+def files(tmp_path, c_libs):
+    names = [str(tmp_path / n) for n in ("a.sgy", "b.su", "c.segy")]
+    make_segy(names[0], COUNTS[0], SAMPLES)
+    make_su(names[1], COUNTS[1], SAMPLES, seed=1)
+    make_segy(names[2], COUNTS[2], SAMPLES, seed=2)
+    (tmp_path / "notes.txt").write_text("skipped")
+    samples = []
+    for n in names:
+        with TraceFile(n, "su" if n.endswith(".su") else "segy") as f:
+            samples.append(f.read_block(slice(None)))
+    return str(tmp_path), names, np.concatenate(samples)
+
+
+def dataset(path, **options):
+    from seisdataset import Dataset
+
+    return Dataset(path, keys=("FFID", "CDP"), backend="mmap", **options)
+
+
+def test_index(files):
+    path, names, samples = files
+    with dataset(path) as ds:
+        assert ds.files == names and len(ds) == sum(COUNTS)
+        assert ds.locate(30) == (names[1], 0)
+        assert ds.locate(-1) == (names[2], 24)
+        with pytest.raises(IndexError):
+            ds.locate(75)
+        cdp = ds.header_table(["CDP"])["CDP"]
+        np.testing.assert_array_equal(cdp[28:32], [15, 15, 1, 1])
+        np.testing.assert_array_equal(ds.select("CDP == 1"), [0, 1, 30, 31, 50, 51])
+        got = np.stack(list(ds.traces_at([2, 31, 60], np.float64)))
+        np.testing.assert_array_equal(got, samples[[2, 31, 60]])
+        gather = ds.gather(np.float64, CDP=2)
+        np.testing.assert_array_equal(gather, samples[[2, 3, 32, 33, 52, 53]])
+        assert len(list(ds.gathers("CDP", dtype=np.float32))) == 15
+        with pytest.raises(ValueError):
+            ds.header_table(["OFFSET"])
+    assert os.path.exists(os.path.join(path, ".seisdataset.npz"))
+
+
+def test_manifest_reuse(files, monkeypatch):
+    import seisdataset
+
+    path, names, samples = files
+    dataset(path).close()
+    scanned = []
+    scan = seisdataset._scan
+
+    def counted(name, *args):
+        scanned.append(name)
+        return scan(name, *args)
+
+    monkeypatch.setattr(seisdataset, "_scan", counted)
+    with dataset(path) as ds:
+        assert scanned == [] and len(ds) == sum(COUNTS)
+    make_segy(names[2], 5, SAMPLES)
+    with dataset(path) as ds:
+        assert scanned == [names[2]] and len(ds) == 55
+    with dataset(names[:2]) as ds:
+        assert len(ds) == 50 and ds.manifest != os.path.join(path, ".seisdataset.npz")
+
+
+def test_reader_pool(files):
+    path, names, samples = files
+    with dataset(path, max_open=1) as ds:
+        assert ds.map_files(lambda r, name: len(r)) == COUNTS
+        first = ds.reader(0)
+        ds.reader(1)
+        assert ds.reader(0) is not first
+
+
+def test_getitem_reads_ascending(files, monkeypatch):
+    from seissegy import _Input
+
+    path, names, samples = files
+    asked = []
+
+    def traces_at(reader, indices, dtype=None, window=None):
+        indices = list(indices)
+        assert indices == sorted(indices)
+        asked.append(len(indices))
+        for i in indices:
+            yield reader.file_name, int(i)
+
+    monkeypatch.setattr(_Input, "traces_at", traces_at)
+    with dataset(path) as ds:
+        got = ds[::-20]
+        assert got == [ds.locate(i) for i in range(74, -1, -20)]
+        assert asked == [1, 1, 2]
+        assert ds[[60, -1, 2, 60]] == [ds.locate(i) for i in (60, 74, 2, 60)]
+        assert ds[5:5] == []
@@ -0,0 +1,148 @@
+import numpy as np
+import pytest
+
+import seiscodec
+from benchmarks.generate import make_segy, make_su
+from seisfile import FILE_HEADER_SIZE, TraceFile
+
+TRACES = 50
+SAMPLES = 64
+
+
+@pytest.fixture(params=[False, True], ids=["pread", "mmap"])
+def mmap(request):
+    return request.param
+
+
+def raw_samples(file_name, dtype):
+    rec = np.dtype([("header", np.uint8, (240,)), ("samples", dtype, (SAMPLES,))])
+    return np.fromfile(file_name, rec, offset=FILE_HEADER_SIZE)["samples"]
+
+
+@pytest.mark.parametrize("order", (">", "<"))
+def test_segy_samples(tmp_path, mmap, order):
+    name = str(tmp_path / "a.sgy")
+    make_segy(name, TRACES, SAMPLES, 5, order)
+    expect = raw_samples(name, order + "f4")
+    with TraceFile(name, mmap=mmap) as f:
+        assert (mmap, len(f), f.samp_num, f.samp_int) == (
+            f.map is not None,
+            TRACES,
+            SAMPLES,
+            2000.0,
+        )
+        assert f.byte_order == order
+        np.testing.assert_array_equal(f.read_block(slice(None)), expect)
+        np.testing.assert_array_equal(f.read_samples(7), expect[7])
+        np.testing.assert_array_equal(f.read_block([9, 2]), expect[[9, 2]])
+
+
+@pytest.mark.parametrize("format_code", sorted(seiscodec.SAMPLE_SIZE))
+def test_formats_agree(tmp_path, format_code):
+    name = str(tmp_path / "a.sgy")
+    make_segy(name, TRACES, SAMPLES, format_code)
+    with TraceFile(name) as f, TraceFile(name, mmap=True) as m:
+        block = f.read_block(slice(None))
+        np.testing.assert_array_equal(m.read_block(slice(None)), block)
+        np.testing.assert_array_equal(f.read_samples(3), block[3])
+        win = m.read_block(slice(10, 20), window=slice(5, 9))
+        np.testing.assert_array_equal(win, block[10:20, 5:9])
+
+
+def test_headers(tmp_path, mmap):
+    name = str(tmp_path / "a.sgy")
+    make_segy(name, TRACES, SAMPLES)
+    with TraceFile(name, mmap=mmap) as f:
+        tbl = f.header_table(["TRC_SEQ_LINE", "SAMP_NUM"], slice(None))
+        np.testing.assert_array_equal(tbl["TRC_SEQ_LINE"], np.arange(TRACES) + 1)
+        assert np.all(tbl["SAMP_NUM"] == SAMPLES)
+        samples, tbl = f.read_block(
+            [4, 5], keys=["TRC_SEQ_LINE", "SAMP_NUM", "DELAY_TIME"], window=(0.01, 0.02)
+        )
+        assert samples.shape == (2, 5)
+        np.testing.assert_array_equal(tbl["TRC_SEQ_LINE"], [5, 6])
+        np.testing.assert_array_equal(tbl["SAMP_NUM"], [5, 5])
+        np.testing.assert_array_equal(tbl["DELAY_TIME"], [10, 10])
+
+
+def test_block_shorter_than_out(tmp_path, mmap):
+    name = str(tmp_path / "a.sgy")
+    make_segy(name, TRACES, SAMPLES)
+    with TraceFile(name, mmap=mmap) as f:
+        out = np.full((10, SAMPLES), np.nan)
+        res = f.read_block(np.arange(TRACES - 3, TRACES), out)
+        assert res.shape == (3, SAMPLES)
+        np.testing.assert_array_equal(res, f.read_block(slice(TRACES - 3, None)))
+        assert np.all(np.isnan(out[3:]))
+        with pytest.raises(ValueError):
+            f.read_block(slice(None), out)
+
+
+def test_variable_length(tmp_path):
+    name = str(tmp_path / "a.sgy")
+    make_segy(name, TRACES, SAMPLES, fixed=False)
+    with TraceFile(name, mmap=True) as f:
+        assert not f.fixed and f.map is None
+        assert len(f) == TRACES
+        assert [f.samples_num(i) for i in range(6)] == [64, 63, 62, 61, 60, 64]
+        assert f.read_samples(1).shape == (63,)
+        np.testing.assert_array_equal(
+            f.read_block([0, 5]), np.stack([f.read_samples(0), f.read_samples(5)])
+        )
+        with pytest.raises(ValueError):
+            f.read_block([0, 1])
+    # Offsets are kept next to the file for later opens
+    assert (tmp_path / "a.sgy.tridx.npz").exists()
+    with TraceFile(name) as f:
+        assert f.samples_num(1) == 63
+
+
+@pytest.mark.parametrize("fixed", [True, False])
+def test_read_into(tmp_path, mmap, fixed):
+    name = str(tmp_path / "a.sgy")
+    make_segy(name, TRACES, SAMPLES, fixed=fixed)
+    with TraceFile(name, mmap=mmap) as f:
+        out = np.full(SAMPLES + 2, np.nan, dtype=np.float32)
+        for i in (0, 3, 1):
+            num = f.read_into(i, out)
+            assert num == f.samples_num(i)
+            np.testing.assert_array_equal(out[:num], f.read_samples(i))
+        assert np.isnan(out[-2:]).all()
+        with pytest.raises(ValueError):
+            f.read_into(0, out[:10])
+
+
+def test_su(tmp_path, mmap):
+    name = str(tmp_path / "a.su")
+    make_su(name, TRACES, SAMPLES)
+    with TraceFile(name, "su", mmap=mmap) as f:
+        assert (len(f), f.samp_num, f.fixed) == (TRACES, SAMPLES, True)
+        tbl = f.header_table(["TRC_SEQ_LINE"], slice(None))
+        np.testing.assert_array_equal(tbl["TRC_SEQ_LINE"], np.arange(TRACES) + 1)
+        assert f.read_block(slice(None)).shape == (TRACES, SAMPLES)
+
+
+def write_su(file_name, order, traces, samples):
+    from benchmarks.generate import _write_traces
+
+    with open(file_name, "wb") as f:
+        _write_traces(f, "su", traces, samples, 5, order, True, 2000, 0)
+
+
+@pytest.mark.parametrize("order", (">", "<"))
+def test_su_byte_order(tmp_path, order):
+    name = str(tmp_path / "a.su")
+    write_su(name, order, 300, 1000)
+    with TraceFile(name, "su") as f:
+        assert (f.byte_order, len(f), f.samp_num) == (order, 300, 1000)
+        assert f.samp_int == 2000
+
+
+def test_su_unknown_byte_order(tmp_path):
+    name = str(tmp_path / "a.su")
+    write_su(name, "<", 1, 10)
+    with open(name, "ab") as f:
+        f.write(b"\0" * 5)
+    with pytest.raises(ValueError):
+        TraceFile(name, "su")
+    assert not (tmp_path / "a.su.tridx.npz").exists()
@@ -0,0 +1,49 @@
+import numpy as np
+
+from seisgather import GatherIndex
+
+TABLE = {
+    "FFID": np.array([2, 1, 2, 1, 3, 2]),
+    "CHAN": np.array([1, 1, 2, 2, 1, 1]),
+}
+
+
+def test_from_table():
+    idx = GatherIndex.from_table(["FFID"], TABLE)
+    assert len(idx) == 3
+    np.testing.assert_array_equal(idx.values["FFID"], [1, 2, 3])
+    np.testing.assert_array_equal(idx.gather(1), [0, 2, 5])
+    np.testing.assert_array_equal(idx.traces(1), [1, 3])
+    assert idx.find(4) is None and idx.traces(4).size == 0
+    assert [(v, t.tolist()) for v, t in idx] == [
+        ((1,), [1, 3]),
+        ((2,), [0, 2, 5]),
+        ((3,), [4]),
+    ]
+
+
+def test_two_keys():
+    idx = GatherIndex.from_table(["FFID", "CHAN"], TABLE)
+    assert len(idx) == 5
+    np.testing.assert_array_equal(idx.traces(2, 1), [0, 5])
+    assert idx.find(3, 2) is None
+
+
+def test_empty_table():
+    idx = GatherIndex.from_table(["FFID"], {"FFID": np.empty(0, np.int32)})
+    assert len(idx) == 0 and list(idx) == []
+
+
+def test_save_and_load(tmp_path):
+    name = tmp_path / "a.sgy"
+    name.write_bytes(b"data")
+    name = str(name)
+    idx = GatherIndex.from_table(["FFID"], TABLE)
+    idx.save(name, [{"hdr_name": "FFID"}])
+    assert GatherIndex.load(name, ["FFID"]) is None
+    loaded = GatherIndex.load(name, ["FFID"], [{"hdr_name": "FFID"}])
+    np.testing.assert_array_equal(loaded.order, idx.order)
+    np.testing.assert_array_equal(loaded.traces(2), [0, 2, 5])
+    with open(name, "ab") as f:
+        f.write(b"more")
+    assert GatherIndex.load(name, ["FFID"], [{"hdr_name": "FFID"}]) is None
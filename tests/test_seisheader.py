@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+
+import seisheader
+
+
+def test_fields_fit_header():
+    for kind in ("segy", "su"):
+        flds = seisheader.fields(kind)
+        dt = seisheader.header_dtype(flds, ">")
+        assert dt.itemsize == seisheader.HEADER_SIZE
+        for off, tp in flds.values():
+            assert off + np.dtype(tp).itemsize <= seisheader.HEADER_SIZE
+
+
+def test_known_offsets():
+    flds = seisheader.fields("segy")
+    assert flds["FFID"] == (8, "i4")
+    assert flds["SAMP_NUM"] == (114, "u2")
+    assert flds["SAMP_INT"] == (116, "u2")
+
+
+def test_remap():
+    remap = {"hdr_name": "FFID", "hdr_num": 1, "offset": 9, "format": 2}
+    flds = seisheader.fields("segy", [remap])
+    assert flds["FFID"] == (seisheader.HEADER_SIZE + 8, "i2")
+    with pytest.raises(ValueError):
+        seisheader.fields("segy", [dict(remap, format=10)])
+
+
+@pytest.mark.parametrize("order", (">", "<"))
+def test_table(order):
+    flds = seisheader.fields("segy")
+    rec = np.zeros(3, seisheader.header_dtype(flds, order))
+    rec["FFID"] = [1, 2, 3]
+    rec["SAMP_INT"] = 2000
+    raw = np.frombuffer(rec.tobytes(), seisheader.header_dtype(flds, order))
+    tbl = seisheader.table(raw, ["FFID", "SAMP_INT"], flds)
+    assert tbl["FFID"].dtype == np.int64
+    np.testing.assert_array_equal(tbl["FFID"], [1, 2, 3])
+    np.testing.assert_array_equal(tbl["SAMP_INT"], [2000] * 3)
+    with pytest.raises(ValueError):
+        seisheader.table(raw, ["NOPE"], flds)
+
+
+def test_conditions_and_match():
+    conds = seisheader.conditions(["offset < 50", "FFID == 2", "D1>=0.5"])
+    assert [c[0] for c in conds] == ["OFFSET", "FFID", "D1"]
+    assert conds[2][2] == 0.5
+    tbl = {
+        "OFFSET": np.array([0, 25, 50, 75]),
+        "FFID": np.array([2, 2, 2, 1]),
+        "D1": np.array([0.5, 0.25, 1.0, 1.0]),
+    }
+    np.testing.assert_array_equal(
+        seisheader.match(tbl, conds), [True, False, False, False]
+    )
+    with pytest.raises(ValueError):
+        seisheader.conditions("OFFSET ~ 5")
+
+
+def test_select():
+    tbl = {"FFID": np.array([1, 2, 2, 3]), "OFFSET": np.array([0, 25, 50, 75])}
+    asked = []
+
+    def header_table(keys):
+        asked.append(keys)
+        return {k: tbl[k] for k in keys}
+
+    np.testing.assert_array_equal(
+        seisheader.select(header_table, ["FFID == 2", "OFFSET > 0"]), [1, 2]
+    )
+    assert asked == [["FFID", "OFFSET"]]
+    np.testing.assert_array_equal(
+        seisheader.select(header_table, lambda t: t["FFID"] > 1, ["FFID"]), [1, 2, 3]
+    )
+    with pytest.raises(ValueError):
+        seisheader.select(header_table, lambda t: t["FFID"] > 1)
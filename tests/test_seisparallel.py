@@ -0,0 +1,26 @@
+import numpy as np
+
+from benchmarks.generate import make_segy
+from seisfile import TraceFile
+from seisparallel import parallel_map
+
+
+def _rms(samples, headers, first):
+    return np.sqrt(np.mean(samples**2, axis=1))
+
+
+def _ffid(samples, headers, first):
+    return first, headers["FFID"].tolist()
+
+
+def test_parallel_map(tmp_path):
+    name = str(tmp_path / "a.sgy")
+    make_segy(name, 50, 20)
+    with TraceFile(name) as f:
+        samples = f.read_block(slice(0, 50))
+        res = parallel_map(f, _rms, workers=2, chunk=8, out_dtype=np.float64)
+        np.testing.assert_allclose(res, np.sqrt(np.mean(samples**2, axis=1)))
+        res = parallel_map(f, _ffid, workers=2, chunk=16, keys=["FFID"], start=10)
+        assert [r[0] for r in res] == [10, 26, 42]
+        ffid = f.header_table(["FFID"], slice(10, 50))["FFID"]
+        assert sum((r[1] for r in res), []) == ffid.tolist()
@@ -0,0 +1,132 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from seisqueue import ReadAhead, WriteBehind
+
+
+def counter(num):
+    """read function returning 0 .. num - 1 and its rewind"""
+    pos = [0]
+
+    def read():
+        if pos[0] == num:
+            raise StopIteration
+        pos[0] += 1
+        return pos[0] - 1
+
+    def rewind():
+        pos[0] = 0
+
+    return read, rewind
+
+
+def test_read_ahead_order():
+    read, rewind = counter(50)
+    r = ReadAhead(read, 4, rewind)
+    assert list(r) == list(range(50))
+    assert list(r) == list(range(50))
+    assert next(r, None) is None
+
+
+def test_read_ahead_error():
+    def read():
+        raise OSError("bad sector")
+
+    with ReadAhead(read, 2) as r:
+        with pytest.raises(OSError):
+            next(iter(r))
+        assert next(r, None) is None
+
+
+def test_read_ahead_close_stops_thread():
+    calls = []
+
+    def read():
+        calls.append(1)
+        return len(calls)
+
+    r = ReadAhead(read, 2)
+    for i in r:
+        if i == 3:
+            break
+    r.close()
+    num = len(calls)
+    assert num <= 3 + 2 + 1
+    time.sleep(0.05)
+    assert len(calls) == num
+
+
+def test_read_ahead_async():
+    read, rewind = counter(20)
+
+    async def collect():
+        return [i async for i in ReadAhead(read, 3, rewind)]
+
+    assert asyncio.run(collect()) == list(range(20))
+
+
+def test_write_behind_order():
+    out = []
+    w = WriteBehind(2)
+    for i in range(100):
+        w.put(out.append, i)
+    w.flush()
+    assert out == list(range(100))
+    w.close()
+
+
+def test_write_behind_error_is_sticky():
+    out = []
+    failed = threading.Event()
+
+    def write(i):
+        if i == 2:
+            failed.set()
+            raise OSError("disk full")
+        out.append(i)
+
+    w = WriteBehind(4)
+    for i in range(3):
+        w.put(write, i)
+    failed.wait()
+    for i in range(3, 7):
+        try:
+            w.put(write, i)
+        except OSError:
+            pass
+    with pytest.raises(OSError):
+        w.put(write, 7)
+    with pytest.raises(OSError):
+        w.flush()
+    with pytest.raises(OSError):
+        w.close()
+    with pytest.raises(OSError):
+        w.close()
+    assert out == [0, 1]
+
+
+def test_writer_keeps_queue_error(tmp_path, c_libs):
+    from seissegy import OSU
+
+    w = OSU(str(tmp_path / "a.su"), write_behind=2)
+    done = []
+
+    def write(trc):
+        if trc == 1:
+            raise OSError("disk full")
+        done.append(trc)
+
+    w._write_trace = write
+    w.write_trace(0)
+    w.write_trace(1)
+    with pytest.raises(OSError):
+        w.close()
+    with pytest.raises(OSError):
+        w.write_trace(2)
+    with pytest.raises(OSError):
+        w.close()
+    assert done == [0]
+    w._behind = None
@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+from seisscan import EXP_MIN, Report
+
+
+def block(seed, n, ns=16):
+    rng = np.random.default_rng(seed)
+    samples = rng.normal(size=(n, ns))
+    samples[0] = 0
+    samples[1, :3] = samples[1].max() + 1
+    headers = {"FFID": np.arange(n) // 3 + seed, "CDP": np.full(n, seed)}
+    return samples, headers
+
+
+def test_update():
+    samples, headers = block(1, 6)
+    samples[2, 0] = np.nan
+    r = Report(["FFID"], attributes=True).update(samples, headers)
+    assert (r.traces, r.samples, r.nonfinite) == (6, 96, 1)
+    assert (r.dead, r.clipped) == (1, 1)
+    assert r.zeros == 17
+    assert r.header_range("FFID") == (1, 2, 2)
+    assert r.hist.sum() == r.samples - r.zeros
+    finite = np.nan_to_num(samples)
+    assert r.max == finite.max() and r.min == finite.min()
+    assert np.isclose(r.rms, np.sqrt(np.mean(finite**2)))
+    table = r.trace_table()
+    np.testing.assert_array_equal(table["trace"], np.arange(6))
+    np.testing.assert_array_equal(table["dead"], [1, 0, 0, 0, 0, 0])
+
+
+def test_exponent_bins():
+    r = Report().update(np.array([[0.0, 0.75, -1.0, 3.0]]))
+    assert r.zeros == 1
+    j = np.flatnonzero(r.hist)
+    np.testing.assert_array_equal(j, np.arange(3) - EXP_MIN)
+    np.testing.assert_array_equal(r.edges[j], [0.5, 1.0, 2.0])
+
+
+@pytest.mark.parametrize("hist_range", [None, (-4.0, 4.0)])
+def test_merge(hist_range):
+    parts = [block(seed, n) for seed, n in ((1, 6), (2, 4), (3, 5))]
+    opts = dict(keys=["FFID", "CDP"], hist_range=hist_range, attributes=True)
+    whole = Report(**opts)
+    for samples, headers in parts:
+        whole.update(samples, headers)
+    first = 0
+    reports = []
+    for samples, headers in parts:
+        reports.append(Report(**opts).update(samples, headers, first))
+        first += len(samples)
+    merged = Report(**opts).merge(reports[2]).merge(reports[0]).merge(reports[1])
+    a, b = whole.summary(), merged.summary()
+    for k in ("traces", "samples", "min", "max", "zeros", "dead", "clipped"):
+        assert a[k] == b[k]
+    assert a["headers"] == b["headers"]
+    assert np.isclose(a["rms"], b["rms"]) and np.isclose(a["mean"], b["mean"])
+    np.testing.assert_array_equal(a["hist"], b["hist"])
+    table = merged.trace_table()
+    np.testing.assert_array_equal(np.sort(table["trace"]), np.arange(15))
+    order = np.argsort(table["trace"])
+    np.testing.assert_allclose(table["rms"][order], whole.trace_table()["rms"])
+
+
+def test_merge_different_options():
+    with pytest.raises(ValueError):
+        Report(["FFID"]).merge(Report(["CDP"]))
+    with pytest.raises(ValueError):
+        Report(hist_range=(0, 1)).merge(Report())
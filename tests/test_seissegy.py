@@ -0,0 +1,103 @@
+import numpy as np
+import pytest
+
+from benchmarks.generate import make_segy
+from seisfile import TraceFile
+from seisgather import GatherIndex
+
+TRACES = 20
+SAMPLES = 8
+
+
+class Sequential:
+    """Stand-in for C reader of ISegy, counting traces passed by it"""
+
+    def __init__(self, samples):
+        self.samples = samples
+        self.pos = 0
+        self.passed = 0
+        self.rewinds = 0
+
+    def rewind(self):
+        self.pos = 0
+        self.rewinds += 1
+
+    def end_of_data(self):
+        return self.pos == len(self.samples)
+
+    def read_header(self):
+        self.pos += 1
+        self.passed += 1
+
+    def read_samples(self, dtype=np.float64, window=None):
+        self.read_header()
+        return self.samples[self.pos - 1].astype(dtype)
+
+
+@pytest.fixture
+def unindexed(tmp_path, c_libs):
+    from seissegy import ISegy
+
+    name = str(tmp_path / "a.sgy")
+    make_segy(name, TRACES, SAMPLES)
+    with TraceFile(name) as f:
+        samples = f.read_block(slice(None))
+        table = f.header_table(["CDP"], slice(None))
+    r = ISegy(name)
+    c = Sequential(samples)
+    r._indexed = lambda: False
+    r._c_rewind = c.rewind
+    r._c_end_of_data = c.end_of_data
+    r._c_read_header = c.read_header
+    r.read_samples = c.read_samples
+    r.read_trace = lambda window=None: c.read_samples()
+    r._gathers[("CDP",)] = GatherIndex.from_table(["CDP"], table)
+    yield r, c, samples
+    r.close()
+
+
+def test_gathers_read_in_one_pass(unindexed):
+    r, c, samples = unindexed
+    np.testing.assert_array_equal(r.gather(np.float32, cdp=4), samples[6:8])
+    assert (c.rewinds, c.passed) == (1, 8)
+    gathers = list(r.gathers("CDP", dtype=np.float64))
+    assert len(gathers) == TRACES // 2
+    assert c.rewinds == 1 + TRACES // 2
+    assert c.passed == 8 + sum(values[0] * 2 for values, g in gathers)
+
+
+def test_traces_in_given_order(unindexed):
+    r, c, samples = unindexed
+    got = r[[15, 3, -1, 3]]
+    np.testing.assert_array_equal(np.stack(got), samples[[15, 3, 19, 3]])
+    assert (c.rewinds, c.passed) == (1, TRACES)
+    got = r[12:2:-4]
+    np.testing.assert_array_equal(np.stack(got), samples[12:2:-4])
+    assert (c.rewinds, c.passed) == (2, TRACES + 13)
+    assert r._block_at([], np.float64).shape == (0, 0)
+
+
+def test_header_table_capacity(unindexed, monkeypatch):
+    import seissegy
+
+    r, c, samples = unindexed
+    made = []
+
+    class Columns:
+        def __init__(self, keys, capacity):
+            made.append(capacity)
+            self.num = 0
+
+        def __len__(self):
+            return self.num
+
+        def append(self, ptr):
+            self.num += 1
+
+        def columns(self):
+            return {"CDP": np.zeros(self.num)}
+
+    monkeypatch.setattr(seissegy, "HeaderColumns", Columns)
+    assert r.read_header_table(["CDP"], 15, 1 << 40)["CDP"].size == 5
+    assert r.read_header_table(["CDP"], count=3)["CDP"].size == 3
+    assert made == [1024, 3]
@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+import seissort
+from benchmarks.generate import make_su
+from seisfile import TraceFile
+from seissegy import ISU, OSU
+
+TRACES = 30
+SAMPLES = 20
+# FFID is read from bytes of CDP
+REMAP = {"hdr_name": "FFID", "offset": 21, "format": 4}
+
+
+def test_run_writer_keeps_remaps(tmp_path, c_libs):
+    src = str(tmp_path / "a.su")
+    make_su(src, TRACES, SAMPLES)
+    with ISU(src) as reader:
+        reader.remap_trace_header(REMAP)
+        w = seissort._run_writer(reader, str(tmp_path / "run0"))
+        w.close()
+    if c_libs is not None:
+        calls = [
+            args[1:]
+            for name, args in c_libs["seissegy"].calls
+            if name == "seis_osu_remap_trace_header"
+        ]
+        assert calls == [(b"FFID", 21, 4)]
+
+
+def test_sort_remapped_su(tmp_path, c_libs):
+    if c_libs is not None:
+        pytest.skip("Fake libraries read no traces")
+    src = str(tmp_path / "a.su")
+    dst = str(tmp_path / "b.su")
+    make_su(src, TRACES, SAMPLES)
+    for method in ("permute", "runs"):
+        with ISU(src) as reader, OSU(dst) as writer:
+            reader.remap_trace_header(REMAP)
+            writer.remap_trace_header(REMAP)
+            num = seissort.sort(reader, writer, ["FFID"], memory=8000, method=method)
+        assert num == TRACES
+        with TraceFile(dst, "su", [REMAP]) as f:
+            ffid = f.header_table(["FFID"], slice(None))["FFID"]
+        assert np.all(np.diff(ffid) >= 0)
@@ -0,0 +1,53 @@
+import numpy as np
+
+import seisstats
+from benchmarks.generate import make_su
+from seissegy import ISU
+
+
+def test_written_block_of_lists():
+    st = seisstats.Stats()
+    seisstats._written_block(st, None, ([[1.0, 2.0], [3.0, 4.0]],))
+    seisstats._block(st, (np.zeros((3, 5)), {}), ())
+    assert (st.traces, st.samples) == (5, 19)
+    assert st.snapshot()["bytes"] == 5 * 240 + 19 * 4
+
+
+def test_reader_counts_python_reads(tmp_path, c_libs):
+    name = str(tmp_path / "a.su")
+    make_su(name, 20, 16)
+    snaps = []
+    with ISU(name) as r:
+        f = r.trace_file()
+        r.enable_stats(snaps.append, every=0)
+        r.seek(2)
+        block = r.read_block(8)
+        st = r.stats()
+        assert block.shape == (8, 16)
+        assert (st["traces"], st["samples"], st["seeks"]) == (8, 128, 1)
+        assert st["io_time"] > 0
+        r.disable_stats()
+        assert r.stats() is None
+        assert "_TraceFile__read_into" not in vars(f)
+        assert snaps[-1]["traces"] == 8
+        r.read_block(4)
+        # Counting again starts from zero and sees the same TraceFile
+        r.enable_stats()
+        r.seek(0)
+        r.read_block(4)
+        assert r.stats()["traces"] == 4 and r.stats()["io_time"] > 0
+        r.disable_stats()
+
+
+def test_remapped_file_is_counted(tmp_path, c_libs):
+    name = str(tmp_path / "a.su")
+    make_su(name, 20, 16)
+    with ISU(name) as r:
+        r.enable_stats()
+        r.remap_trace_header({"hdr_name": "FFID", "offset": 21, "format": 4})
+        r.seek(0)
+        r.read_block(20)
+        assert r.stats()["io_time"] > 0
+        f = r.trace_file()
+        r.disable_stats()
+        assert "_TraceFile__read_into" not in vars(f)
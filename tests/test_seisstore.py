@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+import seisstore
+from benchmarks.generate import make_segy
+from seisfile import TraceFile
+
+TRACES = 37
+SAMPLES = 50
+KEYS = ["FFID", "CDP", "OFFSET", "SAMP_INT"]
+
+
+@pytest.fixture
+def segy(tmp_path, c_libs):
+    name = str(tmp_path / "a.sgy")
+    make_segy(name, TRACES, SAMPLES)
+    return name
+
+
+def export(segy, path, **options):
+    from seissegy import ISegy
+
+    with ISegy(segy, backend="mmap") as f:
+        return seisstore.export(f, str(path), chunks=(8, 16), keys=KEYS, **options)
+
+
+@pytest.mark.parametrize("codec", seisstore.CODECS)
+def test_export(segy, tmp_path, codec):
+    with TraceFile(segy) as f, export(segy, tmp_path / "s", codec=codec) as s:
+        samples = f.read_block(slice(None), dtype=np.float32)
+        assert (len(s), s.samp_num, s.samp_int) == (TRACES, SAMPLES, 2000)
+        assert s.keys == KEYS
+        np.testing.assert_array_equal(s.read_block(slice(None)), samples)
+        idx = np.array([36, 0, 9, 17])
+        block, table = s.read_block(idx, keys=["CDP"], window=slice(10, 33))
+        np.testing.assert_array_equal(block, samples[idx, 10:33])
+        np.testing.assert_array_equal(table["CDP"], f.header_table(["CDP"], idx)["CDP"])
+        np.testing.assert_array_equal(
+            s.column("FFID"), f.header_table(["FFID"], slice(None))["FFID"]
+        )
+        np.testing.assert_array_equal(s.select("CDP <= 3"), np.arange(6))
+        with pytest.raises(ValueError):
+            s.column("CHAN")
+
+
+def test_quantize(segy, tmp_path):
+    with TraceFile(segy) as f, export(segy, tmp_path / "s", quantize=8) as s:
+        samples = f.read_block(slice(None))
+        got = s.read_block(slice(None))
+        # Every chunk is scaled by its own peak
+        assert np.abs(got - samples).max() <= np.abs(samples).max() / 127
+    with pytest.raises(ValueError):
+        export(segy, tmp_path / "t", quantize=4)
+
+
+def test_restore(segy, tmp_path):
+    class Writer:
+        def __init__(self):
+            self.blocks = []
+
+        def write_block(self, samples, table):
+            self.blocks.append((samples, table))
+
+    w = Writer()
+    with export(segy, tmp_path / "s") as s:
+        seisstore.restore(s, w)
+        assert [len(b[0]) for b in w.blocks] == [8, 8, 8, 8, 5]
+        samples = np.concatenate([b[0] for b in w.blocks])
+        np.testing.assert_array_equal(samples, s.read_block(slice(None)))
+        assert set(w.blocks[0][1]) == set(KEYS)
@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+
+from seistrace import sample_range, window_table
+
+
+def test_sample_range():
+    assert sample_range(slice(5, 9), 100) == (5, 9)
+    assert sample_range(slice(-10, None), 100) == (90, 100)
+    assert sample_range(slice(120, 130), 100) == (100, 100)
+    assert sample_range((0.01, 0.02), 100, 2000) == (5, 10)
+    assert sample_range((-1.0, 1.0), 100, 2000) == (0, 100)
+    assert sample_range((0.02, 0.01), 100, 2000) == (10, 10)
+    with pytest.raises(ValueError):
+        sample_range(slice(0, 10, 2), 100)
+    with pytest.raises(ValueError):
+        sample_range((0.0, 0.1), 100)
+
+
+def test_window_table():
+    table = {
+        "SAMP_NUM": np.array([100, 100]),
+        "DELAY_TIME": np.array([0, -4]),
+        "FFID": np.array([1, 2]),
+    }
+    window_table(table, 5, 20, 2000)
+    np.testing.assert_array_equal(table["SAMP_NUM"], [20, 20])
+    np.testing.assert_array_equal(table["DELAY_TIME"], [10, 6])
+    np.testing.assert_array_equal(table["FFID"], [1, 2])
+    assert window_table({}, 5, 20, 2000) == {}